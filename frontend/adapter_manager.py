@@ -77,6 +77,9 @@ def openAdapter(i_adapterFilePath):
         gamebase.forgetAdapter(adapterId)
         return None
 
+    # Get ready to look up screenshots
+    gamebase.startBuildingScreenshotIndex(adapterId)
+
     #
     return adapterId
 
@@ -330,6 +330,18 @@ class ColumnFilterBar(QWidget):
                         if len(betweenValues) == 2 and stringLooksLikeNumber(betweenValues[0]) and stringLooksLikeNumber(betweenValues[1]):
                             andTerms.append(tableColumnSpec["dbIdentifiers"][0] + " BETWEEN " + betweenValues[0] + " AND " + betweenValues[1])
 
+                        # Else if case-insensitive regular expression
+                        elif len(value) > 3 and value.startswith("/") and value.endswith("/i"):
+                            # Get regexp
+                            value = value[1:-2]
+
+                            # Format value as a string
+                            value = value.replace("'", "''")
+                            value = "'" + value + "'"
+
+                            #
+                            andTerms.append(tableColumnSpec["dbIdentifiers"][0] + " IREGEXP " + value)
+
                         # Else if regular expression
                         elif len(value) > 2 and value.startswith("/") and value.endswith("/"):
                             # Get regexp
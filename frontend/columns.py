@@ -1300,6 +1300,61 @@ g_tableColumnSpecs = [
     },
 ]
 
+# + + Indexes {{{
+
+# Lookup tables into g_tableColumnSpecs.
+# Call tableColumnSpec_rebuildIndexes() after changing g_tableColumnSpecs.
+
+g_tableColumnSpecsById = {}
+# (dict)
+# Dict has arbitrary key-value properties:
+#  Keys:
+#   (str)
+#   Column spec ID
+#  Values:
+#   (TableColumnSpec)
+
+g_tableColumnSpecsByDbIdentifier = {}
+# (dict)
+# Dict has arbitrary key-value properties:
+#  Keys:
+#   (str)
+#   One of the column spec's dbIdentifiers
+#  Values:
+#   (list of TableColumnSpec)
+#   In the same order as in g_tableColumnSpecs.
+
+g_tableColumnSpecsByUpperDbIdentifier = {}
+# (dict)
+# As g_tableColumnSpecsByDbIdentifier but with the keys in upper case.
+
+def tableColumnSpec_rebuildIndexes():
+    global g_tableColumnSpecsById
+    global g_tableColumnSpecsByDbIdentifier
+    global g_tableColumnSpecsByUpperDbIdentifier
+    g_tableColumnSpecsById = {}
+    g_tableColumnSpecsByDbIdentifier = {}
+    g_tableColumnSpecsByUpperDbIdentifier = {}
+
+    for tableColumnSpec in g_tableColumnSpecs:
+        # If more than one has the same ID, the first wins
+        if tableColumnSpec["id"] not in g_tableColumnSpecsById:
+            g_tableColumnSpecsById[tableColumnSpec["id"]] = tableColumnSpec
+
+        if "dbIdentifiers" in tableColumnSpec:
+            for dbIdentifier in tableColumnSpec["dbIdentifiers"]:
+                # Add the spec under each identifier (or case-folded identifier) only once
+                specs = g_tableColumnSpecsByDbIdentifier.setdefault(dbIdentifier, [])
+                if len(specs) == 0 or specs[-1] is not tableColumnSpec:
+                    specs.append(tableColumnSpec)
+                specs = g_tableColumnSpecsByUpperDbIdentifier.setdefault(dbIdentifier.upper(), [])
+                if len(specs) == 0 or specs[-1] is not tableColumnSpec:
+                    specs.append(tableColumnSpec)
+
+tableColumnSpec_rebuildIndexes()
+
+# + + }}}
+
 def tableColumnSpec_getBySlice(i_startPos=None, i_endPos=None):
     """
     Params:
@@ -1322,10 +1377,7 @@ def tableColumnSpec_getById(i_id):
      Either (TableColumnSpec)
      or (None)
     """
-    columns = [column  for column in g_tableColumnSpecs  if column["id"] == i_id]
-    if len(columns) == 0:
-        return None
-    return columns[0]
+    return g_tableColumnSpecsById.get(i_id)
 
 def tableColumnSpec_getByDbIdentifier(i_identifier, i_caseInsensitive=False):
     """
@@ -1342,16 +1394,10 @@ def tableColumnSpec_getByDbIdentifier(i_identifier, i_caseInsensitive=False):
     Returns:
      (list of TableColumnSpec)
     """
-    rv = []
-
-    for tableColumnSpec in g_tableColumnSpecs:
-        if "dbIdentifiers" in tableColumnSpec:
-            for dbIdentifier in tableColumnSpec["dbIdentifiers"]:
-                if dbIdentifier == i_identifier or (i_caseInsensitive and dbIdentifier.upper() == i_identifier.upper()):
-                    rv.append(tableColumnSpec)
-                    break
-
-    return rv
+    if i_caseInsensitive:
+        return list(g_tableColumnSpecsByUpperDbIdentifier.get(i_identifier.upper(), []))
+    else:
+        return list(g_tableColumnSpecsByDbIdentifier.get(i_identifier, []))
 
 # + }}}
 
@@ -1368,6 +1414,26 @@ g_tableColumns = []
 #    (int)
 #    In pixels
 
+g_tableColumnPositionsById = {}
+# (dict)
+# Lookup table of positions in g_tableColumns.
+# Call tableColumn_rebuildIndexes() after changing g_tableColumns.
+# Dict has arbitrary key-value properties:
+#  Keys:
+#   (str)
+#   Column ID
+#  Values:
+#   (int)
+#   Visible position of the column
+
+def tableColumn_rebuildIndexes():
+    global g_tableColumnPositionsById
+    g_tableColumnPositionsById = {}
+    for columnNo, column in enumerate(g_tableColumns):
+        # If more than one has the same ID, the first wins
+        if column["id"] not in g_tableColumnPositionsById:
+            g_tableColumnPositionsById[column["id"]] = columnNo
+
 # + + New column accessors {{{
 
 def tableColumn_setAll(i_columns):
@@ -1402,6 +1468,8 @@ def tableColumn_setAll(i_columns):
 
         g_tableColumns.append(newTableColumn)
 
+    tableColumn_rebuildIndexes()
+
 import copy
 def tableColumn_getAll():
     """
@@ -1460,17 +1528,16 @@ def tableColumn_add(i_id, i_width=None, i_beforeColumnId=None):
     else:
         g_tableColumns.insert(tableColumn_idToPos(i_beforeColumnId), newTableColumn)
 
+    tableColumn_rebuildIndexes()
+
     # Return the new table column
     return newTableColumn
 
 def tableColumn_remove(i_id):
-    foundColumnNo = None
-    for columnNo, column in enumerate(g_tableColumns):
-        if column["id"] == i_id:
-            foundColumnNo = columnNo
-            break
+    foundColumnNo = g_tableColumnPositionsById.get(i_id)
     if foundColumnNo != None:
         del(g_tableColumns[foundColumnNo])
+        tableColumn_rebuildIndexes()
 
 def tableColumn_toggle(i_id, i_addBeforeColumnId=None):
     """
@@ -1522,6 +1589,8 @@ def tableColumn_move(i_moveColumn, i_beforeColumn):
     else:
         g_tableColumns.insert(g_tableColumns.index(i_beforeColumn), i_moveColumn)
 
+    tableColumn_rebuildIndexes()
+
 def tableColumn_count():
     """
     Count the visible columns.
@@ -1573,11 +1642,10 @@ def tableColumn_getById(i_id):
      Either (TableColumn)
      or (None)
     """
-    # [could shorten with next()]
-    for column in g_tableColumns:
-        if column["id"] == i_id:
-            return column
-    return None
+    columnNo = g_tableColumnPositionsById.get(i_id)
+    if columnNo == None:
+        return None
+    return g_tableColumns[columnNo]
 
 def tableColumn_idToPos(i_id):
     """
@@ -1592,12 +1660,7 @@ def tableColumn_idToPos(i_id):
      Visible position of the column with the given ID.
      -1: There was no visible column with this ID.
     """
-    visiblePos = -1
-    for column in g_tableColumns:
-        visiblePos += 1
-        if i_id == column["id"]:
-            return visiblePos
-    return -1
+    return g_tableColumnPositionsById.get(i_id, -1)
 
 # + + }}}
 
@@ -1625,7 +1688,9 @@ def filterColumnsByDb(i_dbTableNames, i_dbSchema):
                         rv = False
         return rv
     g_tableColumnSpecs = [column  for column in g_tableColumnSpecs  if validateTableColumnSpec(column)]
+    tableColumnSpec_rebuildIndexes()
 
     # Remove columns from g_tableColumns that don't exist in g_tableColumnSpecs
     global g_tableColumns
     g_tableColumns = [column  for column in g_tableColumns  if tableColumnSpec_getById(column["id"])]
+    tableColumn_rebuildIndexes()
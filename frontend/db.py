@@ -6,11 +6,27 @@ import copy
 import os.path
 import re
 import collections
+import functools
+import threading
+import heapq
+import multiprocessing
+import concurrent.futures
+import pathlib
+import array
+
+# NumPy
+try:
+    import numpy
+    g_haveNumpy = True
+except ImportError:
+    g_haveNumpy = False
 
 # This program
+import settings
 import qt_extras
 import columns
 import sql
+import fulltext_index
 
 
 def sqliteRowToDict(i_row):
@@ -26,11 +42,218 @@ def sqliteRowToDict(i_row):
     """
     return { keyName: i_row[keyName]  for keyName in i_row.keys() }
 
+@functools.lru_cache(maxsize=256)
+def compileRegex(i_pattern, i_flags=0):
+    """
+    As re.compile() but remember recently compiled patterns,
+    since SQLite calls the REGEXP function with the same pattern for every row.
+
+    Params:
+     i_pattern:
+      (str)
+     i_flags:
+      (int)
+
+    Returns:
+     (re.Pattern)
+    """
+    return re.compile(i_pattern, i_flags)
+
 def sqliteRegexFunction(i_pattern, i_value):
     #print("sqliteRegexFunction(" + i_value + ", " + i_pattern + ")")
     #c_pattern = re.compile(r"\b" + i_pattern.lower() + r"\b")
-    compiledPattern = re.compile(i_pattern)
-    return compiledPattern.search(str(i_value)) is not None
+    # Like SQLite's own operators, give NULL for a NULL value
+    if i_value == None:
+        return None
+    if not isinstance(i_value, str):
+        i_value = str(i_value)
+    return compileRegex(i_pattern).search(i_value) is not None
+
+def sqliteIRegexFunction(i_pattern, i_value):
+    """
+    Case-insensitive version of sqliteRegexFunction().
+    """
+    if i_value == None:
+        return None
+    if not isinstance(i_value, str):
+        i_value = str(i_value)
+    return compileRegex(i_pattern, re.IGNORECASE).search(i_value) is not None
+
+def registerSqlFunctions(i_connection):
+    """
+    Add our custom SQL functions to a connection.
+
+    Params:
+     i_connection:
+      (sqlite3.Connection)
+    """
+    for functionName, function in [("REGEXP", sqliteRegexFunction), ("IREGEXP", sqliteIRegexFunction)]:
+        # Declare them deterministic so that SQLite can optimize calls with constant arguments,
+        # if this version of SQLite supports that
+        try:
+            i_connection.create_function(functionName, 2, function, deterministic=True)
+        except sqlite3.NotSupportedError:
+            i_connection.create_function(functionName, 2, function)
+
+# + Connection profiles {{{
+
+# Gamebases are never written to by this program,
+# so they can be attached read-only and with settings that suit reading.
+
+g_connectionProfiles = {
+    "default": {
+        "title": "SQLite defaults",
+        "attachMode": "readWrite",
+        "mmapSizeMb": 0,
+        "cacheSizeMb": None,
+        "tempStoreMemory": False,
+        "statementCacheSize": 128
+    },
+    "readOnly": {
+        "title": "Read-only",
+        "attachMode": "readOnly",
+        "mmapSizeMb": 0,
+        "cacheSizeMb": 16,
+        "tempStoreMemory": True,
+        "statementCacheSize": 256
+    },
+    "readOnlyMapped": {
+        "title": "Read-only, memory-mapped",
+        "attachMode": "readOnly",
+        "mmapSizeMb": 256,
+        "cacheSizeMb": 16,
+        "tempStoreMemory": True,
+        "statementCacheSize": 256
+    },
+    "immutableMapped": {
+        "title": "Read-only, memory-mapped, and unlocked where the file is read-only",
+        "attachMode": "immutable",
+        "mmapSizeMb": 256,
+        "cacheSizeMb": 16,
+        "tempStoreMemory": True,
+        "statementCacheSize": 256
+    }
+}
+# (dict)
+# Dictionary has:
+#  Keys:
+#   (str)
+#   Profile ID, as saved in the "connectionProfile" preference
+#  Values:
+#   (ConnectionProfile)
+
+# Type: ConnectionProfile
+#  (dict)
+#  Dictionary has specific key-value properties:
+#   title:
+#    (str)
+#    Name to show in the preferences window.
+#   attachMode:
+#    (str)
+#    How to attach database files.
+#    One of
+#     "readWrite"
+#      A plain ATTACH.
+#     "readOnly"
+#      With the URI parameter mode=ro.
+#     "immutable"
+#      With the URI parameter immutable=1 too, so that SQLite doesn't lock the file or check it for changes,
+#      for files that this program doesn't have permission to write to and so are not expected to change
+#      (eg. on read-only media), else as "readOnly".
+#   mmapSizeMb:
+#    (int)
+#    Maximum amount of each database file to access through memory mapping, or 0 to not use it.
+#   cacheSizeMb:
+#    Either (int)
+#     Size of the page cache for each database.
+#    or (None)
+#     Use SQLite's default.
+#   tempStoreMemory:
+#    (bool)
+#    True: Keep temporary tables and indices, eg. for sorting, in memory instead of in files.
+#   statementCacheSize:
+#    (int)
+#    Number of compiled statements for Python's sqlite3 module to keep per connection.
+
+g_defaultConnectionProfileId = "readOnly"
+
+def getConnectionProfile():
+    """
+    Get the connection profile chosen in the preferences,
+    with the sizes overridden if the preferences also specify those.
+
+    Returns:
+     (ConnectionProfile)
+    """
+    profileId = settings.preferences.get("connectionProfile", g_defaultConnectionProfileId)
+    if profileId not in g_connectionProfiles:
+        profileId = g_defaultConnectionProfileId
+    profile = dict(g_connectionProfiles[profileId])
+
+    if "connectionMmapSizeMb" in settings.preferences:
+        profile["mmapSizeMb"] = settings.preferences["connectionMmapSizeMb"]
+    if "connectionCacheSizeMb" in settings.preferences:
+        profile["cacheSizeMb"] = settings.preferences["connectionCacheSizeMb"]
+
+    return profile
+
+def connectContainer(i_connectionProfile, i_checkSameThread=True):
+    """
+    Open a connection to a new temporary database, to which databases can be attached,
+    set up according to a connection profile.
+
+    Params:
+     i_connectionProfile:
+      (ConnectionProfile)
+     i_checkSameThread:
+      (bool)
+      As for sqlite3.connect()'s check_same_thread.
+
+    Returns:
+     (sqlite3.Connection)
+    """
+    connection = sqlite3.connect("", uri=True, cached_statements=i_connectionProfile["statementCacheSize"], check_same_thread=i_checkSameThread)
+    if i_connectionProfile["tempStoreMemory"]:
+        connection.execute("PRAGMA temp_store = MEMORY")
+    # Add REGEXP and IREGEXP functions
+    registerSqlFunctions(connection)
+    return connection
+
+def getAttachStatements(i_dbFilePath, i_schemaName, i_connectionProfile):
+    """
+    Params:
+     i_dbFilePath:
+      (str)
+     i_schemaName:
+      (str)
+     i_connectionProfile:
+      (ConnectionProfile)
+
+    Returns:
+     (list of str)
+     SQL statements to attach the database to a connection that was opened by connectContainer()
+     and set it up according to the connection profile.
+    """
+    attachMode = i_connectionProfile["attachMode"]
+    if attachMode == "immutable" and os.access(i_dbFilePath, os.W_OK):
+        attachMode = "readOnly"
+
+    if attachMode == "readWrite":
+        attachTarget = i_dbFilePath
+    else:
+        attachTarget = pathlib.Path(os.path.abspath(i_dbFilePath)).as_uri() + "?mode=ro"
+        if attachMode == "immutable":
+            attachTarget += "&immutable=1"
+
+    statements = ["ATTACH DATABASE '" + attachTarget.replace("'", "''") + "' AS " + i_schemaName]
+    if i_connectionProfile["mmapSizeMb"] > 0:
+        statements.append("PRAGMA " + i_schemaName + ".mmap_size = " + str(int(i_connectionProfile["mmapSizeMb"] * 1024 * 1024)))
+    if i_connectionProfile["cacheSizeMb"] != None:
+        # (negative means a size in KiB rather than a number of pages)
+        statements.append("PRAGMA " + i_schemaName + ".cache_size = " + str(-int(i_connectionProfile["cacheSizeMb"] * 1024)))
+    return statements
+
+# + }}}
 
 g_containerDbs = []
 # (list of ContainerDb)
@@ -41,6 +264,9 @@ g_containerDbs = []
 #   connection:
 #    (sqlite3.Connection)
 #    Connection to a temporary database, to which actually used databases are attached
+#   connectionProfile:
+#    (ConnectionProfile)
+#    How the connection was set up and how to attach databases to it.
 #   maxAttachedDatabases:
 #    (int)
 #   attachedDatabases:
@@ -62,6 +288,26 @@ g_containerDbs = []
 #    (dict)
 #   fulfillableColumnIds:
 #    (set of str)
+#   fullTextSchemaName:
+#    Either (str)
+#     Schema name that this database's full-text index is attached with
+#     (to the same container).
+#    or (None)
+#     There's no full-text index for this database.
+#   fullTextIndexFilePath:
+#    Either (str)
+#    or (None)
+#   trigramColumnIds:
+#    (list of str)
+#    IDs of the columns that the full-text index also has a trigram index of.
+#   fingerprint:
+#    (tuple)
+#    The same column IDs as fulfillableColumnIds, whether there's a full-text index
+#    and the same column IDs as trigramColumnIds,
+#    identifying which SQL a game list query will get for this database.
+#   joinTerms:
+#    (dict)
+#    As returned from getSchemaJoinTerms().
 
 def openContainerDb():
     """
@@ -71,12 +317,12 @@ def openContainerDb():
     # Open a new temporary database to contain some attached databases
     # and append it to the g_containerDbs list
     global g_containerDbs
+    connectionProfile = getConnectionProfile()
     g_containerDbs.append({
-        "connection": sqlite3.connect(""),
+        "connection": connectContainer(connectionProfile),
+        "connectionProfile": connectionProfile,
         "attachedDatabases": {}
     })
-    # Add REGEXP function
-    g_containerDbs[-1]["connection"].create_function("REGEXP", 2, sqliteRegexFunction)
 
     # Lookup maximum possible number of attached databases
     compileOptions = [record[0]  for record in g_containerDbs[-1]["connection"].execute("PRAGMA compile_options").fetchall()]
@@ -88,8 +334,31 @@ def openContainerDb():
     #
     return g_containerDbs[-1]
 
-def getNonFullContainerDb():
+def getContainerDbAttachmentCount(i_containerDb):
+    """
+    Params:
+     i_containerDb:
+      (ContainerDb)
+
+    Returns:
+     (int)
+     Number of databases attached to the container, including full-text indexes.
     """
+    attachmentCount = 0
+    for schemaName, attachedDbInfo in i_containerDb["attachedDatabases"].items():
+        attachmentCount += 1
+        # (Count a full-text index that's still being built too, so that there's room to attach it when it's done)
+        if attachedDbInfo.get("fullTextSchemaName") != None or schemaName in g_fullTextIndexBuilds:
+            attachmentCount += 1
+    return attachmentCount
+
+def getNonFullContainerDb(i_attachmentCount=1):
+    """
+    Params:
+     i_attachmentCount:
+      (int)
+      Number of databases that need to be attached to the container.
+
     Returns:
      (ContainerDb)
     """
@@ -98,10 +367,13 @@ def getNonFullContainerDb():
     if len(g_containerDbs) == 0:
         return openContainerDb()
 
-    # Iterate existing container DBs and if find one with space for another attachment,
+    # Iterate existing container DBs and if find one with space for the attachments,
+    # that was set up with the currently preferred connection profile,
     # return it
+    connectionProfile = getConnectionProfile()
     for containerDb in g_containerDbs:
-        if len(containerDb["attachedDatabases"]) < containerDb["maxAttachedDatabases"]:
+        if getContainerDbAttachmentCount(containerDb) + i_attachmentCount <= containerDb["maxAttachedDatabases"] and \
+           containerDb["connectionProfile"] == connectionProfile:
             return containerDb
 
     # Else if no free space in existing container DBs,
@@ -139,6 +411,7 @@ def sanitizeSchemaName(i_name):
     existingSchemaNames = []
     for containerDb in g_containerDbs:
         existingSchemaNames.extend(list(containerDb["attachedDatabases"].keys()))
+        existingSchemaNames.extend([attachedDbInfo["fullTextSchemaName"]  for attachedDbInfo in containerDb["attachedDatabases"].values()  if attachedDbInfo.get("fullTextSchemaName") != None])
     rv = sanitized
     nextNo = 2
     while rv in existingSchemaNames:
@@ -147,10 +420,149 @@ def sanitizeSchemaName(i_name):
     #
     return rv
 
+# + Full-text index building {{{
+
+g_fullTextIndexBuilds = {}
+# (dict)
+# Dict has arbitrary key-value properties:
+#  Keys:
+#   (str)
+#   Schema name of an open database
+#  Values:
+#   (object)
+#   Token of the background thread building the database's full-text index,
+#   which abandons the build if this is no longer there.
+
+g_builtFullTextIndexes = []
+# (list of tuple)
+# Full-text indexes that have been built in the background but not yet attached.
+# Each tuple has elements:
+#  0:
+#   (str)
+#   Schema name of the database
+#  1:
+#   (object)
+#   Token from g_fullTextIndexBuilds
+#  2:
+#   Either (str)
+#    Path of index database file.
+#   or (None)
+#    The index couldn't be built.
+
+g_fullTextIndexBuildsLock = threading.Lock()
+# For g_fullTextIndexBuilds and g_builtFullTextIndexes
+
+def startBuildingFullTextIndex(i_schemaName, i_dbFilePath, i_sourceSelectSql, i_trigramSourceSelectSql):
+    """
+    Start building a database's full-text index on a background thread.
+    When it's done, attachBuiltFullTextIndexes() will attach it.
+
+    Params:
+     i_schemaName:
+      (str)
+     i_dbFilePath, i_sourceSelectSql, i_trigramSourceSelectSql:
+      As for fulltext_index.getIndex().
+    """
+    token = object()
+    with g_fullTextIndexBuildsLock:
+        g_fullTextIndexBuilds[i_schemaName] = token
+
+    def isCancelled():
+        return g_fullTextIndexBuilds.get(i_schemaName) is not token
+
+    def build():
+        fullTextIndexFilePath = fulltext_index.getIndex(i_dbFilePath, i_sourceSelectSql, i_trigramSourceSelectSql, isCancelled)
+        with g_fullTextIndexBuildsLock:
+            g_builtFullTextIndexes.append((i_schemaName, token, fullTextIndexFilePath))
+
+    thread = threading.Thread(target=build, name="Full-text index", daemon=True)
+    thread.start()
+
+def fullTextIndexesAreBuilding():
+    """
+    Returns:
+     (bool)
+     True: At least one full-text index is being built in the background, or is waiting to be attached.
+    """
+    return len(g_fullTextIndexBuilds) > 0
+
+def attachBuiltFullTextIndexes():
+    """
+    Attach the full-text indexes that have finished building in the background.
+    Call this periodically from the thread that opened the databases.
+
+    Returns:
+     (list of str)
+     Schema names of the databases whose indexes were attached.
+    """
+    with g_fullTextIndexBuildsLock:
+        builtFullTextIndexes = g_builtFullTextIndexes[:]
+        del(g_builtFullTextIndexes[:])
+
+    rv = []
+    for schemaName, token, fullTextIndexFilePath in builtFullTextIndexes:
+        # If the database was closed or reopened since the build started,
+        # ignore the result
+        with g_fullTextIndexBuildsLock:
+            if g_fullTextIndexBuilds.get(schemaName) is not token:
+                continue
+            del(g_fullTextIndexBuilds[schemaName])
+
+        if fullTextIndexFilePath == None:
+            continue
+        for containerDb in g_containerDbs:
+            if schemaName in containerDb["attachedDatabases"]:
+                if attachFullTextIndex(containerDb, schemaName, fullTextIndexFilePath):
+                    rv.append(schemaName)
+                break
+    return rv
+
+def attachFullTextIndex(i_containerDb, i_schemaName, i_fullTextIndexFilePath):
+    """
+    Attach a database's full-text index to the container that the database is attached to,
+    and note it in the database's AttachedDbInfo.
+
+    Params:
+     i_containerDb:
+      (ContainerDb)
+     i_schemaName:
+      (str)
+     i_fullTextIndexFilePath:
+      (str)
+
+    Returns:
+     (bool)
+     True: The index was attached.
+    """
+    dbInfo = i_containerDb["attachedDatabases"][i_schemaName]
+    fullTextSchemaName = sanitizeSchemaName("fulltext_" + i_schemaName)
+    try:
+        for attachStatement in getAttachStatements(i_fullTextIndexFilePath, fullTextSchemaName, i_containerDb["connectionProfile"]):
+            i_containerDb["connection"].execute(attachStatement)
+        dbInfo["fullTextSchemaName"] = fullTextSchemaName
+        dbInfo["fullTextIndexFilePath"] = i_fullTextIndexFilePath
+
+        # If it has trigrams, note which columns can use them
+        cursor = i_containerDb["connection"].execute("SELECT name FROM " + fullTextSchemaName + ".sqlite_master WHERE type = 'table'")
+        indexTableNames = [row[0]  for row in cursor.fetchall()]
+        dbInfo["trigramColumnIds"] = [columnId
+                                      for columnId in fulltext_index.g_trigramColumnIds
+                                      if columnId in dbInfo["fulfillableColumnIds"] and fulltext_index.trigramTableName(columnId) in indexTableNames]
+    except sqlite3.Error:
+        return False
+
+    dbInfo["fingerprint"] = (frozenset(dbInfo["fulfillableColumnIds"]), True, tuple(dbInfo["trigramColumnIds"]))
+    return True
+
+# + }}}
+
 def openDb(i_schemaName, i_dbFilePath):
     """
     Attach a new database.
 
+    If its full-text index is wanted but not up to date, it's attached without one to begin with,
+    and the index is built in the background; see attachBuiltFullTextIndexes().
+
     Params:
      i_schemaName:
       (str)
@@ -161,12 +573,18 @@ def openDb(i_schemaName, i_dbFilePath):
         raise RuntimeError("file doesn't exist")
 
     dbInfo = {
-        "dbFilePath": i_dbFilePath
+        "dbFilePath": i_dbFilePath,
+        "fullTextSchemaName": None,
+        "fullTextIndexFilePath": None,
+        "trigramColumnIds": []
     }
 
-    # Get a non-full container database and attach new database to it
-    containerDb = getNonFullContainerDb()
-    cursor = containerDb["connection"].execute("ATTACH DATABASE '" + i_dbFilePath.replace("'", "''") + "' AS " + i_schemaName)
+    # Get a non-full container database and attach new database to it,
+    # leaving room for its full-text index too if that's wanted
+    fullTextIndexEnabled = fulltext_index.isEnabled()
+    containerDb = getNonFullContainerDb(2 if fullTextIndexEnabled else 1)
+    for attachStatement in getAttachStatements(i_dbFilePath, i_schemaName, containerDb["connectionProfile"]):
+        containerDb["connection"].execute(attachStatement)
 
     try:
         # Get names of tables
@@ -209,14 +627,31 @@ def openDb(i_schemaName, i_dbFilePath):
                 fulfillableColumnIds.add(tableColumnSpec["id"])
         dbInfo["fulfillableColumnIds"] = fulfillableColumnIds
 
+        # Work out the joins to each table up front
+        dbInfo["joinTerms"] = getSchemaJoinTerms(i_schemaName)
+
+        dbInfo["fingerprint"] = (frozenset(fulfillableColumnIds), False, ())
+
         ## Only use the columns that the database actually has
         #columns.filterColumnsByDb(dbTableNames, dbInfo["schema"])
 
         #
         containerDb["attachedDatabases"][i_schemaName] = dbInfo
 
+        # If wanted, attach a full-text index of the database too,
+        # or if there isn't an up to date one, start building it in the background
+        if fullTextIndexEnabled:
+            fullTextIndexSourceSql = getFullTextIndexSourceSql(dbInfo, fulltext_index.g_indexedColumnIds)
+            trigramIndexSourceSql = getFullTextIndexSourceSql(dbInfo, fulltext_index.g_trigramColumnIds)
+            fullTextIndexFilePath = fulltext_index.getUpToDateIndex(i_dbFilePath, fullTextIndexSourceSql, trigramIndexSourceSql)
+            if fullTextIndexFilePath != None:
+                attachFullTextIndex(containerDb, i_schemaName, fullTextIndexFilePath)
+            else:
+                startBuildingFullTextIndex(i_schemaName, i_dbFilePath, fullTextIndexSourceSql, trigramIndexSourceSql)
+
     except:
         containerDb["connection"].execute("DETACH DATABASE " + i_schemaName)
+        containerDb["attachedDatabases"].pop(i_schemaName, None)
 
     ##
     #print("DBs:")
@@ -234,7 +669,20 @@ def closeDb(i_schemaName):
     for containerDb in g_containerDbs:
         if i_schemaName in containerDb["attachedDatabases"]:
             cursor = containerDb["connection"].execute("DETACH DATABASE " + i_schemaName)
+            fullTextSchemaName = containerDb["attachedDatabases"][i_schemaName]["fullTextSchemaName"]
+            if fullTextSchemaName != None:
+                containerDb["connection"].execute("DETACH DATABASE " + fullTextSchemaName)
+            # (Cancel the building of its full-text index if that's still going)
+            with g_fullTextIndexBuildsLock:
+                g_fullTextIndexBuilds.pop(i_schemaName, None)
             del(containerDb["attachedDatabases"][i_schemaName])
+            forgetCachedRecords(i_schemaName)
+
+            # If nothing is left attached to the container,
+            # close it, so that a later openDb() will get a container set up with the current connection profile
+            if len(containerDb["attachedDatabases"]) == 0:
+                containerDb["connection"].close()
+                g_containerDbs.remove(containerDb)
             break
 
 def getAttachDatabaseStatements():
@@ -247,11 +695,55 @@ def getAttachDatabaseStatements():
     for containerDb in g_containerDbs:
         attachDatabaseStatements = []
         for schemaName, attachedDbInfo in containerDb["attachedDatabases"].items():
-            attachDatabaseStatements.append("ATTACH DATABASE '" + attachedDbInfo["dbFilePath"].replace("'", "''") + "' AS " + schemaName)
+            attachDatabaseStatements.extend(getAttachedDbAttachDatabaseStatements(schemaName, attachedDbInfo))
         containerDbs.append(attachDatabaseStatements)
 
     return containerDbs
 
+def getAttachedDbAttachDatabaseStatements(i_schemaName, i_attachedDbInfo):
+    """
+    Params:
+     i_schemaName:
+      (str)
+     i_attachedDbInfo:
+      (AttachedDbInfo)
+
+    Returns:
+     (list of str)
+     Statements to attach the database, and its full-text index if it has one,
+     to another connection opened by connectContainer() with the same schema names.
+    """
+    connectionProfile = getContainerDbForSchemaName(i_schemaName)["connectionProfile"]
+    attachDatabaseStatements = getAttachStatements(i_attachedDbInfo["dbFilePath"], i_schemaName, connectionProfile)
+    if i_attachedDbInfo["fullTextSchemaName"] != None:
+        attachDatabaseStatements.extend(getAttachStatements(i_attachedDbInfo["fullTextIndexFilePath"], i_attachedDbInfo["fullTextSchemaName"], connectionProfile))
+    return attachDatabaseStatements
+
+def openWorkerConnections(i_attachDatabaseStatements):
+    """
+    Open a new set of container database connections with the same databases attached as g_containerDbs,
+    for running queries on another thread without tying up the main connections.
+
+    Params:
+     i_attachDatabaseStatements:
+      (list of list of str)
+      As returned from getAttachDatabaseStatements().
+
+    Returns:
+     (list of sqlite3.Connection)
+     One per container database, in the same order as g_containerDbs.
+     They may be used from any thread, but only one at a time.
+    """
+    connectionProfile = getConnectionProfile()
+    connections = []
+    for attachDatabaseStatements in i_attachDatabaseStatements:
+        connection = connectContainer(connectionProfile, False)
+        for attachDatabaseStatement in attachDatabaseStatements:
+            connection.execute(attachDatabaseStatement)
+        connection.row_factory = sqlite3.Row
+        connections.append(connection)
+    return connections
+
 def getContainerDbForSchemaName(i_schemaName):
     """
     Params:
@@ -413,6 +905,184 @@ connectionsFromGamesTable = {
     },
 }
 
+def getSchemaJoinTerms(i_schemaName):
+    """
+    Work out, for each table that can be joined to the Games table,
+    the FROM terms needed to join to it in a given database.
+
+    Params:
+     i_schemaName:
+      (str)
+
+    Returns:
+     (dict)
+     Dictionary has:
+      Keys:
+       (str)
+       Table name
+      Values:
+       (list of str)
+       FROM terms, with the schema name filled in,
+       including the joins to any tables that it depends on, before it.
+    """
+    rv = {}
+    for tableName in connectionsFromGamesTable.keys():
+        tableConnections = copy.deepcopy(connectionsFromGamesTable)
+        rv[tableName] = [fromTerm.replace("<schema name>", i_schemaName)  for fromTerm in getJoinTermsToTable(tableName, tableConnections)]
+    return rv
+
+def getJoinTermsToTables(i_tableNames, i_schemaJoinTerms):
+    """
+    Params:
+     i_tableNames:
+      (list of str)
+     i_schemaJoinTerms:
+      (dict)
+      As returned from getSchemaJoinTerms().
+
+    Returns:
+     (list of str)
+     FROM terms to join to all of the tables,
+     with each join appearing only once.
+    """
+    rv = []
+    for tableName in i_tableNames:
+        for fromTerm in i_schemaJoinTerms.get(tableName, []):
+            if fromTerm not in rv:
+                rv.append(fromTerm)
+    return rv
+
+# + }}}
+
+# + Full-text search {{{
+
+def getFullTextIndexSourceSql(i_attachedDbInfo, i_columnIds):
+    """
+    Params:
+     i_attachedDbInfo:
+      (AttachedDbInfo)
+     i_columnIds:
+      (list of str)
+      IDs of columns to select,
+      eg. fulltext_index.g_indexedColumnIds or fulltext_index.g_trigramColumnIds.
+
+    Returns:
+     (str)
+     SQL statement to select the text to index from a database attached with the schema name "source",
+     as wanted by fulltext_index.getIndex().
+    """
+    # Key the index by the rowid of the Games table rather than GA_Id,
+    # which SQLite can look the matching games up by directly whether or not GA_Id has an index
+    selectTerms = ["Games.rowid"]
+    neededTableNames = []
+    for columnId in i_columnIds:
+        if columnId in i_attachedDbInfo["fulfillableColumnIds"]:
+            tableColumnSpec = columns.tableColumnSpec_getById(columnId)
+            selectTerms.append(tableColumnSpec["dbIdentifiers"][0])
+            neededTableNames.extend(tableColumnSpec.get("dbTableNames", []))
+        else:
+            selectTerms.append("NULL")
+
+    fromTerms = ["source.Games"] + getJoinTermsToTables(neededTableNames, getSchemaJoinTerms("source"))
+    return "SELECT " + ", ".join(selectTerms) + " FROM " + " ".join(fromTerms)
+
+def getFullTextMatchSqlAndTableNames(i_schemaName, i_searchText):
+    """
+    Get an SQL expression that is true for games in a database whose text columns contain some search text.
+
+    If the database has a full-text index, this looks the words up in that,
+    else it falls back to a slower LIKE of each word against each column.
+
+    Params:
+     i_schemaName:
+      (str)
+     i_searchText:
+      (str)
+      Words and double-quoted phrases, all of which must be found.
+
+    Returns:
+     (tuple)
+     Tuple has elements:
+      0:
+       (str)
+       SQL expression
+      1:
+       (list of str)
+       Names of tables that need to be joined to for the expression.
+    """
+    dbInfo = getDbInfoForSchemaName(i_schemaName)
+    terms = fulltext_index.searchTextToTerms(i_searchText)
+    if len(terms) == 0:
+        return "1", []
+
+    # If there's an index, select the matching IDs from that
+    if dbInfo["fullTextSchemaName"] != None:
+        matchQuery = fulltext_index.termsToMatchQuery(terms)
+        return "Games.rowid IN (SELECT rowid FROM " + dbInfo["fullTextSchemaName"] + ".games WHERE games MATCH '" + matchQuery.replace("'", "''") + "')", []
+
+    # Else look for each term with LIKE in every column that the database has,
+    # at the start of a word like the index would (though only after a space, not other punctuation)
+    neededTableNames = []
+    columnIdentifiers = []
+    for columnId in fulltext_index.g_indexedColumnIds:
+        if columnId in dbInfo["fulfillableColumnIds"]:
+            tableColumnSpec = columns.tableColumnSpec_getById(columnId)
+            columnIdentifiers.append(tableColumnSpec["dbIdentifiers"][0])
+            neededTableNames.extend(tableColumnSpec.get("dbTableNames", []))
+    if len(columnIdentifiers) == 0:
+        return "0", []
+    termExpressions = []
+    for term in terms:
+        likePattern = "% " + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        likePattern = "'" + likePattern.replace("'", "''") + "'"
+        termExpressions.append("(" + " OR ".join(["(' ' || " + columnIdentifier + ") LIKE " + likePattern + " ESCAPE '\\'"  for columnIdentifier in columnIdentifiers]) + ")")
+    return "(" + " AND ".join(termExpressions) + ")", neededTableNames
+
+def getTrigramLikeSql(i_schemaName, i_tableColumnSpec, i_likePattern, i_onlyTruthMatters):
+    """
+    Get an SQL expression that gives the same result as a LIKE on a column,
+    but finds the matching games from the column's trigram index instead of testing every row.
+
+    Params:
+     i_schemaName:
+      (str)
+     i_tableColumnSpec:
+      (TableColumnSpec)
+     i_likePattern:
+      (str)
+      Unquoted LIKE pattern, without an ESCAPE.
+     i_onlyTruthMatters:
+      (bool)
+      True: The expression is only used to decide whether a row is selected,
+       so it may give false instead of NULL for NULL column values.
+       This allows a simpler expression that the query planner can drive the query from.
+
+    Returns:
+     Either (str)
+      SQL expression
+     or (None)
+      The column isn't in a trigram index,
+      or the pattern doesn't have enough text between wildcards for the index to help.
+    """
+    dbInfo = getDbInfoForSchemaName(i_schemaName)
+    if not i_tableColumnSpec["id"] in dbInfo["trigramColumnIds"]:
+        return None
+
+    # The index can only narrow down the rows using runs of at least three literal characters
+    if max([len(run)  for run in re.split("[%_]", i_likePattern)]) < 3:
+        return None
+
+    columnIdentifier = i_tableColumnSpec["dbIdentifiers"][0]
+    quotedPattern = "'" + i_likePattern.replace("'", "''") + "'"
+    inIndexSql = "Games.rowid IN (SELECT rowid FROM " + dbInfo["fullTextSchemaName"] + "." + fulltext_index.trigramTableName(i_tableColumnSpec["id"]) + " WHERE text LIKE " + quotedPattern + ")"
+
+    # Test the column with the LIKE as well, which only happens for the rows that the index found,
+    # so that the result is exactly what the LIKE alone would have given
+    if i_onlyTruthMatters:
+        return inIndexSql + " AND " + columnIdentifier + " LIKE " + quotedPattern
+    else:
+        return "CASE WHEN " + inIndexSql + " THEN " + columnIdentifier + " LIKE " + quotedPattern + " WHEN " + columnIdentifier + " IS NOT NULL THEN 0 END"
+
 # + }}}
 
 # + Run queries {{{
@@ -568,6 +1238,17 @@ def getGameList_getContainerDbSelectAndFromTerms(i_containerDb, i_tableColumnSpe
       Tuple has elements:
        0:
         (list)
+        Each element is:
+         (dict)
+         Dictionary has specific key-value properties:
+          selectTerms:
+           (list of str)
+          fromTerms:
+           (list of str)
+          whereExpression:
+           (str)
+           i_whereExpression normalized for this database.
+           This can differ between databases, eg. in how a full-text search is done.
        1:
         (str)
         Normalized i_whereExpression
@@ -577,6 +1258,7 @@ def getGameList_getContainerDbSelectAndFromTerms(i_containerDb, i_tableColumnSpe
        Description of error.
     """
     attachedDbsSelectAndFromTerms = []
+    normalizedWhereExpression = i_whereExpression
 
     # For each attached database in the container
     for schemaName in list(i_containerDb["attachedDatabases"].keys()):
@@ -615,9 +1297,9 @@ def getGameList_getContainerDbSelectAndFromTerms(i_containerDb, i_tableColumnSpe
             #    neededTableNames |= newNeededTableNames
             #    neededSelectTerms |= newNeededSelectTerms
             try:
-                normalizedWhereExpression, newNeededTableNames, newNeededSelectTerms = sql.normalizeSqlWhereExpressionToTableNamesAndSelectTerms(i_whereExpression, schemaName)
-                if normalizedWhereExpression != None:
-                    i_whereExpression = normalizedWhereExpression
+                schemaWhereExpression, newNeededTableNames, newNeededSelectTerms = sql.normalizeSqlWhereExpressionToTableNamesAndSelectTerms(i_whereExpression, schemaName)
+                if schemaWhereExpression != None:
+                    normalizedWhereExpression = schemaWhereExpression
                     for newNeededTableName in newNeededTableNames:
                         neededTableNames[newNeededTableName] = True
                     for newNeededSelectTerm in newNeededSelectTerms:
@@ -636,113 +1318,291 @@ def getGameList_getContainerDbSelectAndFromTerms(i_containerDb, i_tableColumnSpe
             if neededSelectTerm == "Games.GA_Id" or neededSelectTerm == "GA_Id":
                 continue
             selectTerms.append(neededSelectTerm)
-        tableConnections = copy.deepcopy(connectionsFromGamesTable)
-        for neededTableName in neededTableNames:
-            fromTerms += [fromTerm.replace("<schema name>", schemaName)  for fromTerm in getJoinTermsToTable(neededTableName, tableConnections)]
+        fromTerms += getJoinTermsToTables(neededTableNames, i_containerDb["attachedDatabases"][schemaName]["joinTerms"])
 
-        # Append selectTerms and fromTerms to return array
+        # Append selectTerms, fromTerms and WHERE expression to return array
         attachedDbsSelectAndFromTerms.append({
             "selectTerms": selectTerms,
-            "fromTerms": fromTerms
+            "fromTerms": fromTerms,
+            "whereExpression": normalizedWhereExpression.strip()
         })
 
-    return (attachedDbsSelectAndFromTerms, i_whereExpression.strip())
+    return (attachedDbsSelectAndFromTerms, normalizedWhereExpression.strip())
 
-def getGameList_getSql(i_tableColumnSpecIds, i_whereExpression, i_sortOperations, i_whereExpressionMightUseNonVisibleColumns=True):
+def getGameList_getOrderByClause(i_sortOperations):
     """
     Params:
-     i_tableColumnSpecIds:
-      (list of str)
-     i_whereExpression:
-      (str)
      i_sortOperations:
       (list)
       See ColumnNameBar.sort_operations
-     i_whereExpressionMightUseNonVisibleColumns:
-      (bool)
 
     Returns:
-     Either (list)
-      Each element is:
-       (tuple)
-       Tuple has elements:
-        0:
-         (sqlite3.Connection)
-        1:
-         (str)
-     or raise exception (SqlParseError)
-      args[0]:
-       (str)
-       Description of error.
+     (str)
+     An ORDER BY clause (including a leading newline) to append to a game list SQL statement,
+     or an empty string if there are no sort operations.
     """
-    attachedDbCount = sum([len(containerDb["attachedDatabases"])  for containerDb in g_containerDbs])
-    if attachedDbCount == 0:
-        return []
-
-    connectionsAndSqlTexts = []
-
-    # For each container
-    for containerDb in g_containerDbs:
-        # For each attached db,
-        # get SELECT and FROM terms, while normalizing WHERE expression
-        attachedDbsSelectAndFromTerms, i_whereExpression = getGameList_getContainerDbSelectAndFromTerms(containerDb, i_tableColumnSpecIds, i_whereExpression, i_whereExpressionMightUseNonVisibleColumns)
-
-        # For each attached db,
-        # concatenate SELECT and FROM terms into the beginnings of actual SQL statements
-        attachedDbsSqlTexts = []
-        for attachedDbSelectAndFromTerms in attachedDbsSelectAndFromTerms:
-            selectAndFromSql = "SELECT " + ", ".join(attachedDbSelectAndFromTerms["selectTerms"]) + "\nFROM " + " ".join(attachedDbSelectAndFromTerms["fromTerms"])
-            attachedDbsSqlTexts.append(selectAndFromSql)
-
-        # For each attached db,
-        # append WHERE clause
-        if i_whereExpression != "":
-            attachedDbsSqlTexts = [sqlText + "\nWHERE " + i_whereExpression  for sqlText in attachedDbsSqlTexts]
-            #sqlText += "\nWHERE " + i_whereExpression
-
-        # Concatenate all attached db SQL statements so far with "UNION ALL"
-        sqlText = "\nUNION ALL\n".join(attachedDbsSqlTexts)
-
-        # Append ORDER BY clause
-        if len(i_sortOperations) > 0:
-            sqlText += "\nORDER BY "
-
-            orderByTerms = []
-            for columnId, direction in i_sortOperations:
-                tableColumnSpec = columns.tableColumnSpec_getById(columnId)
-                term = '"' + tableColumnSpec["dbIdentifiers"][0] + '"'
-                term += " COLLATE NOCASE"
-                if direction == -1:
-                    term += " DESC"
-                orderByTerms.append(term)
-            sqlText += ", ".join(orderByTerms)
+    if len(i_sortOperations) == 0:
+        return ""
+
+    orderByTerms = []
+    for columnId, direction in i_sortOperations:
+        tableColumnSpec = columns.tableColumnSpec_getById(columnId)
+        term = '"' + tableColumnSpec["dbIdentifiers"][0] + '"'
+        term += " COLLATE NOCASE"
+        if direction == -1:
+            term += " DESC"
+        orderByTerms.append(term)
+    return "\nORDER BY " + ", ".join(orderByTerms)
+
+# + + Query plan cache {{{
+
+# Building the SQL for a game list query means resolving every visible column against every attached database
+# and parsing the WHERE expression once per database,
+# so remember the SQL built for the most recent combinations of inputs.
+#
+# The attached databases and their fingerprints are part of the key,
+# so opening or closing a gamebase gets new plans without needing to clear the cache.
 
-        connectionsAndSqlTexts.append((containerDb["connection"], sqlText))
+g_gameListPlans = collections.OrderedDict()
+# Keys are as returned from getGameList_getPlanKey(), in least to most recently used order.
+# Values are (GameListPlan).
+g_gameListPlansMaxCount = 64
 
-    #
-    return connectionsAndSqlTexts
+# Type: GameListPlan
+#  (dict)
+#  Dictionary has specific key-value properties:
+#   attachedDbsSqlTexts:
+#    (list of list of str)
+#    For each container database, in the same order as g_containerDbs,
+#    an SQL statement (without ORDER BY clause) for each database attached to the container,
+#    in the same order as its "attachedDatabases".
+#   orderByClause:
+#    (str)
+#    As returned from getGameList_getOrderByClause().
+#   whereExpression:
+#    (str)
+#    Normalized WHERE expression.
 
-def getGameList_executeSql(i_connectionsAndSqlTexts):
+def getGameList_getPlanKey(i_tableColumnSpecIds, i_whereExpression, i_sortOperations, i_whereExpressionMightUseNonVisibleColumns):
     """
     Params:
-     i_connectionsAndSqlTexts:
-      (list)
-      As returned from getGameList_getSql().
+     As for getGameList_getSql()
 
     Returns:
-     (list of sqlite3.Cursor)
+     (tuple)
+     A hashable key that is equal for any two calls that would produce the same SQL.
     """
-    rv = []
-    for connectionAndSqlText in i_connectionsAndSqlTexts:
-        rv.append(connectionAndSqlText[0].execute(connectionAndSqlText[1]))
-    return rv
-
-def getGameList_executeSqlAndFetchAll(i_connectionsAndSqlTexts, i_sortOperations):
+    return (
+        tuple(i_tableColumnSpecIds),
+        i_whereExpression.strip(),
+        tuple([tuple(sortOperation)  for sortOperation in i_sortOperations]),
+        i_whereExpressionMightUseNonVisibleColumns,
+        tuple([
+            tuple([(schemaName, attachedDbInfo["fingerprint"])  for schemaName, attachedDbInfo in containerDb["attachedDatabases"].items()])
+            for containerDb in g_containerDbs
+        ])
+    )
+
+def getGameList_getResultKey(i_tableColumnSpecIds, i_whereExpression, i_sortOperations, i_whereExpressionMightUseNonVisibleColumns):
     """
     Params:
-     i_connectionsAndSqlTexts:
-      (list)
-      As returned from getGameList_getSql().
+     As for getGameList_getSql()
+
+    Returns:
+     (tuple)
+     A hashable key that is equal for any two calls that would fetch the same rows,
+     ie. that would produce the same SQL with the same database files attached.
+    """
+    return (
+        getGameList_getPlanKey(i_tableColumnSpecIds, i_whereExpression, i_sortOperations, i_whereExpressionMightUseNonVisibleColumns),
+        tuple([
+            tuple([(schemaName, attachedDbInfo["dbFilePath"])  for schemaName, attachedDbInfo in containerDb["attachedDatabases"].items()])
+            for containerDb in g_containerDbs
+        ])
+    )
+
+def getGameList_getPlan(i_tableColumnSpecIds, i_whereExpression, i_sortOperations, i_whereExpressionMightUseNonVisibleColumns=True):
+    """
+    Get the SQL for a game list query,
+    reusing the result of an earlier call with the same inputs if there was one.
+
+    Params:
+     As for getGameList_getSql()
+
+    Returns:
+     Either (GameListPlan)
+      This may be shared with other callers so shouldn't be modified.
+     or raise exception (SqlParseError)
+      args[0]:
+       (str)
+       Description of error.
+    """
+    planKey = getGameList_getPlanKey(i_tableColumnSpecIds, i_whereExpression, i_sortOperations, i_whereExpressionMightUseNonVisibleColumns)
+
+    # If have this one already,
+    # mark it as most recently used and return it
+    if planKey in g_gameListPlans:
+        g_gameListPlans.move_to_end(planKey)
+        return g_gameListPlans[planKey]
+
+    # Build SQL for each container
+    attachedDbsSqlTexts = []
+    normalizedWhereExpression = i_whereExpression.strip()
+    for containerDb in g_containerDbs:
+        containerAttachedDbsSqlTexts, normalizedWhereExpression = getGameList_getAttachedDbSqlTexts(containerDb, i_tableColumnSpecIds, i_whereExpression, i_whereExpressionMightUseNonVisibleColumns)
+        attachedDbsSqlTexts.append(containerAttachedDbsSqlTexts)
+
+    plan = {
+        "attachedDbsSqlTexts": attachedDbsSqlTexts,
+        "orderByClause": getGameList_getOrderByClause(i_sortOperations),
+        "whereExpression": normalizedWhereExpression
+    }
+
+    # Store it, discarding the least recently used one if there are too many
+    g_gameListPlans[planKey] = plan
+    if len(g_gameListPlans) > g_gameListPlansMaxCount:
+        g_gameListPlans.popitem(last=False)
+
+    return plan
+
+# + + }}}
+
+def getGameList_getUnorderedSql(i_tableColumnSpecIds, i_whereExpression, i_whereExpressionMightUseNonVisibleColumns=True):
+    """
+    As getGameList_getSql() but without the ORDER BY clause.
+
+    Params:
+     i_tableColumnSpecIds:
+      (list of str)
+     i_whereExpression:
+      (str)
+     i_whereExpressionMightUseNonVisibleColumns:
+      (bool)
+
+    Returns:
+     As for getGameList_getSql().
+    """
+    attachedDbCount = sum([len(containerDb["attachedDatabases"])  for containerDb in g_containerDbs])
+    if attachedDbCount == 0:
+        return []
+
+    plan = getGameList_getPlan(i_tableColumnSpecIds, i_whereExpression, [], i_whereExpressionMightUseNonVisibleColumns)
+
+    # For each container,
+    # concatenate all attached db SQL statements with "UNION ALL"
+    connectionsAndSqlTexts = []
+    for containerDb, attachedDbsSqlTexts in zip(g_containerDbs, plan["attachedDbsSqlTexts"]):
+        connectionsAndSqlTexts.append((containerDb["connection"], "\nUNION ALL\n".join(attachedDbsSqlTexts)))
+
+    #
+    return connectionsAndSqlTexts
+
+def getGameList_getAttachedDbSqlTexts(i_containerDb, i_tableColumnSpecIds, i_whereExpression, i_whereExpressionMightUseNonVisibleColumns=True):
+    """
+    Params:
+     i_containerDb:
+      (ContainerDb)
+     i_tableColumnSpecIds:
+      (list of str)
+     i_whereExpression:
+      (str)
+     i_whereExpressionMightUseNonVisibleColumns:
+      (bool)
+
+    Returns:
+     Either (tuple)
+      Tuple has elements:
+       0:
+        (list of str)
+        An SQL statement (without ORDER BY clause) for each database attached to the container,
+        in the same order as i_containerDb["attachedDatabases"].
+       1:
+        (str)
+        Normalized i_whereExpression
+     or raise exception (SqlParseError)
+      args[0]:
+       (str)
+       Description of error.
+    """
+    # For each attached db,
+    # get SELECT and FROM terms, while normalizing WHERE expression
+    attachedDbsSelectAndFromTerms, i_whereExpression = getGameList_getContainerDbSelectAndFromTerms(i_containerDb, i_tableColumnSpecIds, i_whereExpression, i_whereExpressionMightUseNonVisibleColumns)
+
+    # For each attached db,
+    # concatenate SELECT and FROM terms into the beginnings of actual SQL statements
+    # and append WHERE clause
+    attachedDbsSqlTexts = []
+    for attachedDbSelectAndFromTerms in attachedDbsSelectAndFromTerms:
+        sqlText = "SELECT " + ", ".join(attachedDbSelectAndFromTerms["selectTerms"]) + "\nFROM " + " ".join(attachedDbSelectAndFromTerms["fromTerms"])
+        if attachedDbSelectAndFromTerms["whereExpression"] != "":
+            sqlText += "\nWHERE " + attachedDbSelectAndFromTerms["whereExpression"]
+        attachedDbsSqlTexts.append(sqlText)
+
+    return attachedDbsSqlTexts, i_whereExpression
+
+def getGameList_getSql(i_tableColumnSpecIds, i_whereExpression, i_sortOperations, i_whereExpressionMightUseNonVisibleColumns=True):
+    """
+    Params:
+     i_tableColumnSpecIds:
+      (list of str)
+     i_whereExpression:
+      (str)
+     i_sortOperations:
+      (list)
+      See ColumnNameBar.sort_operations
+     i_whereExpressionMightUseNonVisibleColumns:
+      (bool)
+
+    Returns:
+     Either (list)
+      Each element is:
+       (tuple)
+       Tuple has elements:
+        0:
+         (sqlite3.Connection)
+        1:
+         (str)
+     or raise exception (SqlParseError)
+      args[0]:
+       (str)
+       Description of error.
+    """
+    attachedDbCount = sum([len(containerDb["attachedDatabases"])  for containerDb in g_containerDbs])
+    if attachedDbCount == 0:
+        return []
+
+    plan = getGameList_getPlan(i_tableColumnSpecIds, i_whereExpression, i_sortOperations, i_whereExpressionMightUseNonVisibleColumns)
+
+    # For each container,
+    # concatenate all attached db SQL statements with "UNION ALL" and append ORDER BY clause
+    connectionsAndSqlTexts = []
+    for containerDb, attachedDbsSqlTexts in zip(g_containerDbs, plan["attachedDbsSqlTexts"]):
+        connectionsAndSqlTexts.append((containerDb["connection"], "\nUNION ALL\n".join(attachedDbsSqlTexts) + plan["orderByClause"]))
+
+    #
+    return connectionsAndSqlTexts
+
+def getGameList_executeSql(i_connectionsAndSqlTexts):
+    """
+    Params:
+     i_connectionsAndSqlTexts:
+      (list)
+      As returned from getGameList_getSql().
+
+    Returns:
+     (list of sqlite3.Cursor)
+    """
+    rv = []
+    for connectionAndSqlText in i_connectionsAndSqlTexts:
+        rv.append(connectionAndSqlText[0].execute(connectionAndSqlText[1]))
+    return rv
+
+def getGameList_executeSqlAndFetchAll(i_connectionsAndSqlTexts, i_sortOperations):
+    """
+    Params:
+     i_connectionsAndSqlTexts:
+      (list)
+      As returned from getGameList_getSql().
      i_sortOperations:
       (list)
       See ColumnNameBar.sort_operations
@@ -776,45 +1636,1123 @@ def getGameList_executeSqlAndFetchAll(i_connectionsAndSqlTexts, i_sortOperations
             for cursor in cursors:
                 sortedRecords.extend(cursor.fetchall())
 
-            # Convert sort operation column IDs to column numbers
-            sortColumnNosAndDirections = []
-            for columnId, direction in i_sortOperations:
-                tableColumnSpec = columns.tableColumnSpec_getById(columnId)
-                term = tableColumnSpec["dbIdentifiers"][0]
-                sortColumnNosAndDirections.append((columnNames.index(term), direction))
-
-            #
-            sortColumnNosAndDirections.reverse()
-            for sortColumnNo, sortDirection in sortColumnNosAndDirections:
-                def keyFunc(i_record):
-                    value = i_record[sortColumnNo]
-                    if isinstance(value, str):
-                        return value.upper()
-                    elif value == None:
-                        return ""
-                    else:
-                        return value
-                sortedRecords.sort(key=keyFunc, reverse=(sortDirection == -1))
+            resortRecords(sortedRecords, columnNames, i_sortOperations)
 
     #
     return columnNames, sortedRecords
 
-def getGameRecord(i_schemaName, i_gameId, i_includeRelatedGameNames=False):
+def resortRecords(io_records, i_columnNames, i_sortOperations):
+    """
+    Sort records in Python, approximating the ORDER BY that getGameList_getOrderByClause() would produce
+    (for when the records come from more than one container database).
+
+    Params:
+     io_records:
+      (list)
+     i_columnNames:
+      (list of str)
+     i_sortOperations:
+      (list)
+      See ColumnNameBar.sort_operations
+
+    Returns:
+     io_records:
+      Sorted in place.
+    """
+    # Convert sort operation column IDs to column numbers
+    sortColumnNosAndDirections = []
+    for columnId, direction in i_sortOperations:
+        tableColumnSpec = columns.tableColumnSpec_getById(columnId)
+        term = tableColumnSpec["dbIdentifiers"][0]
+        sortColumnNosAndDirections.append((i_columnNames.index(term), direction))
+
+    #
+    sortColumnNosAndDirections.reverse()
+    for sortColumnNo, sortDirection in sortColumnNosAndDirections:
+        def keyFunc(i_record):
+            value = i_record[sortColumnNo]
+            if isinstance(value, str):
+                return value.upper()
+            elif value == None:
+                return ""
+            else:
+                return value
+        io_records.sort(key=keyFunc, reverse=(sortDirection == -1))
+
+class WindowedGameList:
+    """
+    A read-only sequence of game records, standing in for the list returned by getGameList_executeSqlAndFetchAll(),
+    that up front only fetches the (SchemaName, GA_Id) key of every row, and fetches the full records
+    in blocks when they are first accessed, keeping a limited number of blocks around.
+    """
+    # Number of records to fetch at a time
+    blockSize = 256
+    # Number of blocks to keep before discarding the least recently used
+    maxBlockCount = 64
+
+    def __init__(self, i_connectionsAndUnorderedSqlTexts, i_sortOperations):
+        """
+        Params:
+         i_connectionsAndUnorderedSqlTexts:
+          (list)
+          As returned from getGameList_getUnorderedSql()
+          (though the connections may have been swapped for ones from openWorkerConnections()).
+          Must not be empty.
+         i_sortOperations:
+          (list)
+          See ColumnNameBar.sort_operations
+        """
+        self.connectionsAndUnorderedSqlTexts = i_connectionsAndUnorderedSqlTexts
+
+        # Get the column names of the full records
+        cursor = i_connectionsAndUnorderedSqlTexts[0][0].execute(i_connectionsAndUnorderedSqlTexts[0][1] + "\nLIMIT 0")
+        self.columnNames = [column[0]  for column in cursor.description]
+        # (Keep the cursor for its description, to make placeholder records with)
+        self.descriptionCursor = cursor
+
+        # Get the keys of all records in order,
+        # along with the values being sorted on if will need to merge results from more than one container
+        keySelectTerms = ['"SchemaName"', '"Games.GA_Id"']
+        if len(i_connectionsAndUnorderedSqlTexts) > 1:
+            for columnId, direction in i_sortOperations:
+                keySelectTerms.append('"' + columns.tableColumnSpec_getById(columnId)["dbIdentifiers"][0] + '"')
+        orderByClause = getGameList_getOrderByClause(i_sortOperations)
+
+        keyRecords = []
+        self.connectionsAndUnorderedSqlTextsBySchemaName = {}
+        #  (dict)
+        #  Dict has arbitrary key-value properties:
+        #   Keys:
+        #    (str)
+        #    Schema name
+        #   Values:
+        #    (tuple)
+        #    The element of connectionsAndUnorderedSqlTexts that the schema's records came from
+        #    (remembered here rather than looked up in g_containerDbs later, since gamebases may be opened or closed in the meantime)
+        for connection, sqlText in i_connectionsAndUnorderedSqlTexts:
+            connectionKeyRecords = connection.execute("SELECT " + ", ".join(keySelectTerms) + " FROM (" + sqlText + ")" + orderByClause).fetchall()
+            for keyRecord in connectionKeyRecords:
+                if keyRecord[0] not in self.connectionsAndUnorderedSqlTextsBySchemaName:
+                    self.connectionsAndUnorderedSqlTextsBySchemaName[keyRecord[0]] = (connection, sqlText)
+            keyRecords.extend(connectionKeyRecords)
+        if len(i_connectionsAndUnorderedSqlTexts) > 1 and len(i_sortOperations) > 0:
+            resortRecords(keyRecords, [term.strip('"')  for term in keySelectTerms], i_sortOperations)
+
+        self.keys = [(keyRecord[0], keyRecord[1])  for keyRecord in keyRecords]
+        #  (list of tuple)
+        #  Each tuple has elements:
+        #   0:
+        #    (str)
+        #    Schema name
+        #   1:
+        #    (int)
+        #    Game ID
+        self.keyRowNos = None
+        #  Either (dict)
+        #   Mapping of keys (as in self.keys) to row numbers.
+        #  or (None)
+        #   Not built yet.
+
+        self.blocks = collections.OrderedDict()
+        #  (collections.OrderedDict)
+        #  In order of use, least recent first.
+        #  Dict has arbitrary key-value properties:
+        #   Keys:
+        #    (int)
+        #    Block number
+        #   Values:
+        #    (list of sqlite3.Row)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __getitem__(self, i_rowNo):
+        """
+        Params:
+         i_rowNo:
+          (int)
+
+        Returns:
+         (sqlite3.Row)
+        """
+        if i_rowNo < 0:
+            i_rowNo += len(self.keys)
+        if i_rowNo < 0 or i_rowNo >= len(self.keys):
+            raise IndexError("WindowedGameList index out of range")
+
+        blockNo = i_rowNo // WindowedGameList.blockSize
+        block = self.blocks.get(blockNo)
+        if block == None:
+            block = self._fetchBlock(blockNo)
+            self.blocks[blockNo] = block
+            while len(self.blocks) > WindowedGameList.maxBlockCount:
+                self.blocks.popitem(last=False)
+        else:
+            self.blocks.move_to_end(blockNo)
+
+        return block[i_rowNo - blockNo * WindowedGameList.blockSize]
+
+    def __iter__(self):
+        for rowNo in range(len(self.keys)):
+            yield self[rowNo]
+
+    def _fetchBlock(self, i_blockNo):
+        """
+        Params:
+         i_blockNo:
+          (int)
+
+        Returns:
+         (list of sqlite3.Row)
+         For any game that can no longer be fetched (because its gamebase has been closed, or the game deleted),
+         a placeholder record with just its schema name and game ID, and NULL for every other column.
+        """
+        blockKeys = self.keys[i_blockNo * WindowedGameList.blockSize:(i_blockNo + 1) * WindowedGameList.blockSize]
+
+        # Group game IDs by schema
+        schemaGameIds = collections.OrderedDict()
+        for schemaName, gameId in blockKeys:
+            schemaGameIds.setdefault(schemaName, []).append(gameId)
+
+        # Fetch records for each schema from the connection that its keys came from
+        recordsByKey = {}
+        for schemaName, gameIds in schemaGameIds.items():
+            connection, sqlText = self.connectionsAndUnorderedSqlTextsBySchemaName[schemaName]
+            try:
+                cursor = connection.execute("SELECT * FROM (" + sqlText + ")\nWHERE \"SchemaName\" = ? AND \"Games.GA_Id\" IN (" + ", ".join(["?"] * len(gameIds)) + ")", [schemaName] + gameIds)
+                for record in cursor:
+                    recordsByKey[(record[0], record[1])] = record
+            except sqlite3.Error:
+                # Gamebase has been detached or its connection closed;
+                # leave its records to be filled in with placeholders
+                pass
+
+        # Return them in the same order as the keys
+        placeholderValues = (None, ) * (len(self.columnNames) - 2)
+        return [recordsByKey[key]  if key in recordsByKey else  sqlite3.Row(self.descriptionCursor, key + placeholderValues)  for key in blockKeys]
+
+    def keyAt(self, i_rowNo):
+        """
+        Params:
+         i_rowNo:
+          (int)
+
+        Returns:
+         (tuple)
+         Tuple has elements:
+          0:
+           (str)
+           Schema name
+          1:
+           (int)
+           Game ID
+        """
+        return self.keys[i_rowNo]
+
+    def rowNoOfKey(self, i_schemaName, i_gameId):
+        """
+        Params:
+         i_schemaName:
+          (str)
+         i_gameId:
+          (int)
+
+        Returns:
+         Either (int)
+         or (None)
+          No such game in this list.
+        """
+        if self.keyRowNos == None:
+            self.keyRowNos = {}
+            for rowNo, key in enumerate(self.keys):
+                if key not in self.keyRowNos:
+                    self.keyRowNos[key] = rowNo
+        return self.keyRowNos.get((i_schemaName, i_gameId))
+
+def getGameList_executeSqlWindowed(i_connectionsAndUnorderedSqlTexts, i_sortOperations):
     """
+    As getGameList_executeSqlAndFetchAll() but return the records as a WindowedGameList.
+
+    Params:
+     i_connectionsAndUnorderedSqlTexts:
+      (list)
+      As returned from getGameList_getUnorderedSql().
+     i_sortOperations:
+      (list)
+      See ColumnNameBar.sort_operations
+
+    Returns:
+     (tuple)
+     Tuple has elements:
+      0:
+       (list of str)
+       Column names
+      1:
+       (WindowedGameList)
+       Records
+    """
+    windowedGameList = WindowedGameList(i_connectionsAndUnorderedSqlTexts, i_sortOperations)
+    return windowedGameList.columnNames, windowedGameList
+
+class ColumnarGameList:
+    """
+    A read-only sequence of game records, standing in for the list returned by getGameList_executeSqlAndFetchAll(),
+    that keeps the values column by column instead of as a Python object per record.
+
+    A column whose values are all integers (such as Games.GA_Id) is kept in an array of them.
+    Any other column is kept as an array of codes into a list of its distinct values,
+    so that values which repeat across many records (publishers, genres, years and so on) are only stored once.
+
+    Indexing it gives a ColumnarGameListRow, which can be used like an sqlite3.Row.
+    """
+    def __init__(self, i_columnNames, i_columns, i_rowCount):
+        """
+        Params:
+         i_columnNames:
+          (list of str)
+         i_columns:
+          (list)
+          For each column, in the same order as i_columnNames:
+           (tuple)
+           Tuple has elements:
+            Either
+             0:
+              (array.array)
+              The values.
+             1:
+              (None)
+            or
+             0:
+              (list)
+              The distinct values.
+             1:
+              (array.array)
+              For each record, the position of its value in element 0.
+         i_rowCount:
+          (int)
+        """
+        self.columnNames = i_columnNames
+        self.columns = i_columns
+        self.rowCount = i_rowCount
+
+        # Like sqlite3.Row, look up a repeated column name as the first column with that name
+        self.columnNosByName = {}
+        for columnNo, columnName in enumerate(i_columnNames):
+            if columnName not in self.columnNosByName:
+                self.columnNosByName[columnName] = columnNo
+
+    @staticmethod
+    def fromRecordBatches(i_columnNames, i_recordBatches):
+        """
+        Params:
+         i_columnNames:
+          (list of str)
+         i_recordBatches:
+          (iterable)
+          Each element is:
+           (list of sqlite3.Row or tuple)
+
+        Returns:
+         (ColumnarGameList)
+        """
+        columnCount = len(i_columnNames)
+        integerArrays = [array.array("q")  for columnNo in range(columnCount)]
+        #  For each column, while all its values so far have been integers, an array of them,
+        #  and after that, None.
+        codeArrays = [None] * columnCount
+        codesByKey = [None] * columnCount
+        #  For each column, once it's had a value that isn't an integer,
+        #  the codes and a mapping from value key to code, where the codes count up in the order the keys were added.
+
+        rowCount = 0
+        for recordBatch in i_recordBatches:
+            # Work through the batch a column at a time
+            for columnNo, values in enumerate(zip(*recordBatch)):
+                valueTypes = set(map(type, values))
+
+                integerArray = integerArrays[columnNo]
+                if integerArray != None:
+                    if valueTypes <= {int}:
+                        try:
+                            integerArray.extend(values)
+                            continue
+                        except OverflowError:
+                            pass
+                    # Switch the column from an integer array to codes
+                    codesByKey[columnNo] = {}
+                    codeArrays[columnNo] = array.array("I")
+                    values = tuple(integerArray.tolist()[:rowCount]) + values
+                    valueTypes.add(int)
+                    integerArrays[columnNo] = None
+
+                # Key strings and NULLs by themselves, but other values by their type too
+                # so that 1, 1.0 and True get different codes
+                if valueTypes <= {str, type(None)}:
+                    keys = values
+                else:
+                    keys = [value  if value.__class__ is str or value is None else  (value.__class__, value)  for value in values]
+
+                # Give codes to the values not seen before, in any order, then look up every value's code
+                codeByKey = codesByKey[columnNo]
+                newKeys = set(keys).difference(codeByKey)
+                codeByKey.update(zip(newKeys, range(len(codeByKey), len(codeByKey) + len(newKeys))))
+                codeArrays[columnNo].extend(map(codeByKey.__getitem__, keys))
+            rowCount += len(recordBatch)
+
+        columns = []
+        for columnNo in range(columnCount):
+            if integerArrays[columnNo] != None:
+                columns.append((integerArrays[columnNo], None))
+            else:
+                distinctValues = [key[1]  if key.__class__ is tuple else  key  for key in codesByKey[columnNo].keys()]
+                columns.append((distinctValues, codeArrays[columnNo]))
+        return ColumnarGameList(i_columnNames, columns, rowCount)
+
+    def __len__(self):
+        return self.rowCount
+
+    def __getitem__(self, i_rowNo):
+        """
+        Params:
+         i_rowNo:
+          (int)
+
+        Returns:
+         (ColumnarGameListRow)
+        """
+        if i_rowNo < 0:
+            i_rowNo += self.rowCount
+        if i_rowNo < 0 or i_rowNo >= self.rowCount:
+            raise IndexError("ColumnarGameList index out of range")
+        return ColumnarGameListRow(self, i_rowNo)
+
+    def __iter__(self):
+        for rowNo in range(self.rowCount):
+            yield ColumnarGameListRow(self, rowNo)
+
+    def value(self, i_rowNo, i_columnNo):
+        """
+        Params:
+         i_rowNo:
+          (int)
+         i_columnNo:
+          (int)
+
+        Returns:
+         The value of one column of one record.
+        """
+        values, codes = self.columns[i_columnNo]
+        if codes == None:
+            return values[i_rowNo]
+        return values[codes[i_rowNo]]
+
+    def columnValues(self, i_columnNo):
+        """
+        Params:
+         i_columnNo:
+          (int)
+
+        Returns:
+         (list)
+         The value of one column of every record.
+        """
+        values, codes = self.columns[i_columnNo]
+        if codes == None:
+            return values.tolist()
+        return [values[code]  for code in codes]
+
+    def take(self, i_rowNos):
+        """
+        Params:
+         i_rowNos:
+          (iterable of int)
+
+        Returns:
+         (ColumnarGameList)
+         A new list of the records at some positions in this one, in the order given,
+         sharing this one's lists of distinct values.
+        """
+        rowNos = list(i_rowNos)
+        columns = []
+        for values, codes in self.columns:
+            if codes == None:
+                columns.append((array.array(values.typecode, [values[rowNo]  for rowNo in rowNos]), None))
+            else:
+                columns.append((values, array.array(codes.typecode, [codes[rowNo]  for rowNo in rowNos])))
+        return ColumnarGameList(self.columnNames, columns, len(rowNos))
+
+    def sizeBytes(self):
+        """
+        Returns:
+         (int)
+         Rough amount of memory that the records take up.
+        """
+        total = sys.getsizeof(self)
+        for values, codes in self.columns:
+            if codes == None:
+                total += values.itemsize * len(values)
+            else:
+                total += codes.itemsize * len(codes) + sys.getsizeof(values) + sum([sys.getsizeof(value)  for value in values])
+        return total
+
+class ColumnarGameListRow:
+    """
+    One record of a ColumnarGameList,
+    which can be indexed by column number or name like an sqlite3.Row.
+    """
+    __slots__ = ["gameList", "rowNo"]
+
+    def __init__(self, i_gameList, i_rowNo):
+        """
+        Params:
+         i_gameList:
+          (ColumnarGameList)
+         i_rowNo:
+          (int)
+        """
+        self.gameList = i_gameList
+        self.rowNo = i_rowNo
+
+    def __getitem__(self, i_key):
+        """
+        Params:
+         i_key:
+          Either (int)
+           Column number
+          or (str)
+           Column name
+
+        Returns:
+         The value of the column.
+        """
+        if isinstance(i_key, str):
+            columnNo = self.gameList.columnNosByName.get(i_key)
+            if columnNo == None:
+                raise IndexError("No item with that key")
+            return self.gameList.value(self.rowNo, columnNo)
+        if i_key < 0:
+            i_key += len(self.gameList.columns)
+        return self.gameList.value(self.rowNo, i_key)
+
+    def __len__(self):
+        return len(self.gameList.columns)
+
+    def __iter__(self):
+        for columnNo in range(len(self.gameList.columns)):
+            yield self.gameList.value(self.rowNo, columnNo)
+
+    def keys(self):
+        return list(self.gameList.columnNames)
+
+    def __repr__(self):
+        return "ColumnarGameListRow(" + repr(tuple(self)) + ")"
+
+def getGameList_executeSqlAndFetchColumnar(i_connectionsAndSqlTexts, i_sortOperations):
+    """
+    As getGameList_executeSqlAndFetchAll() but return the records as a ColumnarGameList,
+    without ever holding all of them as sqlite3.Row objects at once.
+
+    Params:
+     i_connectionsAndSqlTexts:
+      (list)
+      As returned from getGameList_getSql().
+     i_sortOperations:
+      (list)
+      See ColumnNameBar.sort_operations
+
+    Returns:
+     (tuple)
+     Tuple has elements:
+      0:
+       (list of str)
+       Column names
+      1:
+       (ColumnarGameList)
+       Records
+    """
+    cursors = getGameList_executeSql(i_connectionsAndSqlTexts)
+
+    columnNames = [column[0]  for column in cursors[0].description]
+
+    def recordBatches():
+        for cursor in cursors:
+            while True:
+                recordBatch = cursor.fetchmany(4096)
+                if len(recordBatch) == 0:
+                    break
+                yield recordBatch
+    records = ColumnarGameList.fromRecordBatches(columnNames, recordBatches())
+
+    # If the records came from more than one container database,
+    # merge them into one sort order
+    if len(cursors) > 1 and len(i_sortOperations) > 0:
+        records = getGameList_resortInMemory(records, columnNames, i_sortOperations, {})[0]
+
+    return columnNames, records
+
+# + + Sharded queries {{{
+
+# Since REGEXP is implemented in Python and holds the GIL while it runs,
+# to make use of more than one CPU core for a slow query over several gamebases,
+# the query for each gamebase can be run in a separate worker process,
+# and the already-sorted results of each merged together.
+#
+# The worker processes are forked from this one so that they don't need to re-import the program,
+# which means that this is only available on Linux.
+# So that they don't inherit SQLite connections, or locks held by threads that won't exist in them,
+# they are all forked at startup (see startShardProcessPool()), before any gamebases are opened or other threads started.
+
+g_shardProcessPool = None
+# Either (concurrent.futures.ProcessPoolExecutor)
+# or (None)
+#  Not started, or shut down after a worker process died.
+g_shardProcessPoolLock = threading.Lock()
+
+g_shardQueryNo = None
+# Either (multiprocessing.Value)
+#  Shared with the worker processes.
+#  Number of the latest sharded query.
+#  A worker gives up on its query as soon as this no longer matches the number that the query was submitted with,
+#  which happens when the query is cancelled or superseded.
+# or (None)
+#  The process pool hasn't been started.
+
+# Type: GameListShard
+#  (tuple)
+#  Tuple has elements:
+#   0:
+#    (str)
+#    Schema name
+#   1:
+#    (list of str)
+#    Statements to attach the database (and its full-text index),
+#    as returned from getAttachedDbAttachDatabaseStatements()
+#   2:
+#    (str)
+#    SQL statement, including ORDER BY clause
+#   3:
+#    (ConnectionProfile)
+#    To open the worker's connection with,
+#    as returned from getConnectionProfile() when the shard was made
+
+def canExecuteShards():
+    """
+    Returns:
+     (bool)
+    """
+    return sys.platform.startswith("linux") and "fork" in multiprocessing.get_all_start_methods()
+
+def startShardProcessPool():
+    """
+    Start the pool of worker processes for running shards.
+
+    This should be called at startup, before any gamebases are opened or other threads started
+    (and if it isn't, shards can't be run in this session).
+    """
+    global g_shardProcessPool
+    global g_shardQueryNo
+    with g_shardProcessPoolLock:
+        if g_shardProcessPool != None:
+            return
+
+        forkContext = multiprocessing.get_context("fork")
+        g_shardQueryNo = forkContext.Value("q", 0)
+        processPool = concurrent.futures.ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=forkContext)
+        # Forked processes aren't started on demand, but all together when the first task is submitted,
+        # so submit one now while it's still safe to fork
+        processPool.submit(int).result()
+        g_shardProcessPool = processPool
+
+def shardProcessPoolIsRunning():
+    """
+    Returns:
+     (bool)
+    """
+    return g_shardProcessPool != None
+
+def shutdownShardProcessPool():
+    global g_shardProcessPool
+    with g_shardProcessPoolLock:
+        if g_shardProcessPool != None:
+            g_shardProcessPool.shutdown(wait=False, cancel_futures=True)
+            g_shardProcessPool = None
+
+def getGameList_getShards(i_tableColumnSpecIds, i_whereExpression, i_sortOperations, i_whereExpressionMightUseNonVisibleColumns=True):
+    """
+    As getGameList_getSql() but get a separate SQL statement for each attached database.
+
+    Params:
+     As for getGameList_getSql()
+
+    Returns:
+     Either (list of GameListShard)
+     or raise exception (SqlParseError)
+      args[0]:
+       (str)
+       Description of error.
+    """
+    shards = []
+
+    plan = getGameList_getPlan(i_tableColumnSpecIds, i_whereExpression, i_sortOperations, i_whereExpressionMightUseNonVisibleColumns)
+
+    # For each attached db in each container
+    connectionProfile = getConnectionProfile()
+    for containerDb, attachedDbsSqlTexts in zip(g_containerDbs, plan["attachedDbsSqlTexts"]):
+        for (schemaName, attachedDbInfo), sqlText in zip(containerDb["attachedDatabases"].items(), attachedDbsSqlTexts):
+            shards.append((schemaName, getAttachedDbAttachDatabaseStatements(schemaName, attachedDbInfo), sqlText + plan["orderByClause"], connectionProfile))
+
+    return shards
+
+def getGameList_executeShard(i_shard, i_queryNo):
+    """
+    Run one shard's query, in a worker process.
+
+    Params:
+     i_shard:
+      (GameListShard)
+     i_queryNo:
+      (int)
+      Value of g_shardQueryNo for the query that this shard is part of.
+
+    Returns:
+     Either (tuple)
+      Tuple has elements:
+       0:
+        (list of str)
+        Column names
+       1:
+        (list of tuple)
+        Records
+     or raise exception (sqlite3.OperationalError)
+      If the query was cancelled or superseded, args[0] is "interrupted".
+    """
+    schemaName, attachDatabaseStatements, sqlText, connectionProfile = i_shard
+
+    connection = connectContainer(connectionProfile)
+    try:
+        # Stop as soon as the query is cancelled or superseded,
+        # rather than finish it and send back records that nobody wants
+        def progressHandler():
+            # Returning non-zero interrupts the query
+            return 1 if g_shardQueryNo.value != i_queryNo else 0
+        connection.set_progress_handler(progressHandler, 10000)
+
+        for attachDatabaseStatement in attachDatabaseStatements:
+            connection.execute(attachDatabaseStatement)
+        cursor = connection.execute(sqlText)
+        columnNames = [column[0]  for column in cursor.description]
+        records = cursor.fetchall()
+    finally:
+        connection.close()
+
+    return columnNames, records
+
+g_asciiUpperToLower = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+def sqliteNocaseSortKey(i_value):
+    """
+    Get a key to sort values in the same order as SQLite's ORDER BY with COLLATE NOCASE,
+    ie. NULLs first, then numbers, then text (with only ASCII letters folded to one case), then BLOBs.
+
+    Params:
+     i_value:
+      (None, int, float, str or bytes)
+
+    Returns:
+     (tuple)
+    """
+    if i_value == None:
+        return (0, 0)
+    elif isinstance(i_value, (int, float)):
+        return (1, i_value)
+    elif isinstance(i_value, str):
+        return (2, i_value.translate(g_asciiUpperToLower))
+    else:
+        return (3, i_value)
+
+class ReversedSortKey:
+    """
+    Wrap a sort key so that it sorts in the opposite order.
+    """
+    __slots__ = ["key"]
+
+    def __init__(self, i_key):
+        self.key = i_key
+
+    def __lt__(self, i_other):
+        return i_other.key < self.key
+
+    def __eq__(self, i_other):
+        return self.key == i_other.key
+
+def getGameList_executeShards(i_shards, i_sortOperations, i_isCancelled=None):
+    """
+    Run each shard's query in a worker process
+    and merge the results into the same form as getGameList_executeSqlAndFetchAll() returns.
+
+    Params:
+     i_shards:
+      (list of GameListShard)
+      As returned from getGameList_getShards().
+      Must not be empty.
+      The process pool must be running (see shardProcessPoolIsRunning()).
+     i_sortOperations:
+      (list)
+      See ColumnNameBar.sort_operations
+     i_isCancelled:
+      Either (function)
+       Polled while waiting for the worker processes.
+       Function has:
+        Returns:
+         (bool)
+         True: Give up on the query.
+      or (None)
+
+    Returns:
+     Either (tuple)
+      Tuple has elements:
+       0:
+        (list of str)
+        Column names
+       1:
+        (list of sqlite3.Row)
+        Records
+     or raise exception (sqlite3.OperationalError)
+      If i_isCancelled returned True, args[0] is "interrupted".
+     or raise exception (concurrent.futures.BrokenExecutor)
+      A worker process died.
+      The process pool is shut down, and shards can't be run for the rest of the session.
+    """
+    processPool = g_shardProcessPool
+
+    # Number this query, which also interrupts any workers that are still running an earlier one
+    with g_shardQueryNo.get_lock():
+        g_shardQueryNo.value += 1
+        queryNo = g_shardQueryNo.value
+
+    try:
+        futures = [processPool.submit(getGameList_executeShard, shard, queryNo)  for shard in i_shards]
+
+        # Wait for all of them to finish
+        while True:
+            done, notDone = concurrent.futures.wait(futures, timeout=0.05)
+            if len(notDone) == 0:
+                break
+            if i_isCancelled != None and i_isCancelled():
+                for future in notDone:
+                    future.cancel()
+                raise sqlite3.OperationalError("interrupted")
+
+        results = [future.result()  for future in futures]
+    except BaseException as e:
+        # Interrupt the workers that are still running this query
+        with g_shardQueryNo.get_lock():
+            if g_shardQueryNo.value == queryNo:
+                g_shardQueryNo.value += 1
+
+        if isinstance(e, concurrent.futures.BrokenExecutor):
+            shutdownShardProcessPool()
+        raise
+
+    columnNames = results[0][0]
+
+    # Merge the already-sorted results of each shard
+    if len(i_sortOperations) == 0:
+        mergedRecords = []
+        for result in results:
+            mergedRecords.extend(result[1])
+    else:
+        sortColumnNosAndDirections = []
+        for columnId, direction in i_sortOperations:
+            tableColumnSpec = columns.tableColumnSpec_getById(columnId)
+            sortColumnNosAndDirections.append((columnNames.index(tableColumnSpec["dbIdentifiers"][0]), direction))
+
+        def keyFunc(i_record):
+            key = []
+            for sortColumnNo, direction in sortColumnNosAndDirections:
+                if direction == -1:
+                    key.append(ReversedSortKey(sqliteNocaseSortKey(i_record[sortColumnNo])))
+                else:
+                    key.append(sqliteNocaseSortKey(i_record[sortColumnNo]))
+            return key
+
+        mergedRecords = heapq.merge(*[result[1]  for result in results], key=keyFunc)
+
+    # Turn the records back into sqlite3.Row objects,
+    # to be accessible by column name like those from a normal query
+    cursor = sqlite3.connect("").execute("SELECT " + ", ".join(['NULL AS "' + columnName.replace('"', '""') + '"'  for columnName in columnNames]) + " LIMIT 0")
+    return columnNames, [sqlite3.Row(cursor, record)  for record in mergedRecords]
+
+# + + }}}
+
+# + + Re-sorting in memory {{{
+
+# When only the sort order of the game list changes,
+# the rows already fetched can be put in the new order without querying again.
+#
+# Each sort column's values are first turned into integer ranks
+# (equal values getting equal ranks, in the order of sqliteNocaseSortKey()),
+# which are kept alongside the rows so that later sorts by the same column don't need to work them out again,
+# and which can then be sorted by several at once with numpy.lexsort() if NumPy is installed.
+
+def getSortRanks(i_records, i_columnNo):
+    """
+    Params:
+     i_records:
+      Either (list of sqlite3.Row)
+      or (ColumnarGameList)
+     i_columnNo:
+      (int)
+
+    Returns:
+     Either (numpy.ndarray)
+      If NumPy is installed.
+     or (list of int)
+     For each record, the rank of its value in the column,
+     in the order of ORDER BY ... COLLATE NOCASE.
+    """
+    # Get the values of the column, or for a dictionary-encoded column of a ColumnarGameList,
+    # the distinct values and the codes that refer to them
+    codes = None
+    if isinstance(i_records, ColumnarGameList):
+        values, codes = i_records.columns[i_columnNo]
+    else:
+        values = [record[i_columnNo]  for record in i_records]
+
+    # Sort the distinct values
+    # (much quicker than making an sqliteNocaseSortKey() for every record,
+    # because most values are strings which can be sorted as they are after folding ASCII letters)
+    distinctValues = set(values)
+    numbers = []
+    strings = []
+    others = []
+    for value in distinctValues:
+        if isinstance(value, (int, float)):
+            numbers.append(value)
+        elif isinstance(value, str):
+            strings.append(value)
+        elif value != None:
+            others.append(value)
+    def foldString(i_str):
+        # For ASCII-only strings, lower() only folds the ASCII letters, as NOCASE does
+        return i_str.lower() if i_str.isascii() else i_str.translate(g_asciiUpperToLower)
+    numbers.sort()
+    strings.sort(key=foldString)
+    others.sort()
+
+    # Give each distinct value a rank, with values that NOCASE treats as equal getting the same one
+    rankNosByValue = {}
+    if None in distinctValues:
+        rankNosByValue[None] = 0
+    rankNo = 0
+    for sortedValues, valueKey in [(numbers, None), (strings, foldString), (others, None)]:
+        previousKey = None
+        for valueNo, value in enumerate(sortedValues):
+            key = value if valueKey == None else valueKey(value)
+            if valueNo == 0 or key != previousKey:
+                rankNo += 1
+            rankNosByValue[value] = rankNo
+            previousKey = key
+
+    ranks = [rankNosByValue[value]  for value in values]
+    if codes != None:
+        ranks = [ranks[code]  for code in codes]
+    if g_haveNumpy:
+        return numpy.array(ranks, dtype=numpy.int64)
+    return ranks
+
+def takeRecords(i_records, i_recordNos):
+    """
+    Params:
+     i_records:
+      Either (list of sqlite3.Row)
+      or (ColumnarGameList)
+     i_recordNos:
+      (iterable of int)
+
+    Returns:
+     Either (list of sqlite3.Row)
+     or (ColumnarGameList)
+     The records at some positions in i_records, in the order given,
+     in the same kind of container as i_records.
+    """
+    if isinstance(i_records, ColumnarGameList):
+        return i_records.take(i_recordNos)
+    return [i_records[recordNo]  for recordNo in i_recordNos]
+
+def getGameList_resortInMemory(i_records, i_columnNames, i_sortOperations, i_sortRanks):
+    """
+    Put game list records into the order that a query with some sort operations would have given them.
+
+    Params:
+     i_records:
+      Either (list of sqlite3.Row)
+       As returned from getGameList_executeSqlAndFetchAll().
+      or (ColumnarGameList)
+     i_columnNames:
+      (list of str)
+     i_sortOperations:
+      (list)
+      See ColumnNameBar.sort_operations
+     i_sortRanks:
+      (dict)
+      Ranks already worked out for i_records.
+      Dict has:
+       Keys:
+        (int)
+        Column number
+       Values:
+        As returned from getSortRanks()
+
+    Returns:
+     Either (tuple)
+      Tuple has elements:
+       0:
+        Either (list of sqlite3.Row)
+        or (ColumnarGameList)
+        The same records in the new order, in the same kind of container as i_records.
+        Records that are equal in all the sort columns keep their previous order.
+       1:
+        (dict)
+        As i_sortRanks, for the records in the new order,
+        including the ranks of the sort columns.
+     or (None)
+      A sort column isn't in the records.
+    """
+    # Convert sort operation column IDs to column numbers
+    sortColumnNosAndDirections = []
+    for columnId, direction in i_sortOperations:
+        tableColumnSpec = columns.tableColumnSpec_getById(columnId)
+        if tableColumnSpec["dbIdentifiers"][0] not in i_columnNames:
+            return None
+        sortColumnNosAndDirections.append((i_columnNames.index(tableColumnSpec["dbIdentifiers"][0]), direction))
+
+    # Get the ranks of every sort column
+    sortRanks = dict(i_sortRanks)
+    for sortColumnNo, direction in sortColumnNosAndDirections:
+        if sortColumnNo not in sortRanks:
+            sortRanks[sortColumnNo] = getSortRanks(i_records, sortColumnNo)
+
+    # Get the new order of the record numbers
+    if len(sortColumnNosAndDirections) == 0:
+        return takeRecords(i_records, range(len(i_records))), sortRanks
+    if g_haveNumpy:
+        # lexsort() sorts by the last key first
+        order = numpy.lexsort([sortRanks[sortColumnNo] * direction  for sortColumnNo, direction in reversed(sortColumnNosAndDirections)])
+        return takeRecords(i_records, order.tolist()), {columnNo: ranks[order]  for columnNo, ranks in sortRanks.items()}
+    else:
+        # Combine the ranks of all the sort columns into a single integer per record,
+        # which sorts much quicker than a tuple
+        sortKeys = [0] * len(i_records)
+        for sortColumnNo, direction in sortColumnNosAndDirections:
+            ranks = sortRanks[sortColumnNo]
+            rankCount = max(ranks, default=0) + 1
+            if direction == 1:
+                sortKeys = [sortKey * rankCount + rank  for sortKey, rank in zip(sortKeys, ranks)]
+            else:
+                sortKeys = [sortKey * rankCount + rankCount - 1 - rank  for sortKey, rank in zip(sortKeys, ranks)]
+        order = sorted(range(len(i_records)), key=sortKeys.__getitem__)
+        return takeRecords(i_records, order), {columnNo: [ranks[recordNo]  for recordNo in order]  for columnNo, ranks in sortRanks.items()}
+
+# + + }}}
+
+# + + Game records {{{
+
+# The detail pane and the play and music columns fetch the same few records again and again
+# as the user moves around the game list,
+# so keep the most recently fetched ones.
+
+g_recordCache = collections.OrderedDict()
+# Keys are:
+#  (tuple)
+#  Tuple has elements:
+#   0:
+#    (str)
+#    Schema name
+#   1:
+#    (int)
+#    Game ID
+#   2:
+#    (str)
+#    One of
+#     "game"
+#     "gameWithRelated"
+#      As returned from getGameRecord() with and without i_includeRelatedGameNames
+#     "extras"
+#      As returned from getExtrasRecords()
+# Values are:
+#  Either (dict)
+#  or (list of dict)
+#  The record(s).
+# Entries are kept in least to most recently used order.
+g_recordCacheMaxCount = 256
+
+def getRecordCacheEntry(i_key):
+    """
+    Params:
+     i_key:
+      (tuple)
+      As for the keys of g_recordCache.
+
+    Returns:
+     Either (dict or list of dict)
+     or (None)
+      Not in the cache.
+    """
+    if i_key not in g_recordCache:
+        return None
+    g_recordCache.move_to_end(i_key)
+    return g_recordCache[i_key]
+
+def setRecordCacheEntry(i_key, i_value):
+    """
+    Params:
+     i_key:
+      (tuple)
+      As for the keys of g_recordCache.
+     i_value:
+      (dict or list of dict)
+    """
+    g_recordCache[i_key] = i_value
+    g_recordCache.move_to_end(i_key)
+    while len(g_recordCache) > g_recordCacheMaxCount:
+        g_recordCache.popitem(last=False)
+
+def forgetCachedRecords(i_schemaName):
+    """
+    Remove all records of one database from the cache,
+    eg. when it's closed.
+
+    Params:
+     i_schemaName:
+      (str)
+    """
+    for key in [key  for key in g_recordCache.keys()  if key[0] == i_schemaName]:
+        del(g_recordCache[key])
+
+def getGameRecordSql(i_schemaName, i_includeRelatedGameNames):
+    """
+    Get the SELECT and FROM clauses of the SQL statement that getGameRecord() and getGameRecords() run.
+    A WHERE clause that selects games by GA_Id should be appended to it.
+
     Params:
      i_schemaName:
       (str)
-     i_gameId:
-      (int)
      i_includeRelatedGameNames:
       (bool)
 
     Returns:
-     (dict)
+     (str)
     """
     containerDb = getContainerDbForSchemaName(i_schemaName)
     dbInfo = containerDb["attachedDatabases"][i_schemaName]
 
+    # If already built it for this database,
+    # return that
+    gameRecordSqlTexts = dbInfo.setdefault("gameRecordSqlTexts", {})
+    if i_includeRelatedGameNames in gameRecordSqlTexts:
+        return gameRecordSqlTexts[i_includeRelatedGameNames]
+
     # From Games table, select all fields
     fromTerms = [
         i_schemaName + ".Games"
@@ -848,11 +2786,12 @@ def getGameRecord(i_schemaName, i_gameId, i_includeRelatedGameNames=False):
 
     # For all other tables connected to Games
     # that are present in this database
-    tableConnections = copy.deepcopy(connectionsFromGamesTable)
-    tableNames = [tableName  for tableName in tableConnections.keys()  if tableName in dbInfo["schema"].keys()]
+    tableNames = [tableName  for tableName in connectionsFromGamesTable.keys()  if tableName in dbInfo["schema"].keys()]
     for tableName in tableNames:
         # Join to it
-        fromTerms += [fromTerm.replace("<schema name>", i_schemaName)  for fromTerm in getJoinTermsToTable(tableName, tableConnections)]
+        for fromTerm in dbInfo["joinTerms"][tableName]:
+            if fromTerm not in fromTerms:
+                fromTerms.append(fromTerm)
         # Select all fields from it
         if fullyQualifiedFieldNames:
             for field in dbInfo["schema"][tableName]:
@@ -865,17 +2804,118 @@ def getGameRecord(i_schemaName, i_gameId, i_includeRelatedGameNames=False):
     sql = "SELECT " + ", ".join(selectTerms)
     #  FROM
     sql += "\nFROM " + " ".join(fromTerms)
-    #  WHERE
-    sql += "\nWHERE Games.GA_Id = " + str(i_gameId)
+
+    gameRecordSqlTexts[i_includeRelatedGameNames] = sql
+    return sql
+
+def getGameRecord(i_schemaName, i_gameId, i_includeRelatedGameNames=False):
+    """
+    Params:
+     i_schemaName:
+      (str)
+     i_gameId:
+      (int)
+     i_includeRelatedGameNames:
+      (bool)
+
+    Returns:
+     (dict)
+     This is a copy which the caller may modify.
+    """
+    i_gameId = int(i_gameId)
+
+    # If have the record in the cache,
+    # return a copy of it
+    # (a record with the related game names will also do when they weren't asked for)
+    row = getRecordCacheEntry((i_schemaName, i_gameId, "gameWithRelated"))
+    if row == None and not i_includeRelatedGameNames:
+        row = getRecordCacheEntry((i_schemaName, i_gameId, "game"))
+    if row != None:
+        return dict(row)
 
     # Execute
+    containerDb = getContainerDbForSchemaName(i_schemaName)
     containerDb["connection"].row_factory = sqlite3.Row
-    #print(sql)
-    cursor = containerDb["connection"].execute(sql)
+    # (the SQL is the same for every game, so that the connection can reuse the compiled statement)
+    cursor = containerDb["connection"].execute(getGameRecordSql(i_schemaName, i_includeRelatedGameNames) + "\nWHERE Games.GA_Id = ?", (i_gameId,))
 
     row = cursor.fetchone()
     row = sqliteRowToDict(row)
-    return row
+    setRecordCacheEntry((i_schemaName, i_gameId, "gameWithRelated" if i_includeRelatedGameNames else "game"), row)
+    return dict(row)
+
+def getGameRecords(i_schemaName, i_gameIds, i_includeRelatedGameNames=False, i_chunkSize=500):
+    """
+    Get the records of many games,
+    fetching them a chunk at a time rather than with a query per game.
+
+    Params:
+     i_schemaName:
+      (str)
+     i_gameIds:
+      (iterable of int)
+     i_includeRelatedGameNames:
+      (bool)
+     i_chunkSize:
+      (int)
+      Number of games to fetch per query.
+      This is kept below SQLite's limit on the number of parameters in a statement,
+      and bounds the number of records held in memory at once.
+
+    Returns:
+     (generator)
+     Generates:
+      (dict)
+      As returned from getGameRecord(), for each of i_gameIds in the same order,
+      skipping any that aren't in the database.
+    """
+    containerDb = getContainerDbForSchemaName(i_schemaName)
+    selectAndFromSql = getGameRecordSql(i_schemaName, i_includeRelatedGameNames)
+
+    def fetchChunk(i_chunkGameIds):
+        """
+        Params:
+         i_chunkGameIds:
+          (list of int)
+
+        Returns:
+         (generator)
+         Generates:
+          (dict)
+        """
+        # Get what's in the record cache,
+        # and fetch the rest in one query
+        rowsByGameId = {}
+        for gameId in i_chunkGameIds:
+            row = getRecordCacheEntry((i_schemaName, gameId, "gameWithRelated"))
+            if row == None and not i_includeRelatedGameNames:
+                row = getRecordCacheEntry((i_schemaName, gameId, "game"))
+            if row != None:
+                rowsByGameId[gameId] = row
+        uncachedGameIds = list(dict.fromkeys([gameId  for gameId in i_chunkGameIds  if gameId not in rowsByGameId]))
+        if len(uncachedGameIds) > 0:
+            # (pad the parameter list to the chunk size, so that the connection can reuse the compiled statement for every full chunk)
+            parameters = uncachedGameIds + [uncachedGameIds[-1]] * (i_chunkSize - len(uncachedGameIds))
+            containerDb["connection"].row_factory = sqlite3.Row
+            cursor = containerDb["connection"].execute(selectAndFromSql + "\nWHERE Games.GA_Id IN (" + ", ".join(["?"] * len(parameters)) + ")", parameters)
+            # (not adding them to the record cache, which is for the few games that the user is looking at)
+            for row in cursor:
+                row = sqliteRowToDict(row)
+                rowsByGameId.setdefault(row["Games.GA_Id"], row)
+
+        # Yield in the order asked for
+        for gameId in i_chunkGameIds:
+            if gameId in rowsByGameId:
+                yield dict(rowsByGameId[gameId])
+
+    chunkGameIds = []
+    for gameId in i_gameIds:
+        chunkGameIds.append(int(gameId))
+        if len(chunkGameIds) == i_chunkSize:
+            yield from fetchChunk(chunkGameIds)
+            chunkGameIds = []
+    if len(chunkGameIds) > 0:
+        yield from fetchChunk(chunkGameIds)
 
 def getExtrasRecords(i_schemaName, i_gameId):
     """
@@ -886,21 +2926,57 @@ def getExtrasRecords(i_schemaName, i_gameId):
       (int)
 
     Returns:
-     (dict)
+     (list of dict)
+     This is a copy which the caller may modify.
     """
+    i_gameId = int(i_gameId)
+
+    # If have the records in the cache,
+    # return a copy of them
+    rows = getRecordCacheEntry((i_schemaName, i_gameId, "extras"))
+    if rows != None:
+        return [dict(row)  for row in rows]
+
     # Build SQL string
     sql = "SELECT '" + i_schemaName + "' AS \"SchemaName\", * FROM " + i_schemaName + ".Extras"
-    sql += "\nWHERE GA_Id = " + str(i_gameId)
+    sql += "\nWHERE GA_Id = ?"
     sql += "\nORDER BY DisplayOrder"
 
     # Execute
     containerDb = getContainerDbForSchemaName(i_schemaName)
     containerDb["connection"].row_factory = sqlite3.Row
-    cursor = containerDb["connection"].execute(sql)
+    cursor = containerDb["connection"].execute(sql, (i_gameId,))
 
     rows = cursor.fetchall()
     rows = [sqliteRowToDict(row)  for row in rows]
-    return rows
+    setRecordCacheEntry((i_schemaName, i_gameId, "extras"), rows)
+    return [dict(row)  for row in rows]
+
+def prefetchGameRecords(i_schemaNamesAndGameIds):
+    """
+    Fetch the records that the detail pane would show for some games into the cache,
+    if they aren't there already.
+
+    Params:
+     i_schemaNamesAndGameIds:
+      (list)
+      Each element is:
+       (tuple)
+       Tuple has elements:
+        0:
+         (str)
+         Schema name
+        1:
+         (int)
+         Game ID
+    """
+    for schemaName, gameId in i_schemaNamesAndGameIds:
+        if getContainerDbForSchemaName(schemaName) == None:
+            continue
+        getGameRecord(schemaName, gameId, True)
+        getExtrasRecords(schemaName, gameId)
+
+# + + }}}
 
 # + }}}
 
@@ -0,0 +1,344 @@
+# Python std
+import os
+import sqlite3
+import hashlib
+import re
+import threading
+
+# This program
+import settings
+import columns
+
+
+# A full-text (FTS5) index of the text columns of a gamebase,
+# kept in a database file of its own in the settings directory, since the gamebase itself may not be writable.
+#
+# Alongside the word index used by the search box, the file can hold a trigram index
+# of every filterable text column, which SQLite can use to find the rows that match a LIKE '%text%'
+# without scanning them all.
+# Each column gets a table of its own, because FTS5 checks each row that the trigrams find
+# against the LIKE pattern, and reading a row of just the one column for that is much quicker.
+#
+# The index records the modification time and size of the gamebase file it was built from,
+# and the SQL it was built with, and is rebuilt if any of those have changed.
+# (SQLite's data_version can only tell a connection about changes made while it is open,
+# so it can't be used to notice changes made between runs of the program.)
+
+# Change this when the layout of the index changes, so that existing indexes are rebuilt
+g_formatVersion = 2
+
+# IDs of the table columns whose text is indexed
+g_indexedColumnIds = ["name", "publisher", "developer", "programmer", "musician_name", "comment", "memo_text"]
+
+# IDs of the table columns whose text is indexed by trigrams
+g_trigramColumnIds = [tableColumnSpec["id"]
+                      for tableColumnSpec in columns.g_tableColumnSpecs
+                      if tableColumnSpec.get("filterable", False) and tableColumnSpec.get("mdbType", "").startswith(("Text", "Memo"))]
+
+g_fts5Available = None
+# Either (bool)
+# or (None)
+#  Not checked yet.
+
+g_trigramAvailable = None
+# Either (bool)
+# or (None)
+#  Not checked yet.
+
+g_buildLock = threading.Lock()
+# Held while checking and building an index,
+# so that two builds of the same index (eg. after a gamebase is closed and reopened) don't share the temporary file.
+
+def isFts5Available():
+    """
+    Returns:
+     (bool)
+     True: The SQLite library was built with the FTS5 extension.
+    """
+    global g_fts5Available
+    if g_fts5Available == None:
+        try:
+            connection = sqlite3.connect("")
+            connection.execute("CREATE VIRTUAL TABLE test USING fts5(text)")
+            connection.close()
+            g_fts5Available = True
+        except sqlite3.OperationalError:
+            g_fts5Available = False
+    return g_fts5Available
+
+def isTrigramAvailable():
+    """
+    Returns:
+     (bool)
+     True: The SQLite library has the FTS5 trigram tokenizer (added in SQLite 3.34).
+    """
+    global g_trigramAvailable
+    if g_trigramAvailable == None:
+        try:
+            connection = sqlite3.connect("")
+            connection.execute("CREATE VIRTUAL TABLE test USING fts5(text, tokenize = 'trigram')")
+            connection.close()
+            g_trigramAvailable = True
+        except sqlite3.OperationalError:
+            g_trigramAvailable = False
+    return g_trigramAvailable
+
+def isEnabled():
+    """
+    Returns:
+     (bool)
+    """
+    return settings.preferences.get("fullTextIndex", False) and isFts5Available()
+
+def indexFilePath(i_dbFilePath):
+    """
+    Params:
+     i_dbFilePath:
+      (str)
+      Path of gamebase database file.
+
+    Returns:
+     (str)
+     Path of index database file for it.
+    """
+    absolutePath = os.path.abspath(i_dbFilePath)
+    stemName = os.path.splitext(os.path.basename(absolutePath))[0]
+    return settings.settingsDirPath + os.sep + "fulltext" + os.sep + stemName + "_" + hashlib.sha1(absolutePath.encode("utf-8")).hexdigest()[:12] + ".sqlite"
+
+def sourceStamp(i_dbFilePath, i_sourceSelectSql, i_trigramSourceSelectSql):
+    """
+    Params:
+     i_dbFilePath:
+      (str)
+     i_sourceSelectSql:
+      (str)
+     i_trigramSourceSelectSql:
+      Either (str)
+      or (None)
+
+    Returns:
+     (str)
+     Text that will be different if the gamebase or what's taken from it has changed.
+    """
+    stat = os.stat(i_dbFilePath)
+    sqlHash = hashlib.sha1((i_sourceSelectSql + "\n" + str(i_trigramSourceSelectSql)).encode("utf-8")).hexdigest()
+    return str(g_formatVersion) + ":" + str(stat.st_mtime_ns) + ":" + str(stat.st_size) + ":" + sqlHash
+
+def getUpToDateIndex(i_dbFilePath, i_sourceSelectSql, i_trigramSourceSelectSql=None):
+    """
+    Get the index for a gamebase if it has already been built and is up to date,
+    without building it.
+
+    Params:
+     i_dbFilePath, i_sourceSelectSql, i_trigramSourceSelectSql:
+      As for getIndex().
+
+    Returns:
+     Either (str)
+      Path of index database file.
+     or (None)
+      There's no up to date index.
+    """
+    if not isFts5Available():
+        return None
+
+    indexPath = indexFilePath(i_dbFilePath)
+    try:
+        if not isTrigramAvailable():
+            i_trigramSourceSelectSql = None
+        stamp = sourceStamp(i_dbFilePath, i_sourceSelectSql, i_trigramSourceSelectSql)
+
+        if not os.path.isfile(indexPath):
+            return None
+        connection = sqlite3.connect(indexPath)
+        try:
+            row = connection.execute("SELECT value FROM meta WHERE key = 'sourceStamp'").fetchone()
+        except sqlite3.DatabaseError:
+            row = None
+        connection.close()
+        if row != None and row[0] == stamp:
+            return indexPath
+        return None
+    except (OSError, sqlite3.Error):
+        return None
+
+def getIndex(i_dbFilePath, i_sourceSelectSql, i_trigramSourceSelectSql=None, i_isCancelled=None):
+    """
+    Get the index for a gamebase,
+    building or rebuilding it first if necessary.
+
+    This can take a while for a large gamebase, and is safe to call from a background thread.
+
+    Params:
+     i_dbFilePath:
+      (str)
+      Path of gamebase database file.
+     i_sourceSelectSql:
+      (str)
+      SQL statement that selects the rows to index from the gamebase,
+      when it's attached with the schema name "source".
+      It should select the rowid of a game followed by a column for each of g_indexedColumnIds, in that order.
+     i_trigramSourceSelectSql:
+      Either (str)
+       Similarly, SQL statement that selects the rows to index by trigrams,
+       with a column for each of g_trigramColumnIds.
+      or (None)
+       Don't make a trigram index.
+     i_isCancelled:
+      Either (function)
+       Function with no parameters that returns True if the build should be abandoned.
+       It's called from time to time while building.
+      or (None)
+       Never abandon the build.
+
+    Returns:
+     Either (str)
+      Path of index database file.
+     or (None)
+      The index couldn't be built, or the build was cancelled.
+    """
+    if not isFts5Available():
+        return None
+
+    with g_buildLock:
+        # If already have an up to date index,
+        # return it
+        indexPath = getUpToDateIndex(i_dbFilePath, i_sourceSelectSql, i_trigramSourceSelectSql)
+        if indexPath != None:
+            return indexPath
+
+        if i_isCancelled != None and i_isCancelled():
+            return None
+
+        indexPath = indexFilePath(i_dbFilePath)
+        try:
+            if not isTrigramAvailable():
+                i_trigramSourceSelectSql = None
+            stamp = sourceStamp(i_dbFilePath, i_sourceSelectSql, i_trigramSourceSelectSql)
+
+            buildIndex(indexPath, i_dbFilePath, i_sourceSelectSql, i_trigramSourceSelectSql, stamp, i_isCancelled)
+            return indexPath
+        except (OSError, sqlite3.Error):
+            if i_isCancelled != None and i_isCancelled():
+                return None
+            import traceback
+            print(traceback.format_exc())
+            return None
+
+def buildIndex(i_indexPath, i_dbFilePath, i_sourceSelectSql, i_trigramSourceSelectSql, i_stamp, i_isCancelled=None):
+    """
+    Params:
+     i_indexPath:
+      (str)
+     i_dbFilePath:
+      (str)
+     i_sourceSelectSql:
+      (str)
+      As for getIndex().
+     i_trigramSourceSelectSql:
+      Either (str)
+      or (None)
+      As for getIndex().
+     i_stamp:
+      (str)
+      As returned from sourceStamp().
+     i_isCancelled:
+      Either (function)
+      or (None)
+      As for getIndex().
+
+    Returns:
+     -
+     or raise exception (sqlite3.OperationalError)
+      The build was cancelled.
+    """
+    os.makedirs(os.path.dirname(i_indexPath), exist_ok=True)
+
+    # Build into a temporary file and then move it into place,
+    # so that an interrupted build doesn't leave a partial index that looks complete
+    temporaryPath = i_indexPath + ".tmp"
+    if os.path.exists(temporaryPath):
+        os.remove(temporaryPath)
+
+    connection = sqlite3.connect(temporaryPath)
+    if i_isCancelled != None:
+        connection.set_progress_handler(lambda: 1 if i_isCancelled() else 0, 10000)
+    try:
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.execute("ATTACH DATABASE '" + i_dbFilePath.replace("'", "''") + "' AS source")
+        connection.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        connection.execute("CREATE VIRTUAL TABLE games USING fts5(" + ", ".join(g_indexedColumnIds) + ", tokenize = 'unicode61 remove_diacritics 2')")
+        connection.execute("INSERT INTO games (rowid, " + ", ".join(g_indexedColumnIds) + ") " + i_sourceSelectSql)
+        connection.execute("INSERT INTO games (games) VALUES ('optimize')")
+        if i_trigramSourceSelectSql != None:
+            connection.execute("CREATE TEMP TABLE trigramSource (id INTEGER PRIMARY KEY, " + ", ".join(g_trigramColumnIds) + ")")
+            connection.execute("INSERT INTO trigramSource " + i_trigramSourceSelectSql)
+            for columnId in g_trigramColumnIds:
+                tableName = trigramTableName(columnId)
+                connection.execute("CREATE VIRTUAL TABLE " + tableName + " USING fts5(text, tokenize = 'trigram', detail = 'none')")
+                connection.execute("INSERT INTO " + tableName + " (rowid, text) SELECT id, " + columnId + " FROM trigramSource WHERE " + columnId + " IS NOT NULL")
+                connection.execute("INSERT INTO " + tableName + " (" + tableName + ") VALUES ('optimize')")
+            connection.execute("DROP TABLE trigramSource")
+        connection.execute("INSERT INTO meta (key, value) VALUES ('sourceStamp', ?)", (i_stamp,))
+        connection.commit()
+        connection.execute("DETACH DATABASE source")
+    except:
+        # Don't leave the partial index behind
+        connection.close()
+        os.remove(temporaryPath)
+        raise
+    connection.close()
+
+    os.replace(temporaryPath, i_indexPath)
+
+def trigramTableName(i_columnId):
+    """
+    Params:
+     i_columnId:
+      (str)
+      One of g_trigramColumnIds.
+
+    Returns:
+     (str)
+     Name of the table in the index database that has the trigrams of that column,
+     in a single column called "text".
+    """
+    return "trigrams_" + i_columnId
+
+# + Search text {{{
+
+def searchTextToTerms(i_searchText):
+    """
+    Split text typed in a search box into words and double-quoted phrases.
+
+    Params:
+     i_searchText:
+      (str)
+
+    Returns:
+     (list of str)
+    """
+    terms = []
+    for match in re.finditer(r'"([^"]*)"?|(\S+)', i_searchText):
+        term = match.group(1) if match.group(1) != None else match.group(2)
+        term = term.strip()
+        if term != "":
+            terms.append(term)
+    return terms
+
+def termsToMatchQuery(i_terms):
+    """
+    Params:
+     i_terms:
+      (list of str)
+      As returned from searchTextToTerms().
+
+    Returns:
+     (str)
+     An FTS5 query that matches rows containing all of the terms,
+     each of which may be the start of a longer word.
+    """
+    return " ".join(['"' + term.replace('"', '""') + '"*'  for term in i_terms])
+
+# + }}}
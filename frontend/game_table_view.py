@@ -1,4 +1,5 @@
 # Python std
+import sys
 import sqlite3
 import functools
 import copy
@@ -6,6 +7,9 @@ import random
 import os
 import zipfile
 import tempfile
+import collections
+import concurrent.futures
+import pickle
 
 # Qt
 from PySide2.QtCore import *
@@ -22,6 +26,7 @@ import frontend_utils
 import sql
 import gamebase
 import settings
+import thumbnail_cache
 
 
 # + Game table view {{{
@@ -189,6 +194,496 @@ def screenshotPathToPixmap(i_screenshotPath):
     except:
         return None
 
+# + + Pixmap cache {{{
+
+class PixmapCache:
+    """
+    A memory-bounded cache of pixmaps that have already been scaled to the size they are drawn at in the table,
+    discarding the least recently used ones when over budget.
+    """
+    def __init__(self):
+        self.pixmaps = collections.OrderedDict()
+        #  (collections.OrderedDict)
+        #  In order of use, least recent first.
+        #  Dict has arbitrary key-value properties:
+        #   Keys:
+        #    (tuple)
+        #    As passed to insert()
+        #   Values:
+        #    (tuple)
+        #    Tuple has elements:
+        #     0:
+        #      (QPixmap)
+        #      A null pixmap if the image couldn't be loaded.
+        #     1:
+        #      (int)
+        #      Approximate memory used by the pixmap, in bytes
+        self.byteCount = 0
+        #  (int)
+        #  Total of the sizes of all of the pixmaps in self.pixmaps
+
+        self.hitCount = 0
+        self.missCount = 0
+
+    @staticmethod
+    def maxByteCount():
+        """
+        Returns:
+         (int)
+         The memory budget from the preferences, in bytes.
+        """
+        try:
+            megabytes = float(settings.preferences.get("pixmapCacheSizeMb", 128))
+        except ValueError:
+            megabytes = 128
+        return int(max(megabytes, 0) * 1024 * 1024)
+
+    @staticmethod
+    def pixmapByteCount(i_pixmap):
+        """
+        Params:
+         i_pixmap:
+          (QPixmap)
+
+        Returns:
+         (int)
+        """
+        # Count a small amount even for null pixmaps, for the bookkeeping overhead
+        return i_pixmap.width() * i_pixmap.height() * max(i_pixmap.depth(), 8) // 8 + 64
+
+    def contains(self, i_key):
+        """
+        Check for a key without it counting as a hit or miss or as a use.
+
+        Params:
+         i_key:
+          (tuple)
+          As passed to insert()
+
+        Returns:
+         (bool)
+        """
+        return i_key in self.pixmaps
+
+    def get(self, i_key):
+        """
+        Params:
+         i_key:
+          (tuple)
+          As passed to insert()
+
+        Returns:
+         Either (QPixmap)
+         or (None)
+          The key isn't in the cache.
+        """
+        entry = self.pixmaps.get(i_key)
+        if entry == None:
+            self.missCount += 1
+            return None
+
+        self.hitCount += 1
+        self.pixmaps.move_to_end(i_key)
+        return entry[0]
+
+    def insert(self, i_key, i_pixmap):
+        """
+        Params:
+         i_key:
+          (tuple)
+          Tuple has elements:
+           0:
+            (str)
+            Image file path
+           1, 2:
+            (int)
+            Width and height of the area the image was scaled to fit
+           3:
+            (bool)
+            Whether the image was rotated to match the orientation of that area
+         i_pixmap:
+          (QPixmap)
+        """
+        if i_key in self.pixmaps:
+            self.byteCount -= self.pixmaps[i_key][1]
+            del(self.pixmaps[i_key])
+
+        byteCount = PixmapCache.pixmapByteCount(i_pixmap)
+        self.pixmaps[i_key] = (i_pixmap, byteCount)
+        self.byteCount += byteCount
+
+        self.trim()
+
+    def trim(self):
+        """
+        Discard least recently used pixmaps until within the memory budget.
+        """
+        maxByteCount = PixmapCache.maxByteCount()
+        while self.byteCount > maxByteCount and len(self.pixmaps) > 0:
+            _, (_, byteCount) = self.pixmaps.popitem(last=False)
+            self.byteCount -= byteCount
+
+    def clear(self):
+        self.pixmaps.clear()
+        self.byteCount = 0
+
+    def stats(self):
+        """
+        Returns:
+         (dict)
+         Dict has specific key-value properties:
+          hitCount, missCount:
+           (int)
+          pixmapCount:
+           (int)
+          byteCount, maxByteCount:
+           (int)
+        """
+        return {
+            "hitCount": self.hitCount,
+            "missCount": self.missCount,
+            "pixmapCount": len(self.pixmaps),
+            "byteCount": self.byteCount,
+            "maxByteCount": PixmapCache.maxByteCount()
+        }
+
+g_pixmapCache = PixmapCache()
+
+def screenshotPathToImage(i_screenshotPath):
+    """
+    As screenshotPathToPixmap() but get a QImage,
+    which unlike a QPixmap can be made outside of the GUI thread.
+
+    Params:
+     i_screenshotPath:
+      (str)
+
+    Returns:
+     (QImage)
+     A null image if the file couldn't be loaded.
+    """
+    zipExtensionPos = i_screenshotPath.lower().find(".zip/")
+    if zipExtensionPos == -1:
+        return QImage(i_screenshotPath)
+
+    zipFilePath = i_screenshotPath[:zipExtensionPos + 4]
+    memberPath = i_screenshotPath[zipExtensionPos + 5:]
+
+    image = QImage()
+    try:
+        image.loadFromData(gamebase.getZipMemberBytes(zipFilePath, memberPath))
+    except:
+        pass
+    return image
+
+def loadScaledImage(i_imagePath, i_targetWidth, i_targetHeight, i_rotateToMatchOrientation=False):
+    """
+    Load an image and scale it to fit (without changing its aspect ratio) inside a rectangle.
+    Safe to call outside of the GUI thread.
+
+    Params:
+     i_imagePath:
+      (str)
+     i_targetWidth, i_targetHeight:
+      (int)
+     i_rotateToMatchOrientation:
+      (bool)
+      True: If the image is landscape and the target is portrait or vice-versa,
+       rotate the image anti-clockwise by 90 degrees before scaling it.
+
+    Returns:
+     (QImage)
+     A null image if the file couldn't be loaded.
+    """
+    image = screenshotPathToImage(i_imagePath)
+
+    if not image.isNull() and i_targetWidth > 0 and i_targetHeight > 0:
+        if i_rotateToMatchOrientation:
+            if (image.width() > image.height() and i_targetWidth < i_targetHeight) or \
+               (image.width() < image.height() and i_targetWidth > i_targetHeight):
+                image = image.transformed(QTransform().rotate(-90))
+
+        image = image.scaled(i_targetWidth, i_targetHeight, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+    return image
+
+def imageToBytes(i_image):
+    """
+    Encode an image for storing in the thumbnail cache.
+
+    Params:
+     i_image:
+      (QImage)
+
+    Returns:
+     (bytes)
+     PNG data if the image has transparency, else JPEG data.
+    """
+    byteArray = QByteArray()
+    buffer = QBuffer(byteArray)
+    buffer.open(QIODevice.WriteOnly)
+    if i_image.hasAlphaChannel():
+        i_image.save(buffer, "PNG")
+    else:
+        i_image.save(buffer, "JPEG", 90)
+    buffer.close()
+    return byteArray.data()
+
+# + + + Background loading {{{
+
+class ImageLoadTask(QRunnable):
+    """
+    Load and scale one image on a thread pool thread, and pass it back to an ImageLoader.
+    """
+    def __init__(self, i_loader, i_key):
+        """
+        Params:
+         i_loader:
+          (ImageLoader)
+         i_key:
+          (tuple)
+          As for PixmapCache.insert()
+        """
+        QRunnable.__init__(self)
+        # ImageLoader keeps a reference to us until we've finished or been cancelled,
+        # so don't let Qt delete us after running
+        self.setAutoDelete(False)
+
+        self.loader = i_loader
+        self.key = i_key
+        self.cells = set()
+        #  (set of tuple)
+        #  Table cells that are waiting for this image.
+        #  Each tuple has elements:
+        #   0:
+        #    (int)
+        #    Row number
+        #   1:
+        #    (int)
+        #    Column number
+        self.cancelled = False
+
+    def run(self):  # override from QRunnable
+        if self.cancelled:
+            return
+
+        # Try the thumbnail cache on disk first
+        image = QImage()
+        thumbnailData = thumbnail_cache.get(self.key)
+        if thumbnailData != None:
+            image.loadFromData(thumbnailData)
+
+        # If it wasn't there, load and scale the original image
+        # and save the result to the thumbnail cache for next time
+        if image.isNull():
+            imagePath, targetWidth, targetHeight, rotateToMatchOrientation = self.key
+            image = loadScaledImage(imagePath, targetWidth, targetHeight, rotateToMatchOrientation)
+            if not image.isNull() and thumbnail_cache.isEnabled():
+                thumbnail_cache.put(self.key, imageToBytes(image))
+
+        if self.cancelled:
+            return
+        self.loader.taskFinished.emit(self, image)
+
+class ImageLoader(QObject):
+    """
+    Load images for the game table on background threads,
+    putting them into g_pixmapCache when they're ready.
+    """
+    def __init__(self, i_parent=None):
+        QObject.__init__(self, i_parent)
+
+        self.threadPool = QThreadPool(self)
+
+        self.pendingTasks = {}
+        #  (dict)
+        #  Dict has arbitrary key-value properties:
+        #   Keys:
+        #    (tuple)
+        #    As for PixmapCache.insert()
+        #   Values:
+        #    (ImageLoadTask)
+
+        # (Queued across from the pool threads to this object's thread)
+        self.taskFinished.connect(self.onTaskFinished)
+
+    taskFinished = Signal(ImageLoadTask, QImage)
+    # Emitted when
+    #  An ImageLoadTask has loaded its image (emitted on a pool thread)
+    #
+    # Params:
+    #  i_task:
+    #   (ImageLoadTask)
+    #  i_image:
+    #   (QImage)
+
+    imageReady = Signal(list)
+    # Emitted when
+    #  An image has been loaded and put into g_pixmapCache
+    #
+    # Params:
+    #  i_cells:
+    #   (list of tuple)
+    #   Table cells that had asked for the image.
+    #   Each tuple has elements:
+    #    0:
+    #     (int)
+    #     Row number
+    #    1:
+    #     (int)
+    #     Column number
+
+    def pixmapOrRequest(self, i_imagePath, i_targetRect, i_rotateToMatchOrientation, i_rowNo, i_columnNo):
+        """
+        Get a scaled image from the cache, or if it's not there,
+        start loading it in the background.
+
+        Params:
+         i_imagePath:
+          (str)
+         i_targetRect:
+          (QRect)
+         i_rotateToMatchOrientation:
+          (bool)
+          As for loadScaledImage()
+         i_rowNo, i_columnNo:
+          (int)
+          Table cell that wants the image.
+
+        Returns:
+         Either (QPixmap)
+          A null pixmap if the image couldn't be loaded.
+         or (None)
+          The image isn't ready yet.
+          imageReady will be emitted when it is.
+        """
+        key = (i_imagePath, i_targetRect.width(), i_targetRect.height(), i_rotateToMatchOrientation)
+
+        pixmap = g_pixmapCache.get(key)
+        if pixmap != None:
+            return pixmap
+
+        self._request(key, i_rowNo, i_columnNo, ImageLoader.PRIORITY_VISIBLE)
+        return None
+
+    def prefetch(self, i_imagePath, i_targetRect, i_rotateToMatchOrientation, i_rowNo, i_columnNo):
+        """
+        If a scaled image isn't in the cache, start loading it in the background
+        at a lower priority than images that are currently being painted.
+
+        Params:
+         As for pixmapOrRequest()
+        """
+        key = (i_imagePath, i_targetRect.width(), i_targetRect.height(), i_rotateToMatchOrientation)
+        if g_pixmapCache.contains(key):
+            return
+        self._request(key, i_rowNo, i_columnNo, ImageLoader.PRIORITY_PREFETCH)
+
+    # Priorities for QThreadPool.start()
+    PRIORITY_VISIBLE = 1
+    PRIORITY_PREFETCH = 0
+
+    def _request(self, i_key, i_rowNo, i_columnNo, i_priority):
+        """
+        Params:
+         i_key:
+          (tuple)
+          As for PixmapCache.insert()
+         i_rowNo, i_columnNo:
+          (int)
+         i_priority:
+          (int)
+          One of the PRIORITY_* constants
+        """
+        task = self.pendingTasks.get(i_key)
+        if task == None:
+            task = ImageLoadTask(self, i_key)
+            self.pendingTasks[i_key] = task
+            self.threadPool.start(task, i_priority)
+        task.cells.add((i_rowNo, i_columnNo))
+
+    def onTaskFinished(self, i_task, i_image):
+        # If the task was cancelled in the meantime,
+        # ignore it
+        if i_task.cancelled or self.pendingTasks.get(i_task.key) is not i_task:
+            return
+        del(self.pendingTasks[i_task.key])
+
+        g_pixmapCache.insert(i_task.key, QPixmap.fromImage(i_image))
+        self.imageReady.emit(list(i_task.cells))
+
+    def cancelRowsOutside(self, i_firstRowNo, i_lastRowNo):
+        """
+        Cancel loading images that are only wanted by rows outside of a range.
+
+        Params:
+         i_firstRowNo, i_lastRowNo:
+          (int)
+          Range of rows (inclusive) to keep loading images for.
+        """
+        for key, task in list(self.pendingTasks.items()):
+            if all([rowNo < i_firstRowNo or rowNo > i_lastRowNo  for rowNo, _ in task.cells]):
+                self._cancelTask(task)
+
+    def cancelAll(self):
+        for task in list(self.pendingTasks.values()):
+            self._cancelTask(task)
+
+    def _cancelTask(self, i_task):
+        """
+        Params:
+         i_task:
+          (ImageLoadTask)
+        """
+        i_task.cancelled = True
+        # If it hasn't started yet, take it out of the queue
+        self.threadPool.tryTake(i_task)
+        del(self.pendingTasks[i_task.key])
+
+    def shutdown(self):
+        """
+        Cancel everything and wait for any images currently being loaded to finish.
+        """
+        self.cancelAll()
+        self.threadPool.waitForDone()
+
+# + + + }}}
+
+def drawPixmapCentred(i_painter, i_pixmap, i_targetRect):
+    """
+    Draw a pixmap (which would usually have been prepared by loadScaledImage()) letterboxed in a rectangle.
+
+    Params:
+     i_painter:
+      (QPainter)
+     i_pixmap:
+      (QPixmap)
+     i_targetRect:
+      (QRect)
+    """
+    if i_pixmap.isNull():
+        return
+    destRect = danrectToQrect(fitLetterboxed(qrectToDanrect(i_pixmap.rect()), qrectToDanrect(i_targetRect)))
+    i_painter.setRenderHints(QPainter.SmoothPixmapTransform, True)
+    i_painter.drawPixmap(destRect, i_pixmap)
+
+# + + }}}
+
+def columnIdShowsImages(i_columnId):
+    """
+    Params:
+     i_columnId:
+      (str)
+
+    Returns:
+     (bool)
+     True: The column is drawn by MyStyledItemDelegate with images rather than text.
+    """
+    return (i_columnId.startswith("pic[") and i_columnId.endswith("]")) or \
+           (i_columnId.startswith("random_pic[") and i_columnId.endswith("]")) or \
+           i_columnId == "schema_image" or \
+           i_columnId == "musician_photo"
+
 class MyStyledItemDelegate(QStyledItemDelegate):
     def __init__(self, i_parent=None):
         QStyledItemDelegate.__init__(self, i_parent)
@@ -202,65 +697,119 @@ class MyStyledItemDelegate(QStyledItemDelegate):
         i_option.palette.setColor(QPalette.Active, QPalette.HighlightedText, QColor.fromRgbF(1, 1, 1, 1))
         i_option.palette.setColor(QPalette.Inactive, QPalette.HighlightedText, QColor.fromRgbF(0, 0, 0, 1))
 
-    def paint(self, i_painter, i_option, i_index):  # override from QAbstractItemDelegate
-        #print(i_painter, i_option, i_index)
+    def drawImage(self, i_painter, i_imagePath, i_targetRect, i_rotateToMatchOrientation, i_index):
+        """
+        Draw an image letterboxed in a rectangle if it's been loaded,
+        else draw a placeholder and request it to be loaded in the background.
 
-        #if i_option.state & QStyle.State_Selected:
-        #    i_painter.fillRect(i_option.rect, i_option.palette.highlight())
+        Params:
+         i_painter:
+          (QPainter)
+         i_imagePath:
+          (str)
+         i_targetRect:
+          (QRect)
+         i_rotateToMatchOrientation:
+          (bool)
+          As for loadScaledImage()
+         i_index:
+          (QModelIndex)
+          Cell being painted
+        """
+        pixmap = self.parent().imageLoader.pixmapOrRequest(i_imagePath, i_targetRect, i_rotateToMatchOrientation, i_index.row(), i_index.column())
+        if pixmap == None:
+            i_painter.fillRect(i_targetRect.adjusted(4, 4, -4, -4), QColor.fromRgbF(0.5, 0.5, 0.5, 0.125))
+        else:
+            drawPixmapCentred(i_painter, pixmap, i_targetRect)
 
-        column = columns.tableColumn_getByPos(i_index.column())
+    def cellImage(self, i_rowNo, i_columnId, i_cellRect):
+        """
+        Work out what image, if any, is drawn in a cell.
 
-        # If painting screenshot column
-        if column["id"].startswith("pic[") and column["id"].endswith("]"):
-            picNo = int(column["id"][4:-1])
+        Params:
+         i_rowNo:
+          (int)
+         i_columnId:
+          (str)
+         i_cellRect:
+          (QRect)
 
-            screenshotFullPath = gamebase.dbRow_nthScreenshotFullPath(self.parent().dbRows[i_index.row()], picNo)
-            if screenshotFullPath != None:
-                pixmap = screenshotPathToPixmap(screenshotFullPath)
-                destRect = danrectToQrect(fitLetterboxed(qrectToDanrect(pixmap.rect()), qrectToDanrect(i_option.rect)))
-                i_painter.setRenderHints(QPainter.SmoothPixmapTransform, True)
-                i_painter.drawPixmap(destRect, pixmap)
+        Returns:
+         Either (tuple)
+          Tuple has elements:
+           0:
+            (str)
+            Image file path
+           1:
+            (QRect)
+            Rectangle to draw the image in
+           2:
+            (bool)
+            Whether to rotate the image to match the orientation of the rectangle (see loadScaledImage())
+         or (None)
+          No image is drawn in this cell.
+        """
+        dbRow = self.parent().dbRows[i_rowNo]
 
-        # Else if painting random screenshot column
-        elif column["id"].startswith("random_pic[") and column["id"].endswith("]"):
-            picNo = int(column["id"][11:-1])
+        # If screenshot column
+        if i_columnId.startswith("pic[") and i_columnId.endswith("]"):
+            picNo = int(i_columnId[4:-1])
 
-            screenshotFullPath = gamebase.dbRow_nthRandomScreenshotFullPath(self.parent().dbRows[i_index.row()], picNo)
+            screenshotFullPath = gamebase.dbRow_nthScreenshotFullPath(dbRow, picNo)
             if screenshotFullPath != None:
-                pixmap = screenshotPathToPixmap(screenshotFullPath)
-                destRect = danrectToQrect(fitLetterboxed(qrectToDanrect(pixmap.rect()), qrectToDanrect(i_option.rect)))
-                i_painter.setRenderHints(QPainter.SmoothPixmapTransform, True)
-                i_painter.drawPixmap(destRect, pixmap)
+                return (screenshotFullPath, i_cellRect, False)
 
-        # Else if painting schema image column
-        elif column["id"] == "schema_image":
-            schemaName = self.parent().dbRows[i_index.row()]["SchemaName"]
+        # Else if random screenshot column
+        elif i_columnId.startswith("random_pic[") and i_columnId.endswith("]"):
+            picNo = int(i_columnId[11:-1])
 
-            #i_option.rect.setTop(i_option.rect.top() + 16)
+            screenshotFullPath = gamebase.dbRow_nthRandomScreenshotFullPath(dbRow, picNo)
+            if screenshotFullPath != None:
+                return (screenshotFullPath, i_cellRect, False)
 
-            # If the adapter specifies a system image,
-            # draw it
-            adapterId = gamebase.schemaAdapterIds[schemaName]
+        # Else if schema image column
+        elif i_columnId == "schema_image":
+            # If the adapter specifies a system image
+            adapterId = gamebase.schemaAdapterIds[dbRow["SchemaName"]]
             gamebaseImageFilePath = gamebase.gamebaseImageFilePath(adapterId)
             if gamebaseImageFilePath != None:
-                pixmap = QPixmap(gamebaseImageFilePath)
-
                 # Get the dimensions of the target rectangle, reduced by desired margin
-                targetRect = i_option.rect.adjusted(8, 8, -8, -8)
+                targetRect = i_cellRect.adjusted(8, 8, -8, -8)
 
                 # If aspect of source image is different to that of target (ie. portrait vs landscape),
-                # rotate source anti-clockwise by 90 degrees
-                if (pixmap.rect().width() > pixmap.rect().height() and targetRect.width() < targetRect.height()) or \
-                   pixmap.rect().width() < pixmap.rect().height() and targetRect.width() > targetRect.height():
-                    transform = QTransform().rotate(-90)
-                    pixmap = pixmap.transformed(transform)
+                # it gets rotated anti-clockwise by 90 degrees
+                return (gamebaseImageFilePath, targetRect, True)
 
-                destRect = danrectToQrect(fitLetterboxed(qrectToDanrect(pixmap.rect()), qrectToDanrect(targetRect)))
-                i_painter.setRenderHints(QPainter.SmoothPixmapTransform, True)
+        # Else if musician photo column
+        elif i_columnId == "musician_photo":
+            photoFullPath = gamebase.dbRow_photoFullPath(dbRow)
+            if photoFullPath != None:
+                return (photoFullPath, i_cellRect, False)
+
+        return None
+
+    def paint(self, i_painter, i_option, i_index):  # override from QAbstractItemDelegate
+        #print(i_painter, i_option, i_index)
+
+        #if i_option.state & QStyle.State_Selected:
+        #    i_painter.fillRect(i_option.rect, i_option.palette.highlight())
+
+        column = columns.tableColumn_getByPos(i_index.column())
+
+        # If painting a column that shows images
+        if columnIdShowsImages(column["id"]):
+            # If there's an image for this cell,
+            # draw it
+            cellImage = self.cellImage(i_index.row(), column["id"], i_option.rect)
+            if cellImage != None:
+                self.drawImage(i_painter, cellImage[0], cellImage[1], cellImage[2], i_index)
+
+            # Else if painting schema image column and the adapter doesn't specify a system image,
+            # draw some text
+            elif column["id"] == "schema_image":
+                schemaName = self.parent().dbRows[i_index.row()]["SchemaName"]
+                adapterId = gamebase.schemaAdapterIds[schemaName]
 
-                i_painter.drawPixmap(destRect, pixmap)
-            # Else draw some text
-            else:
                 # If the adapter specifies a title, use that,
                 # else use the symbolic schema name
                 if hasattr(gamebase.adapters[adapterId]["module"], "config_title"):
@@ -274,144 +823,427 @@ class MyStyledItemDelegate(QStyledItemDelegate):
                 i_painter.drawText(QRect(0, 0, i_option.rect.height(), i_option.rect.width()), Qt.AlignVCenter|Qt.AlignHCenter|Qt.TextWordWrap, text)
                 i_painter.resetTransform()
 
-        # Else if painting musician photo column
-        elif column["id"] == "musician_photo":
-            photoFullPath = gamebase.dbRow_photoFullPath(self.parent().dbRows[i_index.row()])
-            if photoFullPath != None:
-                pixmap = QPixmap(photoFullPath)
-                destRect = danrectToQrect(fitLetterboxed(qrectToDanrect(pixmap.rect()), qrectToDanrect(i_option.rect)))
-                i_painter.setRenderHints(QPainter.SmoothPixmapTransform, True)
-                i_painter.drawPixmap(destRect, pixmap)
-
         # Else if painting any other column,
         # fall back to the default behaviour (ie. will use data() from table model)
         else:
             QStyledItemDelegate.paint(self, i_painter, i_option, i_index)
 
-class MyTableModel(QAbstractTableModel):
-    FilterRole = Qt.UserRole + 1
+class MyTableModel(QAbstractTableModel):
+    FilterRole = Qt.UserRole + 1
+
+    def __init__(self, i_parent, *args):
+        QAbstractTableModel.__init__(self, i_parent, *args)
+
+        self.columnAccessors = []
+        #  (list of ColumnAccessor)
+        #  One for each visible column, in order.
+        #  Rebuilt whenever the model is reset.
+
+        # (Connected before the view gets its own connection so that the accessors are ready before it repaints)
+        self.modelReset.connect(self.rebuildColumnAccessors)
+
+    # Type: ColumnAccessor
+    #  (dict)
+    #  What data() needs to know about a visible column, worked out ahead of time.
+    #  Dictionary has specific key-value properties:
+    #   kind:
+    #    (str)
+    #    One of
+    #     "schema_title"
+    #     "detail"
+    #     "play"
+    #     "music"
+    #     "image"
+    #      (Drawn by the delegate, no data)
+    #     "enum"
+    #     "gameId"
+    #     "text"
+    #   resultColumnNo:
+    #    Either (int)
+    #     Position of the value in the rows of GameTableView.dbRows
+    #    or (str)
+    #     Name of the value in the rows of GameTableView.dbRows,
+    #     if it couldn't be found in GameTableView.dbColumnNames
+    #    or (None)
+    #     No value is needed
+    #   alignment:
+    #    Either (Qt.AlignmentFlag)
+    #    or (None)
+    #   enumMap:
+    #    Either (dict)
+    #     For "enum" columns, mapping of values to display names
+    #    or (None)
+
+    def rebuildColumnAccessors(self):
+        dbColumnNames = self.parent().dbColumnNames
+        if dbColumnNames == None:
+            dbColumnNames = []
+
+        def resultColumnNo(i_dbIdentifier):
+            if i_dbIdentifier in dbColumnNames:
+                return dbColumnNames.index(i_dbIdentifier)
+            return i_dbIdentifier
+
+        columnAccessors = []
+        for column in columns.tableColumn_getBySlice():
+            columnAccessor = {
+                "resultColumnNo": None,
+                "alignment": None,
+                "enumMap": None
+            }
+
+            if column["id"] == "schema_title":
+                columnAccessor["kind"] = "schema_title"
+                columnAccessor["resultColumnNo"] = resultColumnNo("SchemaName")
+                columnAccessor["alignment"] = Qt.AlignCenter
+            elif column["id"] == "detail":
+                columnAccessor["kind"] = "detail"
+                columnAccessor["alignment"] = Qt.AlignCenter
+            elif column["id"] == "play":
+                columnAccessor["kind"] = "play"
+                columnAccessor["resultColumnNo"] = resultColumnNo("Games.Filename")
+                columnAccessor["alignment"] = Qt.AlignCenter
+            elif column["id"] == "music":
+                columnAccessor["kind"] = "music"
+                columnAccessor["resultColumnNo"] = resultColumnNo("Games.SidFilename")
+                columnAccessor["alignment"] = Qt.AlignCenter
+            elif (column["id"].startswith("pic[") and column["id"].endswith("]")) or \
+                 (column["id"].startswith("random_pic[") and column["id"].endswith("]")):
+                columnAccessor["kind"] = "image"
+            else:
+                tableColumnSpec = columns.tableColumnSpec_getById(column["id"])
+                if tableColumnSpec.get("type") == "enum":
+                    columnAccessor["kind"] = "enum"
+                    columnAccessor["enumMap"] = tableColumnSpec["enumMap"]
+                elif tableColumnSpec.get("type") == "gameId":
+                    columnAccessor["kind"] = "gameId"
+                else:
+                    columnAccessor["kind"] = "text"
+                columnAccessor["resultColumnNo"] = resultColumnNo(tableColumnSpec["dbIdentifiers"][0])
+                if tableColumnSpec.get("textAlignment") == "center":
+                    columnAccessor["alignment"] = Qt.AlignCenter
+                elif tableColumnSpec.get("textAlignment") == "left":
+                    columnAccessor["alignment"] = Qt.AlignLeft
+
+            columnAccessors.append(columnAccessor)
+
+        self.columnAccessors = columnAccessors
+
+    def rowCount(self, i_parent):  # override from QAbstractTableModel
+        if self.parent().dbRows == None:
+            return 0
+        return len(self.parent().dbRows)
+
+    def columnCount(self, i_parent):  # override from QAbstractTableModel
+        return columns.tableColumn_count()
+
+    #https://stackoverflow.com/questions/7988182/displaying-an-image-from-a-qabstracttablemodel
+    #https://forum.qt.io/topic/5195/qtableview-extra-column-space-solved/8
+    def data(self, i_index, i_role):  # override from QAbstractTableModel
+        if not i_index.isValid():
+            return None
+
+        # If the columns have changed and the model hasn't been reset yet,
+        # there's nothing valid to show
+        columnNo = i_index.column()
+        if columnNo >= len(self.columnAccessors):
+            return None
+        columnAccessor = self.columnAccessors[columnNo]
+
+        if i_role == Qt.TextAlignmentRole:
+            return columnAccessor["alignment"]
+        if i_role != Qt.DisplayRole and i_role != MyTableModel.FilterRole:
+            return None
+
+        kind = columnAccessor["kind"]
+
+        # Other ordinary text field
+        if kind == "text":
+            return self.parent().dbRows[i_index.row()][columnAccessor["resultColumnNo"]]
+        # Enum field
+        elif kind == "enum":
+            value = self.parent().dbRows[i_index.row()][columnAccessor["resultColumnNo"]]
+            if i_role == Qt.DisplayRole and value in columnAccessor["enumMap"]:
+                value = str(value) + ": " + columnAccessor["enumMap"][value]
+            return value
+        # Game ID field
+        elif kind == "gameId":
+            value = self.parent().dbRows[i_index.row()][columnAccessor["resultColumnNo"]]
+            if i_role == MyTableModel.FilterRole:
+                return value
+            if value == 0:
+                return ""
+            return ">" + str(value)
+        # Schema title
+        elif kind == "schema_title":
+            schemaName = self.parent().dbRows[i_index.row()][columnAccessor["resultColumnNo"]]
+            adapterId = gamebase.schemaAdapterIds[schemaName]
+            return gamebase.gamebaseTitle(adapterId)
+        # Detail
+        elif kind == "detail":
+            return "+"
+        # Play
+        elif kind == "play":
+            if self.parent().dbRows[i_index.row()][columnAccessor["resultColumnNo"]] == None:
+                return ""
+            return "▶"
+        # Music
+        elif kind == "music":
+            if self.parent().dbRows[i_index.row()][columnAccessor["resultColumnNo"]] == None:
+                return ""
+            return "M"
+        # Screenshot or random screenshot
+        # (Done via delegate)
+
+        return None
+
+    # [Not used anymore since the native QTableView headers are hidden]
+    def headerData(self, i_columnNo, i_orientation, i_role):
+        if i_orientation == Qt.Horizontal and i_role == Qt.DisplayRole:
+            column = columns.tableColumn_getByPos(i_columnNo)
+            tableColumnSpec = columns.tableColumnSpec_getById(column["id"])
+            return tableColumnSpec["headingName"]
+
+        return None
+
+# + + Background queries {{{
+
+class QueryTask(QRunnable):
+    """
+    Run a game list query on a thread pool thread, on its own set of database connections,
+    and pass the result back to a QueryRunner.
+    """
+    def __init__(self, i_runner, i_attachDatabaseStatements, i_connectionsAndSqlTexts, i_sortOperations, i_windowed, i_shards=None, i_columnar=False):
+        """
+        Params:
+         i_runner:
+          (QueryRunner)
+         i_attachDatabaseStatements:
+          (list of list of str)
+          As returned from db.getAttachDatabaseStatements().
+         i_connectionsAndSqlTexts:
+          (list)
+          As returned from db.getGameList_getSql(),
+          or if i_windowed is True, from db.getGameList_getUnorderedSql().
+          The connections are replaced with worker connections in the same position.
+         i_sortOperations:
+          (list)
+          See ColumnNameBar.sort_operations
+         i_windowed:
+          (bool)
+          True: Return the records as a db.WindowedGameList.
+         i_shards:
+          Either (list of db.GameListShard)
+           Run these in worker processes instead of using i_connectionsAndSqlTexts.
+           As returned from db.getGameList_getShards().
+          or (None)
+         i_columnar:
+          (bool)
+          True: Unless i_windowed is True, return the records as a db.ColumnarGameList.
+        """
+        QRunnable.__init__(self)
+        # QueryRunner keeps a reference to us until we've finished or been cancelled,
+        # so don't let Qt delete us after running
+        self.setAutoDelete(False)
+
+        self.runner = i_runner
+        self.attachDatabaseStatements = i_attachDatabaseStatements
+        self.connectionsAndSqlTexts = i_connectionsAndSqlTexts
+        self.sortOperations = i_sortOperations
+        self.windowed = i_windowed
+        self.shards = i_shards
+        self.columnar = i_columnar
+        self.cancelled = False
+
+        # Results
+        self.columnNames = None
+        #  (list of str)
+        self.rows = None
+        #  Either (list of sqlite3.Row)
+        #  or (db.WindowedGameList)
+        #  or (db.ColumnarGameList)
+        self.exception = None
+        #  Either (Exception)
+        #  or (None)
+
+    # Number of SQLite virtual machine instructions between checks for cancellation
+    progressHandlerInterval = 1000
+
+    def progressHandler(self):
+        # Returning non-zero interrupts the query
+        return self.cancelled
+
+    def run(self):  # override from QRunnable
+        if not self.cancelled and self.shards != None:
+            try:
+                self.columnNames, self.rows = db.getGameList_executeShards(self.shards, self.sortOperations, self.progressHandler)
+                if self.columnar:
+                    self.rows = db.ColumnarGameList.fromRecordBatches(self.columnNames, [self.rows])
+            except Exception as e:
+                self.exception = e
+        elif not self.cancelled:
+            try:
+                connections = db.openWorkerConnections(self.attachDatabaseStatements)
+                connectionsAndSqlTexts = [(connections[containerDbNo], sqlText)  for containerDbNo, (_, sqlText) in enumerate(self.connectionsAndSqlTexts)]
+
+                # Let the query be interrupted if it gets superseded
+                for connection in connections:
+                    connection.set_progress_handler(self.progressHandler, QueryTask.progressHandlerInterval)
+
+                if self.windowed:
+                    self.columnNames, self.rows = db.getGameList_executeSqlWindowed(connectionsAndSqlTexts, self.sortOperations)
+                elif self.columnar:
+                    self.columnNames, self.rows = db.getGameList_executeSqlAndFetchColumnar(connectionsAndSqlTexts, self.sortOperations)
+                else:
+                    self.columnNames, self.rows = db.getGameList_executeSqlAndFetchAll(connectionsAndSqlTexts, self.sortOperations)
+
+                for connection in connections:
+                    connection.set_progress_handler(None, 0)
+            except Exception as e:
+                self.exception = e
+
+        self.runner.taskFinished.emit(self)
+
+class QueryRunner(QObject):
+    """
+    Run game list queries on a background thread, one at a time,
+    with each new query cancelling the one before.
+    """
+    def __init__(self, i_parent=None):
+        QObject.__init__(self, i_parent)
+
+        self.threadPool = QThreadPool(self)
+        self.threadPool.setMaxThreadCount(1)
+
+        self.currentTask = None
+        #  Either (QueryTask)
+        #  or (None)
+        self.runningTasks = set()
+        #  (set of QueryTask)
+        #  Tasks that have been started and not yet finished, including cancelled ones.
+
+        # (Queued across from the pool thread to this object's thread)
+        self.taskFinished.connect(self.onTaskFinished)
+
+    taskFinished = Signal(QueryTask)
+    # Emitted when
+    #  A QueryTask has finished running (emitted on the pool thread)
+    #
+    # Params:
+    #  i_task:
+    #   (QueryTask)
+
+    queryFinished = Signal(QueryTask)
+    # Emitted when
+    #  The current query has finished, or has been cancelled
+    #
+    # Params:
+    #  i_task:
+    #   (QueryTask)
+    #   If its 'cancelled' is True, its results should be ignored.
+
+    def start(self, i_attachDatabaseStatements, i_connectionsAndSqlTexts, i_sortOperations, i_windowed, i_shards=None, i_columnar=False):
+        """
+        Cancel any query in progress and start a new one.
+
+        Params:
+         As for QueryTask.__init__()
+
+        Returns:
+         (QueryTask)
+         queryFinished will be emitted with this when it is done.
+        """
+        self.cancel()
+
+        task = QueryTask(self, i_attachDatabaseStatements, i_connectionsAndSqlTexts, i_sortOperations, i_windowed, i_shards, i_columnar)
+        self.currentTask = task
+        self.runningTasks.add(task)
+        self.threadPool.start(task)
+        return task
 
-    def __init__(self, i_parent, *args):
-        QAbstractTableModel.__init__(self, i_parent, *args)
+    def cancel(self):
+        """
+        Cancel the current query, if there is one.
+        """
+        if self.currentTask == None:
+            return
+        task = self.currentTask
+        self.currentTask = None
 
-    def rowCount(self, i_parent):  # override from QAbstractTableModel
-        if self.parent().dbRows == None:
-            return 0
-        return len(self.parent().dbRows)
+        task.cancelled = True
+        # If it hasn't started yet, take it out of the queue
+        if self.threadPool.tryTake(task):
+            self.runningTasks.discard(task)
+        self.queryFinished.emit(task)
 
-    def columnCount(self, i_parent):  # override from QAbstractTableModel
-        return columns.tableColumn_count()
+    def onTaskFinished(self, i_task):
+        self.runningTasks.discard(i_task)
 
-    #https://stackoverflow.com/questions/7988182/displaying-an-image-from-a-qabstracttablemodel
-    #https://forum.qt.io/topic/5195/qtableview-extra-column-space-solved/8
-    def data(self, i_index, i_role):  # override from QAbstractTableModel
-        if not i_index.isValid():
-            return None
+        # If the task was cancelled in the meantime,
+        # it was already reported as finished
+        if i_task.cancelled or i_task is not self.currentTask:
+            return
+        self.currentTask = None
 
-        column = columns.tableColumn_getByPos(i_index.column())
+        self.queryFinished.emit(i_task)
 
-        # Schema title
-        if column["id"] == "schema_title":
-            if i_role == Qt.DisplayRole or i_role == MyTableModel.FilterRole:
-                schemaName = self.parent().dbRows[i_index.row()]["SchemaName"]
-                adapterId = gamebase.schemaAdapterIds[schemaName]
-                return gamebase.gamebaseTitle(adapterId)
+    def shutdown(self):
+        """
+        Cancel the current query and wait for it to stop.
+        """
+        self.cancel()
+        self.threadPool.waitForDone()
+        db.shutdownShardProcessPool()
 
-            elif i_role == Qt.TextAlignmentRole:
-                return Qt.AlignCenter
-        # Detail
-        if column["id"] == "detail":
-            if i_role == Qt.DisplayRole or i_role == MyTableModel.FilterRole:
-                return "+"
-            elif i_role == Qt.TextAlignmentRole:
-                return Qt.AlignCenter
-        # Play
-        elif column["id"] == "play":
-            if i_role == Qt.DisplayRole or i_role == MyTableModel.FilterRole:
-                if self.parent().dbRows[i_index.row()][self.parent().dbColumnNames.index("Games.Filename")] == None:
-                    return ""
-                return "▶"
-            elif i_role == Qt.TextAlignmentRole:
-                return Qt.AlignCenter
-        # Music
-        elif column["id"] == "music":
-            if i_role == Qt.DisplayRole or i_role == MyTableModel.FilterRole:
-                if self.parent().dbRows[i_index.row()][self.parent().dbColumnNames.index("Games.SidFilename")] == None:
-                    return ""
-                return "M"
-            elif i_role == Qt.TextAlignmentRole:
-                return Qt.AlignCenter
-        # Screenshot
-        elif column["id"].startswith("pic[") and column["id"].endswith("]"):
-            # (Done via delegate)
-            #if i_role == Qt.DecorationRole:
-            #    picNo = int(column["id"][4:-1])
-            #
-            #    screenshotFullPath = gamebase.dbRow_nthScreenshotFullPath(self.parent().dbRows[i_index.row()], picNo)
-            #    if screenshotFullPath != None:
-            #        return screenshotPathToPixmap(screenshotFullPath)
-            pass
-        # Random screenshot
-        elif column["id"].startswith("random_pic[") and column["id"].endswith("]"):
-            # (Done via delegate)
-            #if i_role == Qt.DecorationRole:
-            #    picNo = int(column["id"][11:-1])
-            #
-            #    screenshotFullPath = gamebase.dbRow_nthRandomScreenshotFullPath(self.parent().dbRows[i_index.row()], picNo)
-            #    if screenshotFullPath != None:
-            #        return screenshotPathToPixmap(screenshotFullPath)
-            pass
-        #
-        else:
-            tableColumnSpec = columns.tableColumnSpec_getById(column["id"])
-            # Enum field
-            if "type" in tableColumnSpec and tableColumnSpec["type"] == "enum":
-                if i_role == MyTableModel.FilterRole:
-                    return self.parent().dbRows[i_index.row()][tableColumnSpec["dbIdentifiers"][0]]
-                elif i_role == Qt.DisplayRole:
-                    value = self.parent().dbRows[i_index.row()][tableColumnSpec["dbIdentifiers"][0]]
-                    if value in tableColumnSpec["enumMap"]:
-                        value = str(value) + ": " + tableColumnSpec["enumMap"][value]
-                    return value
-                elif i_role == Qt.TextAlignmentRole:
-                    if tableColumnSpec["textAlignment"] == "center":
-                        return Qt.AlignCenter
-                    elif tableColumnSpec["textAlignment"] == "left":
-                        return Qt.AlignLeft
-            # Game ID field
-            if "type" in tableColumnSpec and tableColumnSpec["type"] == "gameId":
-                if i_role == MyTableModel.FilterRole:
-                    return self.parent().dbRows[i_index.row()][tableColumnSpec["dbIdentifiers"][0]]
-                elif i_role == Qt.DisplayRole:
-                    value = self.parent().dbRows[i_index.row()][tableColumnSpec["dbIdentifiers"][0]]
-                    if value == 0:
-                        return ""
-                    return ">" + str(value)
-                elif i_role == Qt.TextAlignmentRole:
-                    if tableColumnSpec["textAlignment"] == "center":
-                        return Qt.AlignCenter
-                    elif tableColumnSpec["textAlignment"] == "left":
-                        return Qt.AlignLeft
-            # Other ordinary text field
-            else:
-                if i_role == Qt.DisplayRole or i_role == MyTableModel.FilterRole:
-                    return self.parent().dbRows[i_index.row()][tableColumnSpec["dbIdentifiers"][0]]
-                elif i_role == Qt.TextAlignmentRole:
-                    if tableColumnSpec["textAlignment"] == "center":
-                        return Qt.AlignCenter
-                    elif tableColumnSpec["textAlignment"] == "left":
-                        return Qt.AlignLeft
+# + + }}}
 
-        return None
+# + + Query results {{{
+
+# Type: QueryResult
+#  (dict)
+#  Dictionary has specific key-value properties:
+#   key:
+#    (tuple)
+#    As returned from GameTableView.getResultKey(), for the query that the rows came from.
+#   columnNames:
+#    (list of str)
+#   rows:
+#    Either (list of sqlite3.Row)
+#    or (db.ColumnarGameList)
+#   sizeBytes:
+#    (int)
+#    Rough amount of memory that the rows take up, as returned from estimateRowsSize().
+
+def estimateRowsSize(i_rows, i_sampleCount=64):
+    """
+    Estimate how much memory a list of rows takes up,
+    from the sizes of the values in a sample of them.
 
-    # [Not used anymore since the native QTableView headers are hidden]
-    def headerData(self, i_columnNo, i_orientation, i_role):
-        if i_orientation == Qt.Horizontal and i_role == Qt.DisplayRole:
-            column = columns.tableColumn_getByPos(i_columnNo)
-            tableColumnSpec = tableColumnSpec_getById(column["id"])
-            return tableColumnSpec["headingName"]
+    Params:
+     i_rows:
+      Either (list of sqlite3.Row)
+      or (db.ColumnarGameList)
+     i_sampleCount:
+      (int)
+      Maximum number of rows to look at.
 
-        return None
+    Returns:
+     (int)
+     Number of bytes.
+    """
+    if isinstance(i_rows, db.ColumnarGameList):
+        return i_rows.sizeBytes()
+    if len(i_rows) == 0:
+        return sys.getsizeof(i_rows)
+
+    step = max(1, len(i_rows) // i_sampleCount)
+    sampleRows = i_rows[::step]
+    sampleBytes = 0
+    for row in sampleRows:
+        sampleBytes += sys.getsizeof(row) + sum([sys.getsizeof(value)  for value in row])
+    return sys.getsizeof(i_rows) + sampleBytes * len(i_rows) // len(sampleRows)
+
+# + + }}}
 
 class GameTableView(QTableView):
     def __init__(self, i_extraHorizontalScrollSpaceNeeded, i_parent=None):
@@ -435,6 +1267,38 @@ class GameTableView(QTableView):
         #  (list of str)
         self.dbRows = None
         #  (list of tuple)
+        self.dbResultKey = None
+        #  Either (tuple)
+        #   As returned from db.getGameList_getResultKey(), for the query that dbRows came from
+        #  or (None)
+        #   dbRows can't be reused for a later query
+        self.dbResultWhereExpression = None
+        #  (str)
+        #  WHERE expression of the query that dbRows came from, if dbResultKey isn't None
+        self.dbResultSortOperations = None
+        #  (list)
+        #  Sort operations of the query that dbRows came from, if dbResultKey isn't None
+        self.dbSortRanks = {}
+        #  (dict)
+        #  Ranks of the values of some columns of dbRows, for re-sorting them.
+        #  As i_sortRanks of db.getGameList_resortInMemory().
+        self.dbKeyColumnNos = None
+        #  Either (tuple)
+        #   Tuple has elements:
+        #    0:
+        #     (int)
+        #     Number of the "SchemaName" column in dbRows
+        #    1:
+        #     (int)
+        #     Number of the (first) "Games.GA_Id" column in dbRows
+        #  or (None)
+        #   dbRows doesn't have those columns (no gamebases are open)
+        self.dbKeyRowNos = None
+        #  Either (dict)
+        #   Maps (tuple) (schema name, game ID) to (int) number of the first row in dbRows with that game.
+        #   Built the first time it's needed by findGameWithSchemaNameAndId().
+        #  or (None)
+        #   Not built yet for the current dbRows.
 
         # Create model and set it in the table view
         self.tableModel = MyTableModel(self)
@@ -443,6 +1307,19 @@ class GameTableView(QTableView):
 
         self.setItemDelegate(MyStyledItemDelegate(self))
 
+        # Load images for the delegate in the background,
+        # and repaint just the cells that wanted them when they arrive
+        self.imageLoader = ImageLoader(self)
+        self.imageLoader.imageReady.connect(self.imageLoader_onImageReady)
+        QApplication.instance().aboutToQuit.connect(self.imageLoader.shutdown)
+
+        # Run queries for refilter() in the background
+        self.queryRunner = QueryRunner(self)
+        QApplication.instance().aboutToQuit.connect(self.queryRunner.shutdown)
+
+        # Words to search for, as well as the filter (see setFullTextSearch())
+        self.fullTextSearch = ""
+
         # Set row height
         if "rowHeight" not in settings.viewSettings:
             settings.viewSettings["rowHeight"] = 200
@@ -567,6 +1444,37 @@ class GameTableView(QTableView):
     #   (int)
     #   The new row/game count in the list
 
+    def setFullTextSearch(self, i_searchText):
+        """
+        Set words to search for in the text columns of the games,
+        which will be used together with the WHERE expression passed to later calls to refilter().
+
+        Params:
+         i_searchText:
+          (str)
+          Words and double-quoted phrases, all of which must be found.
+          Empty to not search.
+        """
+        self.fullTextSearch = i_searchText.strip()
+
+    def addFullTextSearchToWhereExpression(self, i_whereExpression):
+        """
+        Params:
+         i_whereExpression:
+          (str)
+
+        Returns:
+         (str)
+         i_whereExpression, with the current full-text search ANDed to it if there is one.
+        """
+        if self.fullTextSearch == "":
+            return i_whereExpression
+
+        matchExpression = "Games MATCH '" + self.fullTextSearch.replace("'", "''") + "'"
+        if i_whereExpression.strip() == "":
+            return matchExpression
+        return "(" + i_whereExpression + ") AND " + matchExpression
+
     def quickGetSql(self, i_sqlWhereExpression, i_sortOperations, i_whereExpressionMightUseNonVisibleColumns=True):
         """
         Params:
@@ -585,6 +1493,8 @@ class GameTableView(QTableView):
         # Get IDs of visible table columns
         tableColumnSpecIds = [column["id"]  for column in columns.tableColumn_getBySlice()]
 
+        i_sqlWhereExpression = self.addFullTextSearchToWhereExpression(i_sqlWhereExpression)
+
         #
         connectionsAndSqlTexts = db.getGameList_getSql(tableColumnSpecIds, i_sqlWhereExpression, i_sortOperations, i_whereExpressionMightUseNonVisibleColumns)
         #print(connectionsAndSqlTexts)
@@ -595,6 +1505,49 @@ class GameTableView(QTableView):
         #self.dbColumnNames, self.dbRows = db.getGameList_executeSqlAndFetchAll(connectionsAndSqlTexts, i_sortOperations)
         return connectionsAndSqlTexts
 
+    def prepareQueryDb(self, i_whereExpression, i_sortOperations, i_whereExpressionMightUseNonVisibleColumns=True):
+        """
+        Params:
+         As for queryDb()
+
+        Returns:
+         (tuple)
+         Tuple has elements:
+          0:
+           (list)
+           As returned from db.getGameList_getSql(),
+           or if windowed, from db.getGameList_getUnorderedSql().
+          1:
+           (bool)
+           True: The rows should be fetched in windows.
+          2:
+           Either (list of db.GameListShard)
+            The query should be run for each gamebase in a separate process.
+           or (None)
+        """
+        # Get IDs of visible table columns
+        tableColumnSpecIds = [column["id"]  for column in columns.tableColumn_getBySlice()]
+
+        i_whereExpression = self.addFullTextSearchToWhereExpression(i_whereExpression)
+
+        # If fetching rows in windows, the ORDER BY is applied separately
+        windowed = settings.preferences.get("windowedRowFetching", False)
+
+        #
+        if windowed:
+            connectionsAndSqlTexts = db.getGameList_getUnorderedSql(tableColumnSpecIds, i_whereExpression, i_whereExpressionMightUseNonVisibleColumns)
+        else:
+            connectionsAndSqlTexts = db.getGameList_getSql(tableColumnSpecIds, i_whereExpression, i_sortOperations, i_whereExpressionMightUseNonVisibleColumns)
+
+        # If wanted and there is more than one gamebase,
+        # run the query for each one in a separate process
+        shards = None
+        if not windowed and settings.preferences.get("shardedQueries", False) and db.shardProcessPoolIsRunning():
+            if sum([len(containerDb["attachedDatabases"])  for containerDb in db.g_containerDbs]) > 1:
+                shards = db.getGameList_getShards(tableColumnSpecIds, i_whereExpression, i_sortOperations, i_whereExpressionMightUseNonVisibleColumns)
+
+        return connectionsAndSqlTexts, windowed, shards
+
     def queryDb(self, i_whereExpression, i_sortOperations, i_whereExpressionMightUseNonVisibleColumns=True):
         """
         Params:
@@ -606,27 +1559,232 @@ class GameTableView(QTableView):
          i_whereExpressionMightUseNonVisibleColumns:
           (bool)
         """
-        # Get IDs of visible table columns
-        tableColumnSpecIds = [column["id"]  for column in columns.tableColumn_getBySlice()]
-
-        #
-        connectionsAndSqlTexts = db.getGameList_getSql(tableColumnSpecIds, i_whereExpression, i_sortOperations, i_whereExpressionMightUseNonVisibleColumns)
+        connectionsAndSqlTexts, windowed, shards = self.prepareQueryDb(i_whereExpression, i_sortOperations, i_whereExpressionMightUseNonVisibleColumns)
+        resultKey = self.getResultKey(i_whereExpression, i_sortOperations, i_whereExpressionMightUseNonVisibleColumns)
         #print(connectionsAndSqlTexts)
         # If no SQL to execute (because no databases are open)
         if len(connectionsAndSqlTexts) == 0:
-            self.dbColumnNames = []
-            self.dbRows = []
+            self.setQueryResult([], [], resultKey, i_whereExpression, i_sortOperations)
         # Else if we have some SQL
         else:
             # Execute
             try:
-                self.dbColumnNames, self.dbRows = db.getGameList_executeSqlAndFetchAll(connectionsAndSqlTexts, i_sortOperations)
+                if windowed:
+                    self.setQueryResult(*db.getGameList_executeSqlWindowed(connectionsAndSqlTexts, i_sortOperations))
+                elif shards != None:
+                    columnNames, rows = db.getGameList_executeShards(shards, i_sortOperations)
+                    if settings.preferences.get("columnarRows", False):
+                        rows = db.ColumnarGameList.fromRecordBatches(columnNames, [rows])
+                    self.setQueryResult(columnNames, rows, resultKey, i_whereExpression, i_sortOperations)
+                elif settings.preferences.get("columnarRows", False):
+                    self.setQueryResult(*db.getGameList_executeSqlAndFetchColumnar(connectionsAndSqlTexts, i_sortOperations), resultKey, i_whereExpression, i_sortOperations)
+                else:
+                    self.setQueryResult(*db.getGameList_executeSqlAndFetchAll(connectionsAndSqlTexts, i_sortOperations), resultKey, i_whereExpression, i_sortOperations)
             except sqlite3.OperationalError as e:
                 # TODO if i_whereExpressionMightUseNonVisibleColumns and error was 'no such column', maybe retry with SELECT * and all tables (see getGameRecord())
                 raise
 
+    def queryDbInBackground(self, i_whereExpression, i_sortOperations, i_whereExpressionMightUseNonVisibleColumns=True):
+        """
+        As queryDb() but execute the query on a background thread,
+        cancelling any earlier background query that is still in progress,
+        and meanwhile keep processing events so that the window stays responsive.
+
+        Params:
+         As for queryDb()
+
+        Returns:
+         Either (bool)
+          True: The query completed and its results are now in dbColumnNames and dbRows.
+          False: The query was superseded by another one before it completed.
+         or raise exception (sqlite3.Error)
+         or raise exception (concurrent.futures.BrokenExecutor or pickle.PicklingError)
+          From a worker process of a sharded query.
+        """
+        connectionsAndSqlTexts, windowed, shards = self.prepareQueryDb(i_whereExpression, i_sortOperations, i_whereExpressionMightUseNonVisibleColumns)
+        resultKey = self.getResultKey(i_whereExpression, i_sortOperations, i_whereExpressionMightUseNonVisibleColumns)
+        # If no SQL to execute (because no databases are open)
+        if len(connectionsAndSqlTexts) == 0:
+            self.queryRunner.cancel()
+            self.setQueryResult([], [], resultKey, i_whereExpression, i_sortOperations)
+            return True
+
+        # Start query and wait for it to finish or be superseded
+        task = self.queryRunner.start(db.getAttachDatabaseStatements(), connectionsAndSqlTexts, i_sortOperations, windowed, shards, settings.preferences.get("columnarRows", False))
+        eventLoop = QEventLoop()
+        def queryRunner_onQueryFinished(i_task):
+            if i_task is task:
+                eventLoop.quit()
+        self.queryRunner.queryFinished.connect(queryRunner_onQueryFinished)
+        eventLoop.exec_()
+        self.queryRunner.queryFinished.disconnect(queryRunner_onQueryFinished)
+
+        # If the event loop was made to exit by something else before the query finished
+        # (eg. QCoreApplication.quit(), which exits nested event loops too),
+        # give up on the query
+        if self.queryRunner.currentTask is task:
+            self.queryRunner.cancel()
+            return False
+
+        if task.cancelled:
+            return False
+        if task.exception != None:
+            raise task.exception
+
+        # Swap in the new results all at once
+        self.setQueryResult(task.columnNames, task.rows, resultKey, i_whereExpression, i_sortOperations)
+        return True
+
+    def getResultKey(self, i_whereExpression, i_sortOperations, i_whereExpressionMightUseNonVisibleColumns=True):
+        """
+        Params:
+         As for queryDb()
+
+        Returns:
+         Either (tuple)
+          As returned from db.getGameList_getResultKey(),
+          for the query that queryDb() would run with the current columns, full-text search and gamebases.
+         or (None)
+          The rows of the query can't be reused later, because they are fetched in windows.
+        """
+        if settings.preferences.get("windowedRowFetching", False):
+            return None
+
+        tableColumnSpecIds = [column["id"]  for column in columns.tableColumn_getBySlice()]
+        return db.getGameList_getResultKey(tableColumnSpecIds, self.addFullTextSearchToWhereExpression(i_whereExpression), i_sortOperations, i_whereExpressionMightUseNonVisibleColumns)
+
+    def setQueryResult(self, i_columnNames, i_rows, i_resultKey=None, i_whereExpression=None, i_sortOperations=None, i_sortRanks=None):
+        """
+        Params:
+         i_columnNames:
+          (list of str)
+         i_rows:
+          Either (list of sqlite3.Row)
+          or (db.WindowedGameList)
+          or (db.ColumnarGameList)
+         i_resultKey:
+          Either (tuple)
+           As returned from getResultKey(), for the query that the rows came from.
+          or (None)
+           The rows can't be reused for a later query.
+         i_whereExpression:
+          Either (str)
+           WHERE expression of the query that the rows came from.
+          or (None)
+         i_sortOperations:
+          Either (list)
+           Sort operations of the query that the rows came from.
+          or (None)
+         i_sortRanks:
+          Either (dict)
+           Ranks already worked out for the rows, as for dbSortRanks.
+          or (None)
+        """
+        self.dbColumnNames = i_columnNames
+        self.dbRows = i_rows
+        self.dbResultKey = i_resultKey
+        self.dbResultWhereExpression = i_whereExpression
+        self.dbResultSortOperations = i_sortOperations
+        self.dbSortRanks = i_sortRanks if i_sortRanks != None else {}
+
+        if "SchemaName" in i_columnNames and "Games.GA_Id" in i_columnNames:
+            self.dbKeyColumnNos = (i_columnNames.index("SchemaName"), i_columnNames.index("Games.GA_Id"))
+        else:
+            self.dbKeyColumnNos = None
+        self.dbKeyRowNos = None
+
         self.doneQuery.emit(len(self.dbRows))
 
+    def resortQueryResult(self, i_whereExpression, i_sortOperations):
+        """
+        If a query only differs in its sort operations from the one that the current rows came from,
+        get its rows by re-sorting the current ones in memory.
+
+        Params:
+         i_whereExpression:
+          (str)
+         i_sortOperations:
+          (list)
+          See ColumnNameBar.sort_operations
+
+        Returns:
+         (bool)
+         True: The new rows are now in dbColumnNames and dbRows.
+         False: The new rows have to be got by querying the database.
+        """
+        # If the current rows aren't from the same columns, filter, full-text search and gamebases,
+        # they can't be re-sorted
+        if self.dbResultKey == None or self.dbResultSortOperations == None or self.dbResultKey != self.getResultKey(i_whereExpression, self.dbResultSortOperations):
+            return False
+        # If the sort operations are the same too,
+        # the current rows are already right
+        if self.dbResultKey == self.getResultKey(i_whereExpression, i_sortOperations):
+            self.setQueryResult(self.dbColumnNames, self.dbRows, self.dbResultKey, i_whereExpression, i_sortOperations, self.dbSortRanks)
+            return True
+        # If no sort is wanted then the rows should be in the order that the database happens to return them,
+        # which can't be recovered from the current order
+        if len(i_sortOperations) == 0 and len(self.dbResultSortOperations) > 0:
+            return False
+
+        resorted = db.getGameList_resortInMemory(self.dbRows, self.dbColumnNames, i_sortOperations, self.dbSortRanks)
+        if resorted == None:
+            return False
+        rows, sortRanks = resorted
+
+        self.setQueryResult(self.dbColumnNames, rows, self.getResultKey(i_whereExpression, i_sortOperations), i_whereExpression, i_sortOperations, sortRanks)
+        return True
+
+    def refineQueryResult(self, i_whereExpression, i_sortOperations):
+        """
+        If a WHERE expression only narrows down the one that the current rows came from,
+        get its rows by filtering the current ones in memory.
+
+        Params:
+         i_whereExpression:
+          (str)
+         i_sortOperations:
+          (list)
+          See ColumnNameBar.sort_operations
+
+        Returns:
+         (bool)
+         True: The new rows are now in dbColumnNames and dbRows.
+         False: The new rows have to be got by querying the database.
+        """
+        # If the current rows aren't from the same columns, sort, full-text search and gamebases,
+        # they can't be refined
+        if self.dbResultKey == None or self.dbResultKey != self.getResultKey(self.dbResultWhereExpression, i_sortOperations):
+            return False
+
+        refiningTerms = sql.getRefiningTerms(self.dbResultWhereExpression, i_whereExpression)
+        if refiningTerms == None:
+            return False
+        rows = sql.filterRowsInMemory(self.dbRows, self.dbColumnNames, refiningTerms)
+        if rows == None:
+            return False
+
+        self.setQueryResult(self.dbColumnNames, rows, self.getResultKey(i_whereExpression, i_sortOperations), i_whereExpression, i_sortOperations)
+        return True
+
+    def getQueryResult(self):
+        """
+        Get the rows currently in the table, in a form that can be kept and later passed back to refilter()
+        to show them again without querying the database.
+
+        Returns:
+         Either (QueryResult)
+         or (None)
+          The current rows can't be reused.
+        """
+        if self.dbResultKey == None:
+            return None
+        return {
+            "key": self.dbResultKey,
+            "columnNames": self.dbColumnNames,
+            "rows": self.dbRows,
+            "sizeBytes": estimateRowsSize(self.dbRows)
+        }
+
     def selectedGameSchemaNameAndId(self):
         """
         Returns:
@@ -640,10 +1798,33 @@ class GameTableView(QTableView):
            Game ID
         """
         selectedIndex = self.selectionModel().currentIndex()
-        dbRow = self.dbRows[selectedIndex.row()]
-        return (dbRow[self.dbColumnNames.index("SchemaName")], dbRow[self.dbColumnNames.index("Games.GA_Id")])
+        return self.gameSchemaNameAndIdOnRow(selectedIndex.row())
+
+    def gameSchemaNameAndIdOnRow(self, i_rowNo):
+        """
+        Params:
+         i_rowNo:
+          (int)
+
+        Returns:
+         (tuple)
+         Tuple has elements:
+          0:
+           (str)
+           Schema name
+          1:
+           (int)
+           Game ID
+        """
+        # If the rows are being fetched in windows,
+        # look in the list of keys rather than fetching the row
+        if isinstance(self.dbRows, db.WindowedGameList):
+            return self.dbRows.keyAt(i_rowNo)
+
+        dbRow = self.dbRows[i_rowNo]
+        return (dbRow[self.dbKeyColumnNos[0]], dbRow[self.dbKeyColumnNos[1]])
 
-    def refilter(self, i_sqlWhereExpression, i_sortOperations):
+    def refilter(self, i_sqlWhereExpression, i_sortOperations, i_cachedResult=None):
         """
         Params:
          i_sqlWhereExpression:
@@ -651,9 +1832,19 @@ class GameTableView(QTableView):
          i_sortOperations:
           (list)
           See ColumnNameBar.sort_operations
+         i_cachedResult:
+          Either (QueryResult)
+           As returned from an earlier call to getQueryResult().
+           If it came from the same query as the one now wanted,
+           show its rows instead of querying the database again.
+          or (None)
 
         Returns:
          (bool)
+         True: The table now shows the rows of the new query.
+         False: The query failed (and an error was shown),
+          or another refilter() superseded this one while it was querying,
+          in which case the caller should leave the table and anything that depends on it to that one.
         """
         # Remember what game is currently selected and where on the screen the row is
         selectedIndex = self.selectionModel().currentIndex()
@@ -666,7 +1857,23 @@ class GameTableView(QTableView):
         # Query database
         sqlValid = True
         try:
-            self.queryDb(i_sqlWhereExpression, i_sortOperations)
+            # If have the rows of this same query already,
+            # use them
+            if i_cachedResult != None and i_cachedResult["key"] == self.getResultKey(i_sqlWhereExpression, i_sortOperations):
+                self.queryRunner.cancel()
+                self.setQueryResult(i_cachedResult["columnNames"], i_cachedResult["rows"], i_cachedResult["key"], i_sqlWhereExpression, i_sortOperations)
+            # Else if only the sort order has changed,
+            # re-sort the current rows in memory
+            elif self.resortQueryResult(i_sqlWhereExpression, i_sortOperations):
+                self.queryRunner.cancel()
+            # Else if the new filter only narrows down the current rows,
+            # filter them in memory
+            elif self.refineQueryResult(i_sqlWhereExpression, i_sortOperations):
+                self.queryRunner.cancel()
+            # Else if another refilter() superseded this one while the query was running,
+            # leave the table to that
+            elif not self.queryDbInBackground(i_sqlWhereExpression, i_sortOperations):
+                return False
         #except sql.SqlParseError as e:
         #    sqlValid = False
         #
@@ -677,14 +1884,18 @@ class GameTableView(QTableView):
         #    messageBox.setText("<big><b>In SQL WHERE expression:</b></big><pre>" + "\n".join(e.args) + "</pre>")
         #    messageBox.resizeToContent()
         #    messageBox.exec()
-        except sqlite3.OperationalError as e:
+        # (The errors from worker processes are only possible with sharded queries)
+        except (sqlite3.Error, concurrent.futures.BrokenExecutor, pickle.PicklingError) as e:
             sqlValid = False
 
             import traceback
             print(traceback.format_exc())
 
             messageBox = qt_extras.ResizableMessageBox(QApplication.style().standardIcon(QStyle.SP_MessageBoxCritical), "Error")
-            messageBox.setText("<big><b>In SQL WHERE expression:</b></big><pre>" + "\n".join(traceback.format_exception_only(e.__class__, e)) + "</pre>")
+            if isinstance(e, sqlite3.Error):
+                messageBox.setText("<big><b>In SQL WHERE expression:</b></big><pre>" + "\n".join(traceback.format_exception_only(e.__class__, e)) + "</pre>")
+            else:
+                messageBox.setText("<big><b>In query worker process:</b></big><pre>" + "\n".join(traceback.format_exception_only(e.__class__, e)) + "</pre>")
             messageBox.resizeToContent()
             messageBox.exec()
 
@@ -700,14 +1911,7 @@ class GameTableView(QTableView):
         # search for new row number of that game
         # and if found, scroll to put that game in the same screen position it previously was
         if selectedGameSchemaNameAndId != None:
-            # [TODO use findGameWithSchemaNameAndId() ?...]
-            schemaNameColumnNo = self.dbColumnNames.index("SchemaName")
-            idColumnNo = self.dbColumnNames.index("Games.GA_Id")
-            newDbRowNo = None
-            for dbRowNo, dbRow in enumerate(self.dbRows):
-                if dbRow[schemaNameColumnNo] == selectedGameSchemaNameAndId[0] and dbRow[idColumnNo] == selectedGameSchemaNameAndId[1]:
-                    newDbRowNo = dbRowNo
-                    break
+            newDbRowNo = self.findGameWithSchemaNameAndId(selectedGameSchemaNameAndId[0], selectedGameSchemaNameAndId[1])
 
             if newDbRowNo == None:
                 self.scrollToTop()
@@ -718,8 +1922,42 @@ class GameTableView(QTableView):
         return sqlValid
 
     def requery(self):
+        # Row numbers that images were requested for are about to become meaningless
+        self.imageLoader.cancelAll()
+
         self.tableModel.modelReset.emit()
 
+    def imageLoader_onImageReady(self, i_cells):
+        """
+        Params:
+         i_cells:
+          (list of tuple)
+          As for ImageLoader.imageReady
+        """
+        for rowNo, columnNo in i_cells:
+            index = self.tableModel.index(rowNo, columnNo)
+            self.tableModel.dataChanged.emit(index, index)
+
+    def visibleRowRange(self):
+        """
+        Returns:
+         (tuple)
+         Tuple has elements:
+          0:
+           (int)
+           First row number that is at least partly visible
+          1:
+           (int)
+           Last row number that is at least partly visible
+        """
+        firstRowNo = self.rowAt(0)
+        if firstRowNo == -1:
+            firstRowNo = 0
+        lastRowNo = self.rowAt(self.viewport().height() - 1)
+        if lastRowNo == -1:
+            lastRowNo = self.tableModel.rowCount(None) - 1
+        return (firstRowNo, lastRowNo)
+
     def focusInEvent(self, i_event):  # override from QWidget
         return  # [disabled for now because causes problems jumping back to top-left]
         # If don't have a selection, its row and column both showing up as -1
@@ -777,9 +2015,8 @@ class GameTableView(QTableView):
             self.requestDetailPane.emit(i_withKeyboardAction, i_modelIndex)
 
         elif columnId == "play":
-            rowNo = i_modelIndex.row()
-            gameId = self.dbRows[rowNo][self.dbColumnNames.index("Games.GA_Id")]
-            gameRecord = db.getGameRecord(self.dbRows[rowNo]["SchemaName"], gameId)
+            schemaName, gameId = self.gameSchemaNameAndIdOnRow(i_modelIndex.row())
+            gameRecord = db.getGameRecord(schemaName, gameId)
             gameRecord = db.DbRecordDict(gameRecord)
 
             adapterId = gamebase.schemaAdapterIds[gameRecord["SchemaName"]]
@@ -796,9 +2033,8 @@ class GameTableView(QTableView):
             self.adapterRunFunctionFinished.emit()
 
         elif columnId == "music":
-            rowNo = i_modelIndex.row()
-            gameId = self.dbRows[rowNo][self.dbColumnNames.index("Games.GA_Id")]
-            gameRecord = db.getGameRecord(self.dbRows[rowNo]["SchemaName"], gameId)
+            schemaName, gameId = self.gameSchemaNameAndIdOnRow(i_modelIndex.row())
+            gameRecord = db.getGameRecord(schemaName, gameId)
             gameRecord = db.DbRecordDict(gameRecord)
 
             adapterId = gamebase.schemaAdapterIds[gameRecord["SchemaName"]]
@@ -863,7 +2099,7 @@ class GameTableView(QTableView):
             if "type" in tableColumnSpec and tableColumnSpec["type"] == "gameId":
                 # Get the target game ID
                 rowNo = i_modelIndex.row()
-                schemaName = self.dbRows[rowNo][self.dbColumnNames.index("SchemaName")]
+                schemaName = self.dbRows[rowNo][self.dbKeyColumnNos[0]]
                 gameId = self.dbRows[rowNo][self.dbColumnNames.index(tableColumnSpec["dbIdentifiers"][0])]
                 if gameId != 0:
                     self.selectGameWithSchemaNameAndId(schemaName, gameId)
@@ -875,13 +2111,35 @@ class GameTableView(QTableView):
           (str)
          i_id:
           (int)
+
+        Returns:
+         Either (int)
+          Row number
+         or (None)
+          Game is not in the table.
         """
-        schemaNameColumnNo = self.dbColumnNames.index("SchemaName")
-        idColumnNo = self.dbColumnNames.index("Games.GA_Id")
-        for rowNo, row in enumerate(self.dbRows):
-            if row[schemaNameColumnNo] == i_schemaName and row[idColumnNo] == i_id:
-                return rowNo
-        return None
+        # If the rows are being fetched in windows,
+        # look in the list of keys rather than fetching every row
+        if isinstance(self.dbRows, db.WindowedGameList):
+            return self.dbRows.rowNoOfKey(i_schemaName, i_id)
+
+        if self.dbKeyColumnNos == None:
+            return None
+
+        # If not done yet for these rows,
+        # index them by game
+        if self.dbKeyRowNos == None:
+            schemaNameColumnNo, idColumnNo = self.dbKeyColumnNos
+            if isinstance(self.dbRows, db.ColumnarGameList):
+                keys = zip(self.dbRows.columnValues(schemaNameColumnNo), self.dbRows.columnValues(idColumnNo))
+            else:
+                keys = [(row[schemaNameColumnNo], row[idColumnNo])  for row in self.dbRows]
+            self.dbKeyRowNos = {}
+            for rowNo, key in enumerate(keys):
+                if key not in self.dbKeyRowNos:
+                    self.dbKeyRowNos[key] = rowNo
+
+        return self.dbKeyRowNos.get((i_schemaName, i_id))
 
     requestClearFilter = Signal()
 
@@ -905,6 +2163,10 @@ class GameTableView(QTableView):
             selectedIndex = self.selectionModel().currentIndex()
             self.selectionModel().setCurrentIndex(self.selectionModel().model().index(rowNo, selectedIndex.column()), QItemSelectionModel.ClearAndSelect)
 
+            # Start loading images for the rows around it, nearest first
+            prefetchRowCount = self.prefetchRowCount() // 2
+            self.prefetchImages([rowNo] + [rowNo + offset * sign  for offset in range(1, prefetchRowCount + 1)  for sign in [1, -1]])
+
     def selectGameOnRelativeRow(self, i_rowChange):
         """
         Params:
@@ -917,6 +2179,34 @@ class GameTableView(QTableView):
             return
         self.selectionModel().setCurrentIndex(self.selectionModel().model().index(newRowNo, selectedIndex.column()), QItemSelectionModel.ClearAndSelect)
 
+        # Once the newly selected game has been shown,
+        # get the records of the games either side of it ready, in case the user keeps going
+        QTimer.singleShot(0, functools.partial(self.prefetchGameRecordsAroundRow, newRowNo, i_rowChange))
+
+    def prefetchGameRecordsAroundRow(self, i_rowNo, i_rowChange):
+        """
+        Fetch the records of the games next to a row into db's record cache.
+
+        Params:
+         i_rowNo:
+          (int)
+         i_rowChange:
+          (int)
+          The direction that the user is moving through the rows in.
+          The next row in that direction is fetched first.
+        """
+        direction = 1 if i_rowChange >= 0 else -1
+        schemaNamesAndGameIds = []
+        for rowNo in [i_rowNo + direction, i_rowNo - direction]:
+            if rowNo >= 0 and rowNo < len(self.dbRows):
+                schemaNamesAndGameIds.append(self.gameSchemaNameAndIdOnRow(rowNo))
+        try:
+            db.prefetchGameRecords(schemaNamesAndGameIds)
+        except sqlite3.Error:
+            # Not worth bothering the user about;
+            # the records will be fetched again if they are needed
+            pass
+
     def getSelectedCellNo(self):
         """
         Returns:
@@ -1047,6 +2337,96 @@ class GameTableView(QTableView):
         # Notify main app so external bars can be scrolled horizontally by the same amount
         self.horizontalScroll.emit(i_dx)
 
+        # If scrolled vertically
+        if i_dy != 0:
+            firstRowNo, lastRowNo = self.visibleRowRange()
+            prefetchRowCount = self.prefetchRowCount()
+
+            # Don't carry on loading images for rows that have been scrolled well out of view
+            self.imageLoader.cancelRowsOutside(firstRowNo - prefetchRowCount, lastRowNo + prefetchRowCount)
+
+            # Start loading images for the rows that are coming into view next
+            # (i_dy is negative when the content moves up, ie. when scrolling down)
+            if i_dy < 0:
+                self.prefetchImages(range(lastRowNo + 1, lastRowNo + 1 + prefetchRowCount))
+            else:
+                self.prefetchImages(range(firstRowNo - 1, firstRowNo - 1 - prefetchRowCount, -1))
+
+    # How many pages' worth of rows beyond the visible ones to prefetch images for
+    prefetchPageCount = 2
+
+    def prefetchRowCount(self):
+        """
+        Returns:
+         (int)
+         Number of rows beyond the visible ones to prefetch images for.
+        """
+        visibleRowCount = max(1, self.viewport().height() // max(1, self.rowHeight()) + 1)
+        return visibleRowCount * GameTableView.prefetchPageCount
+
+    def prefetchImages(self, i_rowNos):
+        """
+        Start loading in the background any images that will be drawn in some rows when they are scrolled into view.
+
+        Params:
+         i_rowNos:
+          (iterable of int)
+          Rows to prefetch images for, nearest first.
+          Row numbers that are out of range are ignored.
+        """
+        if self.dbRows == None:
+            return
+        rowCount = len(self.dbRows)
+
+        # Find visible columns that show images
+        imageColumnNos = []
+        for columnNo, column in enumerate(columns.tableColumn_getBySlice()):
+            if columnIdShowsImages(column["id"]):
+                imageColumnNos.append((columnNo, column["id"]))
+        if len(imageColumnNos) == 0:
+            return
+
+        delegate = self.itemDelegate()
+        for rowNo in i_rowNos:
+            if rowNo < 0 or rowNo >= rowCount:
+                continue
+            for columnNo, columnId in imageColumnNos:
+                # Get the rectangle the cell would be painted in
+                # (the position doesn't matter, only the size)
+                cellRect = self.visualRect(self.tableModel.index(rowNo, columnNo))
+                cellImage = delegate.cellImage(rowNo, columnId, cellRect)
+                if cellImage != None:
+                    self.imageLoader.prefetch(cellImage[0], cellImage[1], cellImage[2], rowNo, columnNo)
+
+    def prefetchAllImages(self, i_onProgress=None):
+        """
+        Load the images for every row in the table (ie. to fill the thumbnail cache),
+        a batch at a time, and wait until done.
+
+        Params:
+         i_onProgress:
+          Either (function)
+           Called after each batch.
+           Function has:
+            Params:
+             i_doneRowCount:
+              (int)
+             i_totalRowCount:
+              (int)
+          or (None)
+        """
+        if self.dbRows == None:
+            return
+        rowCount = len(self.dbRows)
+
+        batchSize = 256
+        for batchStartRowNo in range(0, rowCount, batchSize):
+            self.prefetchImages(range(batchStartRowNo, min(batchStartRowNo + batchSize, rowCount)))
+            while len(self.imageLoader.pendingTasks) > 0:
+                QApplication.processEvents(QEventLoop.AllEvents, 50)
+            if i_onProgress != None:
+                i_onProgress(min(batchStartRowNo + batchSize, rowCount), rowCount)
+
     def scrollBy(self, i_dx, i_dy):
         self.horizontalScrollBar().setValue(self.horizontalScrollBar().value() + i_dx)
 
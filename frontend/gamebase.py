@@ -4,6 +4,13 @@ import sys
 import os.path
 import importlib
 import re
+import json
+import hashlib
+import threading
+import time
+
+# This program
+import settings
 
 # + Load {{{
 
@@ -107,6 +114,10 @@ def reloadAdapter(i_adapterId):
     """
     importlib.reload(adapters[i_adapterId]["module"])
 
+    # The adapter may have changed its screenshots directory
+    forgetScreenshotIndex(i_adapterId)
+    startBuildingScreenshotIndex(i_adapterId)
+
 def forgetAdapter(i_adapterId):
     """
     Params:
@@ -123,6 +134,8 @@ def forgetAdapter(i_adapterId):
     # Delete main adapter entry
     del(adapters[i_adapterId])
 
+    forgetScreenshotIndex(i_adapterId)
+
 # + }}}
 
 
@@ -231,6 +244,418 @@ def screenshotPath_relativeToUrl(i_adapterId, i_relativePath):
 
 # + }}}
 
+# + Screenshot index {{{
+
+# To find out which supplementary screenshots exist for a game, rather than probing the disk with
+# os.path.exists() for every candidate file name (which is slow on network drives and happens on every
+# repaint of the table), we walk the adapter's screenshots directory once, remember which files are in it
+# and save that to a file in the settings directory for the next session.
+# A saved index is only trusted while the modification times of all of the directories in it are unchanged,
+# which they won't be if a file has since been added to or removed from any of them.
+#
+# Loading or building an index (which on a network drive can take a long time) is done on a background thread,
+# started when the adapter is opened, and until it's ready os.path.exists() is used as before.
+# During the session, when a file isn't found in the index, the directory it would be in is checked again
+# (at most every few seconds) in case files have been added to it since.
+
+g_screenshotIndexes = {}
+# (dict)
+# Dict has arbitrary key-value properties:
+#  Keys:
+#   (str)
+#   Adapter ID
+#  Values:
+#   (dict)
+#   Dict has specific key-value properties:
+#    baseDirPath:
+#     (str)
+#     Absolute path of the directory that was indexed.
+#    dirMtimes:
+#     (dict)
+#     Dict has arbitrary key-value properties:
+#      Keys:
+#       (str)
+#       Path of a directory, relative to baseDirPath ("" for baseDirPath itself),
+#       as returned from screenshotIndex_normalizePath().
+#      Values:
+#       (int)
+#       Modification time of the directory, in nanoseconds.
+#    filePaths:
+#     (set of str)
+#     Paths of all files found, relative to baseDirPath,
+#     as returned from screenshotIndex_normalizePath().
+
+g_screenshotIndexesLock = threading.RLock()
+
+g_screenshotIndexBuilds = {}
+# (dict)
+# Dict has arbitrary key-value properties:
+#  Keys:
+#   (str)
+#   Adapter ID
+#  Values:
+#   (object)
+#   Token of the background thread loading or building the adapter's index,
+#   which only stores its result if this is still there when it finishes.
+
+g_screenshotDirCheckTimes = {}
+# (dict)
+# Dict has arbitrary key-value properties:
+#  Keys:
+#   (str)
+#   Absolute path of a directory
+#  Values:
+#   (float)
+#   time.monotonic() when it was last checked for having been modified, after failing to find a file in it
+
+# Seconds to wait before checking the same directory again
+SCREENSHOT_DIR_CHECK_INTERVAL = 5
+
+SCREENSHOT_INDEX_FORMAT_VERSION = 2
+
+def screenshotIndex_normalizePath(i_relativePath):
+    """
+    Params:
+     i_relativePath:
+      (str)
+      Path of a file or directory, relative to a screenshots directory.
+
+    Returns:
+     (str)
+     The path with its case normalized with os.path.normcase() and with forward slashes
+     (since normcase() turns them into backslashes on Windows),
+     or "" for the screenshots directory itself.
+    """
+    normalized = os.path.normcase(os.path.normpath(i_relativePath)).replace(os.sep, "/")
+    if normalized == ".":
+        return ""
+    return normalized
+
+def screenshotIndex_filePath(i_baseDirPath):
+    """
+    Params:
+     i_baseDirPath:
+      (str)
+
+    Returns:
+     (str)
+     Path of the file in the settings directory that the index of this screenshots directory is saved to.
+    """
+    return settings.settingsDirPath + os.sep + "screenshot_index" + os.sep + hashlib.sha1(i_baseDirPath.encode("utf-8")).hexdigest() + ".json"
+
+def screenshotIndex_scan(i_baseDirPath):
+    """
+    Walk a screenshots directory and record all the files and directories in it.
+
+    Params:
+     i_baseDirPath:
+      (str)
+
+    Returns:
+     (dict)
+     As for the values of g_screenshotIndexes.
+    """
+    dirMtimes = {}
+    filePaths = set()
+
+    visitedDirIds = set()
+    pendingDirRelativePaths = [""]
+    while len(pendingDirRelativePaths) > 0:
+        dirRelativePath = pendingDirRelativePaths.pop()
+        if dirRelativePath == "":
+            dirAbsolutePath = i_baseDirPath
+        else:
+            dirAbsolutePath = i_baseDirPath + "/" + dirRelativePath
+
+        # Get directory's modification time,
+        # and avoid going round in circles if there are symlinks to directories
+        try:
+            stat = os.stat(dirAbsolutePath)
+        except OSError:
+            continue
+        if (stat.st_dev, stat.st_ino) in visitedDirIds:
+            continue
+        visitedDirIds.add((stat.st_dev, stat.st_ino))
+        dirMtimes[screenshotIndex_normalizePath(dirRelativePath)] = stat.st_mtime_ns
+
+        # Record files and queue subdirectories
+        try:
+            with os.scandir(dirAbsolutePath) as entries:
+                for entry in entries:
+                    if dirRelativePath == "":
+                        entryRelativePath = entry.name
+                    else:
+                        entryRelativePath = dirRelativePath + "/" + entry.name
+
+                    try:
+                        isDir = entry.is_dir()
+                    except OSError:
+                        isDir = False
+
+                    if isDir:
+                        pendingDirRelativePaths.append(entryRelativePath)
+                    else:
+                        filePaths.add(screenshotIndex_normalizePath(entryRelativePath))
+        except OSError:
+            pass
+
+    return {
+        "baseDirPath": i_baseDirPath,
+        "dirMtimes": dirMtimes,
+        "filePaths": filePaths
+    }
+
+def screenshotIndex_isUpToDate(i_index):
+    """
+    Params:
+     i_index:
+      (dict)
+      As for the values of g_screenshotIndexes.
+
+    Returns:
+     (bool)
+     True: None of the indexed directories have been modified since the index was made.
+    """
+    baseDirPath = i_index["baseDirPath"]
+    for dirRelativePath, mtime in i_index["dirMtimes"].items():
+        if dirRelativePath == "":
+            dirAbsolutePath = baseDirPath
+        else:
+            dirAbsolutePath = baseDirPath + "/" + dirRelativePath
+        try:
+            if os.stat(dirAbsolutePath).st_mtime_ns != mtime:
+                return False
+        except OSError:
+            return False
+    return True
+
+def screenshotIndex_load(i_baseDirPath):
+    """
+    Load a previously saved index of a screenshots directory.
+
+    Params:
+     i_baseDirPath:
+      (str)
+
+    Returns:
+     Either (dict)
+      As for the values of g_screenshotIndexes.
+     or (None)
+      There is no saved index, it couldn't be read, or it is out of date.
+    """
+    indexFilePath = screenshotIndex_filePath(i_baseDirPath)
+    if not os.path.exists(indexFilePath):
+        return None
+
+    try:
+        with open(indexFilePath, "rb") as f:
+            saved = json.loads(f.read().decode("utf-8"))
+    except Exception as e:
+        return None
+    if not isinstance(saved, dict) or saved.get("version") != SCREENSHOT_INDEX_FORMAT_VERSION or saved.get("baseDirPath") != i_baseDirPath:
+        return None
+
+    index = {
+        "baseDirPath": saved["baseDirPath"],
+        "dirMtimes": saved["dirMtimes"],
+        "filePaths": set(saved["filePaths"])
+    }
+    if not screenshotIndex_isUpToDate(index):
+        return None
+    return index
+
+def screenshotIndex_save(i_index):
+    """
+    Params:
+     i_index:
+      (dict)
+      As for the values of g_screenshotIndexes.
+    """
+    indexFilePath = screenshotIndex_filePath(i_index["baseDirPath"])
+    try:
+        os.makedirs(os.path.dirname(indexFilePath), exist_ok=True)
+        # Write to a temporary file and then rename it over the old one
+        # so that a crash halfway through doesn't leave a corrupt index behind
+        with open(indexFilePath + ".tmp", "wb") as f:
+            f.write(json.dumps({
+                "version": SCREENSHOT_INDEX_FORMAT_VERSION,
+                "baseDirPath": i_index["baseDirPath"],
+                "dirMtimes": i_index["dirMtimes"],
+                "filePaths": sorted(i_index["filePaths"])
+            }).encode("utf-8"))
+        os.replace(indexFilePath + ".tmp", indexFilePath)
+    except OSError:
+        # Not being able to save the index only costs us a rescan next session
+        pass
+
+def screenshotIndex_refreshDir(io_index, i_dirRelativePath):
+    """
+    If a directory has been modified (or created) since it was indexed,
+    replace the files recorded for it (not including those in its subdirectories) with the ones in it now.
+
+    Params:
+     io_index:
+      (dict)
+      As for the values of g_screenshotIndexes.
+     i_dirRelativePath:
+      (str)
+      Path of the directory, relative to the index's baseDirPath ("" for baseDirPath itself),
+      as returned from screenshotIndex_normalizePath().
+
+    Returns:
+     (bool)
+     True: The directory had been modified and the index was updated.
+    """
+    if i_dirRelativePath == "":
+        dirAbsolutePath = io_index["baseDirPath"]
+    else:
+        dirAbsolutePath = io_index["baseDirPath"] + "/" + i_dirRelativePath
+
+    try:
+        mtime = os.stat(dirAbsolutePath).st_mtime_ns
+    except OSError:
+        return False
+    if io_index["dirMtimes"].get(i_dirRelativePath) == mtime:
+        return False
+
+    try:
+        with os.scandir(dirAbsolutePath) as entries:
+            dirFilePaths = set()
+            for entry in entries:
+                try:
+                    isDir = entry.is_dir()
+                except OSError:
+                    isDir = False
+                if not isDir:
+                    if i_dirRelativePath == "":
+                        dirFilePaths.add(screenshotIndex_normalizePath(entry.name))
+                    else:
+                        dirFilePaths.add(screenshotIndex_normalizePath(i_dirRelativePath + "/" + entry.name))
+    except OSError:
+        return False
+
+    # Swap in the directory's files
+    dirPrefix = "" if i_dirRelativePath == "" else i_dirRelativePath + "/"
+    with g_screenshotIndexesLock:
+        io_index["filePaths"] = set([filePath  for filePath in io_index["filePaths"]  if not (filePath.startswith(dirPrefix) and "/" not in filePath[len(dirPrefix):])]) | dirFilePaths
+        io_index["dirMtimes"][i_dirRelativePath] = mtime
+    return True
+
+def startBuildingScreenshotIndex(i_adapterId):
+    """
+    If an adapter has a screenshots directory and its index isn't already loaded or being loaded,
+    start loading it from the settings directory or (re)building it, on a background thread.
+
+    Params:
+     i_adapterId:
+      (str)
+    """
+    with g_screenshotIndexesLock:
+        if i_adapterId in g_screenshotIndexes or i_adapterId in g_screenshotIndexBuilds:
+            return
+        if not hasattr(adapters[i_adapterId]["module"], "config_screenshotsBaseDirPath"):
+            return
+        baseDirPath = normalizeDirPathFromAdapter(adapters[i_adapterId]["module"].config_screenshotsBaseDirPath)
+
+        token = object()
+        g_screenshotIndexBuilds[i_adapterId] = token
+
+    def build():
+        index = screenshotIndex_load(baseDirPath)
+        if index == None:
+            index = screenshotIndex_scan(baseDirPath)
+            screenshotIndex_save(index)
+
+        # If the adapter hasn't been forgotten or reloaded in the meantime,
+        # start using the index
+        with g_screenshotIndexesLock:
+            if g_screenshotIndexBuilds.get(i_adapterId) is token:
+                del(g_screenshotIndexBuilds[i_adapterId])
+                g_screenshotIndexes[i_adapterId] = index
+
+    thread = threading.Thread(target=build, name="Screenshot index", daemon=True)
+    thread.start()
+
+def getScreenshotIndex(i_adapterId):
+    """
+    Get the index of an adapter's screenshots directory,
+    starting to load or build it if that hasn't been done yet.
+
+    Params:
+     i_adapterId:
+      (str)
+
+    Returns:
+     Either (dict)
+      As for the values of g_screenshotIndexes.
+     or (None)
+      The adapter doesn't have a screenshots directory,
+      or the index isn't ready yet.
+    """
+    with g_screenshotIndexesLock:
+        if i_adapterId in g_screenshotIndexes:
+            return g_screenshotIndexes[i_adapterId]
+
+    startBuildingScreenshotIndex(i_adapterId)
+    return None
+
+def forgetScreenshotIndex(i_adapterId):
+    """
+    Drop the in-memory index of an adapter's screenshots directory,
+    so that it is reloaded (and rechecked for being up to date) the next time it's needed.
+
+    Params:
+     i_adapterId:
+      (str)
+    """
+    with g_screenshotIndexesLock:
+        if i_adapterId in g_screenshotIndexes:
+            del(g_screenshotIndexes[i_adapterId])
+        # (And if it's still being built, discard it when it's done)
+        if i_adapterId in g_screenshotIndexBuilds:
+            del(g_screenshotIndexBuilds[i_adapterId])
+
+def screenshotExists(i_adapterId, i_relativePath):
+    """
+    Check whether a screenshot file exists, according to the index of the adapter's screenshots directory.
+
+    Params:
+     i_adapterId:
+      (str)
+     i_relativePath:
+      (str)
+      Path of image, relative to the 'Screenshots' folder.
+
+    Returns:
+     (bool)
+    """
+    index = getScreenshotIndex(i_adapterId)
+    # If the index isn't ready yet,
+    # look on the disk
+    if index == None:
+        if not hasattr(adapters[i_adapterId]["module"], "config_screenshotsBaseDirPath"):
+            return False
+        return os.path.exists(screenshotPath_relativeToAbsolute(i_adapterId, i_relativePath))
+
+    filePath = screenshotIndex_normalizePath(i_relativePath)
+    if filePath in index["filePaths"]:
+        return True
+
+    # If the directory it would be in hasn't been checked recently,
+    # see whether files have been added to it since it was indexed
+    dirRelativePath = filePath.rpartition("/")[0]
+    dirAbsolutePath = index["baseDirPath"] + "/" + dirRelativePath
+    now = time.monotonic()
+    with g_screenshotIndexesLock:
+        if now - g_screenshotDirCheckTimes.get(dirAbsolutePath, -SCREENSHOT_DIR_CHECK_INTERVAL) < SCREENSHOT_DIR_CHECK_INTERVAL:
+            return False
+        g_screenshotDirCheckTimes[dirAbsolutePath] = now
+    if not screenshotIndex_refreshDir(index, dirRelativePath):
+        return False
+    return filePath in index["filePaths"]
+
+# + }}}
+
 # + Get image paths {{{
 
 # + + Screenshots {{{
@@ -304,8 +729,7 @@ def dbRow_supplementaryScreenshotRelativePaths(i_row, i_simulateCount=None):
 
                     while True:
                         screenshotRelativePath = screenshotStem + "_" + str(screenshotNo) + imageExtension
-                        screenshotAbsolutePath = screenshotPath_relativeToAbsolute(adapterId, screenshotRelativePath)
-                        if screenshotAbsolutePath == None or not os.path.exists(screenshotAbsolutePath):
+                        if not screenshotExists(adapterId, screenshotRelativePath):
                             break
 
                         supplementaryScreenshotPaths.append(screenshotRelativePath)
@@ -332,8 +756,7 @@ def dbRow_supplementaryScreenshotRelativePaths(i_row, i_simulateCount=None):
 
                     while True:
                         screenshotRelativePath = screenshotStem + "-" + f"{screenshotNo:02}" + imageExtension
-                        screenshotAbsolutePath = screenshotPath_relativeToAbsolute(adapterId, screenshotRelativePath)
-                        if screenshotAbsolutePath == None or not os.path.exists(screenshotAbsolutePath):
+                        if not screenshotExists(adapterId, screenshotRelativePath):
                             break
 
                         supplementaryScreenshotPaths.append(screenshotRelativePath)
@@ -559,6 +982,9 @@ def dbRow_photoFullPath(i_row):
 
 import zipfile
 g_zipFiles = {}
+# Images may be loaded on background threads,
+# and the ZipFile objects must not be read from by more than one at a time
+g_zipFilesLock = threading.Lock()
 
 def getZipMemberBytes(i_zipFilePath, i_memberPath):
     """
@@ -574,12 +1000,13 @@ def getZipMemberBytes(i_zipFilePath, i_memberPath):
     # If zip file isn't already open,
     # open it
     global g_zipFiles
-    if i_zipFilePath not in g_zipFiles:
-        g_zipFiles[i_zipFilePath] = zipfile.ZipFile(i_zipFilePath, "r")
+    with g_zipFilesLock:
+        if i_zipFilePath not in g_zipFiles:
+            g_zipFiles[i_zipFilePath] = zipfile.ZipFile(i_zipFilePath, "r")
 
-    #
-    zipFile = g_zipFiles[i_zipFilePath]
+        #
+        zipFile = g_zipFiles[i_zipFilePath]
 
-    return zipFile.read(i_memberPath)
+        return zipFile.read(i_memberPath)
 
 # + }}}
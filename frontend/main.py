@@ -37,6 +37,17 @@ import gamebase
 import adapter_manager
 
 
+# Load frontend configuration settings
+settings.loadPreferences()
+settings.loadViewSettings()
+
+# If wanted, start the worker processes for sharded queries now,
+# while no gamebases are open, and before the Qt application is created
+# since that can start threads of its own (eg. the xcb platform's event reader)
+# that the workers could inherit locks from
+if settings.preferences.get("shardedQueries", False) and db.canExecuteShards():
+    db.startShardProcessPool()
+
 # Create a Qt application
 # (or reuse old one if it already exists; ie. when re-running in REPL during development)
 # and do this before parsing the command line in order for it to filter Qt-specific arguments out
@@ -68,6 +79,11 @@ Options:
  --help
   Show this help.
 
+ --warm-thumbnail-cache
+  Open the given Gamebases, load and scale the screenshots and photos for every
+  game as they would appear in the table with the saved column layout, store
+  them in the thumbnail cache, and then exit.
+
  --synchronous-running
   Run external tasks synchronously.
   Normally, while an emulator, image viewer or some other launched program is
@@ -81,6 +97,7 @@ Options:
 #
 param_gamebaseAdapterFilePaths = []
 param_synchronousRunning = False
+param_warmThumbnailCache = False
 
 import sys
 argNo = 1
@@ -94,6 +111,9 @@ while argNo < len(filteredArgv):
             printUsage(sys.stdout)
             sys.exit(0)
 
+        elif arg == "--warm-thumbnail-cache":
+            param_warmThumbnailCache = True
+
         elif arg == "--synchronous-running":
             param_synchronousRunning = True
             utils.Task.synchronous = True
@@ -112,10 +132,6 @@ while argNo < len(filteredArgv):
 
 
 
-# Load frontend configuration settings
-settings.loadPreferences()
-settings.loadViewSettings()
-
 # If application stylesheet wasn't already set (via command line)
 # and there's one specified in the preferences,
 # activate it
@@ -128,6 +144,52 @@ if application.styleSheet() == "" and "applicationStylesheet" in settings.prefer
 g_filterHistory = [{ "scrollPosition": (0, 0), "selectionPosition": (0, 0), "sqlWhereExpression": ""}]
 g_filterHistory_pos = 1
 
+# Each history entry can also keep the game list rows it last showed,
+# in "queryResult" (game_table_view.QueryResult),
+# so that going back or forward to it doesn't need to query the gamebases again.
+# "queryResultUseNo" records when the entry's rows were last kept or shown,
+# and the least recently used rows are dropped first when they don't all fit in the memory budget.
+g_filterHistory_queryResultUseCount = 0
+
+def filterHistory_keepQueryResult(io_entry):
+    """
+    Keep the rows currently shown in the game table view in a history entry,
+    then drop the rows kept in other entries, least recently used first,
+    until they all fit in the memory budget.
+
+    Params:
+     io_entry:
+      (dict)
+      History entry that the rows are of.
+    """
+    global g_filterHistory_queryResultUseCount
+
+    budgetBytes = settings.preferences.get("filterHistoryCacheSizeMb", 64) * 1024 * 1024
+
+    queryResult = tableView.getQueryResult()
+    if queryResult == None or queryResult["sizeBytes"] > budgetBytes:
+        io_entry.pop("queryResult", None)
+    else:
+        g_filterHistory_queryResultUseCount += 1
+        io_entry["queryResult"] = queryResult
+        io_entry["queryResultUseNo"] = g_filterHistory_queryResultUseCount
+
+    # Get the entries that have rows, most recently used first,
+    # and keep as many as fit
+    # (counting rows that are shared by more than one entry only once)
+    entriesWithResults = [entry  for entry in g_filterHistory  if "queryResult" in entry]
+    entriesWithResults.sort(key=lambda entry: entry["queryResultUseNo"], reverse=True)
+    keptRowsIds = set()
+    totalBytes = 0
+    for entry in entriesWithResults:
+        if id(entry["queryResult"]["rows"]) in keptRowsIds:
+            continue
+        totalBytes += entry["queryResult"]["sizeBytes"]
+        if totalBytes > budgetBytes:
+            del(entry["queryResult"])
+        else:
+            keptRowsIds.add(id(entry["queryResult"]["rows"]))
+
 def filterHistory_add(i_initialScrollPosition, i_initialSelectionPosition, i_initialTableColumns, i_initialSortOperations,
                       i_newSqlWhereExpression):
     """
@@ -172,11 +234,19 @@ def filterHistory_add(i_initialScrollPosition, i_initialSelectionPosition, i_ini
         "sqlWhereExpression": i_newSqlWhereExpression
     })
     g_filterHistory_pos += 1
+    filterHistory_keepQueryResult(g_filterHistory[g_filterHistory_pos - 1])
 
     # Update back/forward toolbar buttons
     toolbar_back_toolButton.setEnabled(True)
     toolbar_forward_toolButton.setEnabled(False)
 
+def updateFilterHistoryButtons():
+    """
+    Enable the back/forward toolbar buttons according to the current position in the filter history.
+    """
+    toolbar_back_toolButton.setEnabled(g_filterHistory_pos > 1)
+    toolbar_forward_toolButton.setEnabled(g_filterHistory_pos < len(g_filterHistory))
+
 g_setScrollPositionTimer = QTimer()
 def filterHistory_goBack():
     global g_filterHistory_pos
@@ -197,6 +267,7 @@ def filterHistory_goBack():
     movingFromEntry["selectionPosition"] = tableView.getSelectedCellNo()
     movingFromEntry["tableColumns"] = columns.tableColumn_getAll()
     movingFromEntry["sortOperations"] = columnNameBar.sort_operations
+    filterHistory_keepQueryResult(movingFromEntry)
 
     # Set text in UI
     if sqlFilterBar.isVisible():
@@ -221,8 +292,12 @@ def filterHistory_goBack():
     columnFilterBar.recreateWidgets()
     columnFilterBar.repositionFilterEdits()
     columnFilterBar.repositionTabOrder()
-    #  Refilter
-    tableView.refilter(movingToEntry["sqlWhereExpression"], columnNameBar.sort_operations)
+    #  Refilter, reusing the rows last shown for the entry if the columns and gamebases are still the same
+    #  (and if another refilter superseded this one while it was querying, leave the table and history to that)
+    if not tableView.refilter(movingToEntry["sqlWhereExpression"], columnNameBar.sort_operations, movingToEntry.get("queryResult")):
+        updateFilterHistoryButtons()
+        return
+    filterHistory_keepQueryResult(movingToEntry)
     #
     tableView.resizeAllColumns([column["width"]  for column in columns.tableColumn_getBySlice()])
     #  Restore selection/scroll positions
@@ -236,8 +311,7 @@ def filterHistory_goBack():
     g_setScrollPositionTimer.start()
 
     # Update back/forward toolbar buttons
-    toolbar_back_toolButton.setEnabled(g_filterHistory_pos > 1)
-    toolbar_forward_toolButton.setEnabled(True)
+    updateFilterHistoryButtons()
 
 def filterHistory_goForward():
     global g_filterHistory_pos
@@ -258,6 +332,7 @@ def filterHistory_goForward():
     movingFromEntry["selectionPosition"] = tableView.getSelectedCellNo()
     movingFromEntry["tableColumns"] = columns.tableColumn_getAll()
     movingFromEntry["sortOperations"] = columnNameBar.sort_operations
+    filterHistory_keepQueryResult(movingFromEntry)
 
     # Set text in UI
     if sqlFilterBar.isVisible():
@@ -282,8 +357,12 @@ def filterHistory_goForward():
     columnFilterBar.recreateWidgets()
     columnFilterBar.repositionFilterEdits()
     columnFilterBar.repositionTabOrder()
-    #  Refilter
-    tableView.refilter(movingToEntry["sqlWhereExpression"], columnNameBar.sort_operations)
+    #  Refilter, reusing the rows last shown for the entry if the columns and gamebases are still the same
+    #  (and if another refilter superseded this one while it was querying, leave the table and history to that)
+    if not tableView.refilter(movingToEntry["sqlWhereExpression"], columnNameBar.sort_operations, movingToEntry.get("queryResult")):
+        updateFilterHistoryButtons()
+        return
+    filterHistory_keepQueryResult(movingToEntry)
     #
     tableView.resizeAllColumns([column["width"]  for column in columns.tableColumn_getBySlice()])
     #  Restore selection/scroll positions
@@ -297,12 +376,11 @@ def filterHistory_goForward():
     g_setScrollPositionTimer.start()
 
     # Update back/forward toolbar buttons
-    toolbar_forward_toolButton.setEnabled(g_filterHistory_pos < len(g_filterHistory))
-    toolbar_back_toolButton.setEnabled(True)
+    updateFilterHistoryButtons()
 
 def filterHistory_copy():
     text = "["
-    text += ",\n ".join([repr(entry)  for entry in g_filterHistory])
+    text += ",\n ".join([repr({key: value  for key, value in entry.items()  if not key.startswith("queryResult")})  for entry in g_filterHistory])
     text += "]"
     QGuiApplication.clipboard().setText(text)
 
@@ -563,7 +641,8 @@ def ctrlDShortcut_onActivated():
         columnFilterBar.repositionTabOrder()
 
     # Refilter table view
-    tableView.refilter(sqlWhereExpression, columnNameBar.sort_operations)
+    if not tableView.refilter(sqlWhereExpression, columnNameBar.sort_operations):
+        return
 
     filterHistory_add(initialScrollPosition, initialSelectionPosition, columns.tableColumn_getAll(), columnNameBar.sort_operations,
                       sqlWhereExpression)
@@ -613,6 +692,10 @@ def filterMenu_filterFormat_copyCompleteSql_onTriggered():
     connectionsAndSqlTexts = tableView.quickGetSql(sqlWhereExpression, columnNameBar.sort_operations)
     print(connectionsAndSqlTexts)
     if len(connectionsAndSqlTexts) > 0:
+        # Note any regular expressions that were replaced with native operators
+        for originalSql, rewrittenSql in sql.sqlWhereExpressionToRegexpRewrites(sqlWhereExpression):
+            text += "\n\n-- Rewrote: " + originalSql.replace("\n", "\\n") + "\n--     as: " + rewrittenSql.replace("\n", "\\n")
+
         text += "\n\n" + "UNION ALL\n".join([connectionsAndSqlText[1]  for connectionsAndSqlText in connectionsAndSqlTexts])
     #print(text)
 
@@ -773,7 +856,9 @@ class TableColumnsMenu(qt_extras.StayOpenMenu):
         selectedColumnNo = tableView.selectionModel().currentIndex().column()
 
         # Requery DB in case filter criteria have changed
-        refilterFromCurrentlyVisibleBar()
+        # (and if another refilter superseded this one while it was querying, leave the table to that)
+        if not refilterFromCurrentlyVisibleBar():
+            return
         tableView.requery()
         #
         tableView.resizeAllColumns([column["width"]  for column in columns.tableColumn_getBySlice()])
@@ -839,6 +924,18 @@ toolbar_forward_toolButton.setEnabled(False)
 toolbar_forward_toolButton.setFixedSize(36, 36)
 toolbar_forward_action2 = toolbar.addWidget(toolbar_forward_toolButton)
 
+toolbar_search_lineEditWithClearButton = qt_extras.LineEditWithClearButton(28)
+toolbar_search_lineEditWithClearButton.lineEdit.setPlaceholderText("Search")
+toolbar_search_lineEditWithClearButton.setToolTip("Words and \"phrases\" to find in game names, credits and comments, as well as the filter")
+toolbar_search_lineEditWithClearButton.setFixedWidth(300)
+toolbar_search_action2 = toolbar.addWidget(toolbar_search_lineEditWithClearButton)
+def toolbar_search_lineEditWithClearButton_onEditingFinished(i_modified):
+    if not i_modified:
+        return
+    tableView.setFullTextSearch(toolbar_search_lineEditWithClearButton.lineEdit.text())
+    refilterFromCurrentlyVisibleBar()
+toolbar_search_lineEditWithClearButton.editingFinished.connect(toolbar_search_lineEditWithClearButton_onEditingFinished)
+
 toolbar.setVisible(settings.viewSettings["toolbarVisible"])
 mainWindow.layout.addWidget(toolbar)
 
@@ -946,12 +1043,17 @@ columnNameBar.sortChanged.connect(columnNameBar_onSortChanged)
 # + }}}
 
 def refilterFromCurrentlyVisibleBar():
+    """
+    Returns:
+     (bool)
+     As returned from GameTableView.refilter().
+    """
     if sqlFilterBar.isVisible():
         sqlWhereExpression = sqlFilterBar.text()
     else:
         sqlWhereExpression = columnFilterBar.getSqlWhereExpression()
 
-    tableView.refilter(sqlWhereExpression, columnNameBar.sort_operations)
+    return tableView.refilter(sqlWhereExpression, columnNameBar.sort_operations)
 
 # + Column filter bar {{{
 
@@ -1055,8 +1157,7 @@ def tableView_onRequestDetailPane(i_withKeyboardAction, i_modelIndex):
     detailPane_show()
     if splitter.orientation() == Qt.Vertical:
         tableView.scrollTo(i_modelIndex, QAbstractItemView.PositionAtTop)
-    gameSchemaName = tableView.dbRows[i_modelIndex.row()][tableView.dbColumnNames.index("SchemaName")]
-    gameId = tableView.dbRows[i_modelIndex.row()][tableView.dbColumnNames.index("Games.GA_Id")]
+    gameSchemaName, gameId = tableView.gameSchemaNameAndIdOnRow(i_modelIndex.row())
     if (gameSchemaName, gameId) != detail_pane.detailPane_currentGameSchemaNameAndId:
         detailPane.populateSG(gameSchemaName, gameId)
     if i_withKeyboardAction and detailPaneWasAlreadyVisible:
@@ -1251,17 +1352,36 @@ for gamebaseAdapterFilePath in param_gamebaseAdapterFilePaths:
 # Set title bar
 def updateTitleBar():
     if len(gamebase.adapters) == 0:
-        mainWindow.setWindowTitle("PyGamebase")
+        title = "PyGamebase"
     elif len(gamebase.adapters) == 1:
         adapterId = next(iter(gamebase.adapters.keys()))
         if hasattr(gamebase.adapters[adapterId]["module"], "config_title"):
-            mainWindow.setWindowTitle(gamebase.adapters[adapterId]["module"].config_title + " - PyGamebase")
+            title = gamebase.adapters[adapterId]["module"].config_title + " - PyGamebase"
         else:
-            mainWindow.setWindowTitle(adapterId + " - PyGamebase")
+            title = adapterId + " - PyGamebase"
     else:
-        mainWindow.setWindowTitle(str(len(gamebase.adapters)) + " gamebases - PyGamebase")
+        title = str(len(gamebase.adapters)) + " gamebases - PyGamebase"
+
+    if db.fullTextIndexesAreBuilding():
+        title += " (building full-text index...)"
+
+    mainWindow.setWindowTitle(title)
 updateTitleBar()
 
+# Attach full-text indexes as they finish building in the background
+# (queries before then fall back to LIKE, and the next one after will use the index)
+g_fullTextIndexesWereBuilding = db.fullTextIndexesAreBuilding()
+def fullTextIndexTimer_onTimeout():
+    global g_fullTextIndexesWereBuilding
+    db.attachBuiltFullTextIndexes()
+    if db.fullTextIndexesAreBuilding() != g_fullTextIndexesWereBuilding:
+        g_fullTextIndexesWereBuilding = not g_fullTextIndexesWereBuilding
+        updateTitleBar()
+fullTextIndexTimer = QTimer()
+fullTextIndexTimer.setInterval(500)
+fullTextIndexTimer.timeout.connect(fullTextIndexTimer_onTimeout)
+fullTextIndexTimer.start()
+
 #
 refilterFromCurrentlyVisibleBar()  # [still here else when opening without a gamebase, next line doesn't resize columns]
 #tableView.requery()
@@ -1272,6 +1392,17 @@ if columns.tableColumn_getById("name") != None:
 
 tableView.selectionModel().setCurrentIndex(tableView.selectionModel().model().index(0, 0), QItemSelectionModel.ClearAndSelect)
 
+# If requested on the command line,
+# fill the thumbnail cache with the images for every game and then exit
+if param_warmThumbnailCache:
+    def warmThumbnailCache_onProgress(i_doneRowCount, i_totalRowCount):
+        sys.stdout.write("\rWarming thumbnail cache: " + str(i_doneRowCount) + "/" + str(i_totalRowCount) + " games")
+        sys.stdout.flush()
+    tableView.prefetchAllImages(warmThumbnailCache_onProgress)
+    sys.stdout.write("\n")
+    tableView.imageLoader.shutdown()
+    sys.exit(0)
+
 # + Subprocess output {{{
 
 class SubprocessOutput(qt_extras.PlainTextViewer):
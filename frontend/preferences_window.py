@@ -1,4 +1,7 @@
 
+# Python std
+import math
+
 # Qt
 from PySide2.QtCore import *
 from PySide2.QtWidgets import *
@@ -7,6 +10,7 @@ from PySide2.QtWebEngineWidgets import *
 
 # This program
 import settings
+import db
 
 
 def makeLabelledEditField(i_label, i_tooltip=None, i_comment=None, i_browseFor=None, i_browseCaption="", i_enabled=True, i_shareWidget=None, i_onEditingFinished=None):
@@ -93,6 +97,144 @@ def makeLabelledEditField(i_label, i_tooltip=None, i_comment=None, i_browseFor=N
     return lineEdit
 
 
+def makeLabelledComboBox(i_label, i_items, i_tooltip=None, i_comment=None, i_shareWidget=None, i_onActivated=None):
+    """
+    Params:
+     i_label:
+      (str)
+     i_items:
+      (list)
+      Each element is:
+       (tuple)
+       Tuple has elements:
+        0:
+         (str)
+         Text to show
+        1:
+         (str)
+         Value to store as the item's user data
+     i_tooltip:
+      Either (str)
+      or (None)
+     i_comment:
+      Either (str)
+      or (None)
+     i_shareWidget:
+      Either (QWidget)
+      or (None)
+     i_onActivated:
+      Either (function)
+      or (None)
+
+    Returns:
+     (QComboBox)
+    """
+    if i_shareWidget:
+        widget = i_shareWidget
+    else:
+        widget = QWidget()
+
+    gridLayout = widget.layout()
+    if gridLayout == None:
+        gridLayout = QGridLayout()
+        gridLayout.setSpacing(2)
+        gridLayout.setContentsMargins(0, 8, 0, 8)
+        widget.setLayout(gridLayout)
+
+    baseRowNo = gridLayout.rowCount()
+
+    label = QLabel(i_label)
+    gridLayout.addWidget(label, baseRowNo, 0)
+    if i_tooltip != None:
+        label.setToolTip(i_tooltip)
+
+    comboBox = QComboBox()
+    for text, value in i_items:
+        comboBox.addItem(text, value)
+    if i_onActivated != None:
+        comboBox.activated.connect(i_onActivated)
+    gridLayout.addWidget(comboBox, baseRowNo, 1)
+    if i_tooltip != None:
+        comboBox.setToolTip(i_tooltip)
+
+    if i_comment != None:
+        gridLayout.addWidget(QLabel(i_comment), baseRowNo + 1, 1)
+
+    return comboBox
+
+
+def makeCheckBox(i_label, i_tooltip=None, i_comment=None, i_shareWidget=None, i_onClicked=None):
+    """
+    Params:
+     i_label:
+      (str)
+     i_tooltip:
+      Either (str)
+      or (None)
+     i_comment:
+      Either (str)
+      or (None)
+     i_shareWidget:
+      Either (QWidget)
+      or (None)
+     i_onClicked:
+      Either (function)
+      or (None)
+
+    Returns:
+     (QCheckBox)
+    """
+    if i_shareWidget:
+        widget = i_shareWidget
+    else:
+        widget = QWidget()
+
+    gridLayout = widget.layout()
+    if gridLayout == None:
+        gridLayout = QGridLayout()
+        gridLayout.setSpacing(2)
+        gridLayout.setContentsMargins(0, 8, 0, 8)
+        widget.setLayout(gridLayout)
+
+    baseRowNo = gridLayout.rowCount()
+
+    checkBox = QCheckBox(i_label)
+    if i_onClicked != None:
+        checkBox.clicked.connect(i_onClicked)
+    gridLayout.addWidget(checkBox, baseRowNo, 0, 1, 2)
+    if i_tooltip != None:
+        checkBox.setToolTip(i_tooltip)
+
+    if i_comment != None:
+        gridLayout.addWidget(QLabel(i_comment), baseRowNo + 1, 1)
+
+    return checkBox
+
+
+def setNumberPreference(i_key, i_text):
+    """
+    Set a numeric preference from the text of an edit field,
+    or if the text isn't a valid number, or is infinite or negative,
+    remove the preference so that the default is used.
+
+    Params:
+     i_key:
+      (str)
+     i_text:
+      (str)
+    """
+    try:
+        value = float(i_text)
+        if not math.isfinite(value) or value < 0:
+            raise ValueError("not a finite non-negative number")
+        if value == int(value):
+            value = int(value)
+        settings.preferences[i_key] = value
+    except (ValueError, OverflowError):
+        if i_key in settings.preferences:
+            del(settings.preferences[i_key])
+
+
 class PreferencesWindow(QWidget):
     def __init__(self):
         QWidget.__init__(self)
@@ -124,6 +266,44 @@ class PreferencesWindow(QWidget):
 
         style_vBoxLayout.addStretch()
 
+        # + }}}
+
+        # + Performance {{{
+
+        performance_tabPage_widget = QWidget()
+        tabWidget.addTab(performance_tabPage_widget, "Performance")
+
+        performance_vBoxLayout = QVBoxLayout()
+        performance_tabPage_widget.setLayout(performance_vBoxLayout)
+
+        widget_group = QWidget()
+        # Image cache size
+        self.performance_pixmapCacheSizeMb_lineEdit = makeLabelledEditField("Image cache size (MB): ", i_tooltip="Memory to use for keeping screenshots and photos ready-scaled for the game table", i_shareWidget=widget_group, i_onEditingFinished=self.setting_onEditingFinished)
+        # Thumbnail cache size
+        self.performance_thumbnailCacheSizeMb_lineEdit = makeLabelledEditField("Thumbnail cache size (MB): ", i_tooltip="Disk space to use in the settings directory for keeping screenshots and photos ready-scaled between sessions", i_comment="(0 to disable)", i_shareWidget=widget_group, i_onEditingFinished=self.setting_onEditingFinished)
+        # Filter history cache size
+        self.performance_filterHistoryCacheSizeMb_lineEdit = makeLabelledEditField("Filter history cache size (MB): ", i_tooltip="Memory to use for keeping the game lists of earlier filters, so that going back and forward through them doesn't query the gamebases again", i_comment="(0 to disable)", i_shareWidget=widget_group, i_onEditingFinished=self.setting_onEditingFinished)
+        # Windowed row fetching
+        self.performance_windowedRowFetching_checkBox = makeCheckBox("Fetch game list rows only as they are scrolled to", i_tooltip="Saves memory and time with very large gamebases, at some cost to scrolling speed", i_shareWidget=widget_group, i_onClicked=self.setting_onEditingFinished)
+        # Columnar rows
+        self.performance_columnarRows_checkBox = makeCheckBox("Store game list rows column by column", i_tooltip="Uses much less memory for large game lists, by storing each repeated value (such as a publisher or genre) only once", i_comment="(not used when fetching rows as they are scrolled to)", i_shareWidget=widget_group, i_onClicked=self.setting_onEditingFinished)
+        # Sharded queries
+        self.performance_shardedQueries_checkBox = makeCheckBox("Query each gamebase in a separate process", i_tooltip="Uses more CPU cores for slow filters (such as regular expressions) when several gamebases are open", i_comment="(Linux only; takes effect after restarting; not used when fetching rows as they are scrolled to)", i_shareWidget=widget_group, i_onClicked=self.setting_onEditingFinished)
+        # Full-text index
+        self.performance_fullTextIndex_checkBox = makeCheckBox("Keep a full-text index of each gamebase for the search box and text filters", i_tooltip="Makes searching for words in names, staff and comments, and filtering text columns for 3 or more characters, much faster, using disk space in the settings directory", i_comment="(takes effect when gamebases are next opened)", i_shareWidget=widget_group, i_onClicked=self.setting_onEditingFinished)
+        # Connection profile
+        self.performance_connectionProfile_comboBox = makeLabelledComboBox("Database access: ", [(profile["title"], profileId)  for profileId, profile in db.g_connectionProfiles.items()], i_tooltip="How gamebase databases are opened; read-only access avoids file locking, and memory mapping can speed up queries on large local gamebases", i_shareWidget=widget_group, i_onActivated=self.setting_onEditingFinished)
+        # Memory map size
+        self.performance_connectionMmapSizeMb_lineEdit = makeLabelledEditField("Memory map size (MB): ", i_tooltip="How much of each gamebase database file to access through memory mapping", i_comment="(blank for the database access default; 0 to disable)", i_shareWidget=widget_group, i_onEditingFinished=self.setting_onEditingFinished)
+        # Page cache size
+        self.performance_connectionCacheSizeMb_lineEdit = makeLabelledEditField("Database page cache size (MB): ", i_tooltip="Memory to use for caching pages of each gamebase database file", i_comment="(blank for the database access default; these take effect when gamebases are next opened)", i_shareWidget=widget_group, i_onEditingFinished=self.setting_onEditingFinished)
+        #
+        performance_vBoxLayout.addWidget(widget_group)
+
+        performance_vBoxLayout.addStretch()
+
+        # + }}}
+
         self.closeButton = QPushButton("&Close")
         self.layout.addWidget(self.closeButton, 0, Qt.AlignCenter)
         self.closeButton.clicked.connect(self.close)
@@ -138,10 +318,30 @@ class PreferencesWindow(QWidget):
     def setting_onEditingFinished(self):
         settings.preferences["applicationStylesheet"] = self.style_applicationStylesheet_lineEdit.text()
         settings.preferences["detailPaneStylesheet"] = self.style_detailPaneStylesheet_lineEdit.text()
+        setNumberPreference("pixmapCacheSizeMb", self.performance_pixmapCacheSizeMb_lineEdit.text())
+        setNumberPreference("thumbnailCacheSizeMb", self.performance_thumbnailCacheSizeMb_lineEdit.text())
+        setNumberPreference("filterHistoryCacheSizeMb", self.performance_filterHistoryCacheSizeMb_lineEdit.text())
+        settings.preferences["windowedRowFetching"] = self.performance_windowedRowFetching_checkBox.isChecked()
+        settings.preferences["columnarRows"] = self.performance_columnarRows_checkBox.isChecked()
+        settings.preferences["shardedQueries"] = self.performance_shardedQueries_checkBox.isChecked()
+        settings.preferences["fullTextIndex"] = self.performance_fullTextIndex_checkBox.isChecked()
+        settings.preferences["connectionProfile"] = self.performance_connectionProfile_comboBox.currentData()
+        setNumberPreference("connectionMmapSizeMb", self.performance_connectionMmapSizeMb_lineEdit.text())
+        setNumberPreference("connectionCacheSizeMb", self.performance_connectionCacheSizeMb_lineEdit.text())
         settings.savePreferences()
 
     def show(self):
         self.style_applicationStylesheet_lineEdit.setText(settings.preferences.get("applicationStylesheet", ""))
         self.style_detailPaneStylesheet_lineEdit.setText(settings.preferences.get("detailPaneStylesheet", ""))
+        self.performance_pixmapCacheSizeMb_lineEdit.setText(str(settings.preferences.get("pixmapCacheSizeMb", 128)))
+        self.performance_thumbnailCacheSizeMb_lineEdit.setText(str(settings.preferences.get("thumbnailCacheSizeMb", 512)))
+        self.performance_filterHistoryCacheSizeMb_lineEdit.setText(str(settings.preferences.get("filterHistoryCacheSizeMb", 64)))
+        self.performance_windowedRowFetching_checkBox.setChecked(settings.preferences.get("windowedRowFetching", False))
+        self.performance_columnarRows_checkBox.setChecked(settings.preferences.get("columnarRows", False))
+        self.performance_shardedQueries_checkBox.setChecked(settings.preferences.get("shardedQueries", False))
+        self.performance_fullTextIndex_checkBox.setChecked(settings.preferences.get("fullTextIndex", False))
+        self.performance_connectionProfile_comboBox.setCurrentIndex(max(0, self.performance_connectionProfile_comboBox.findData(settings.preferences.get("connectionProfile", db.g_defaultConnectionProfileId))))
+        self.performance_connectionMmapSizeMb_lineEdit.setText(str(settings.preferences.get("connectionMmapSizeMb", "")))
+        self.performance_connectionCacheSizeMb_lineEdit.setText(str(settings.preferences.get("connectionCacheSizeMb", "")))
         super().show()
         self.resize(800, self.height())
@@ -5,6 +5,8 @@
 import re
 import copy
 import collections
+import functools
+import types
 import pprint
 
 
@@ -21,6 +23,37 @@ class SqlParseError(RuntimeError):
 
 # + Tokenize {{{
 
+# All of the kinds of token, tried in this order at each position.
+# Word-like tokens must be followed by a non-word character (there is always one, because a space is appended to the text),
+# and a string's closing quote must not be followed by another quote, since two together are an escaped quote.
+g_tokenRegex = re.compile(r"""
+     (?P<whitespace>\s+)
+    |(?P<float>[0-9]+\.[0-9]+|[0-9]+\.|\.[0-9]+)
+    |(?P<integer>[0-9]+)(?=[^A-Z0-9_])
+    |(?P<keyword>NULL)(?=[^A-Z0-9_])
+    |(?P<wordOperator>AND|OR|IREGEXP|REGEXP|LIKE|GLOB|MATCH|IS\ NOT|IS|ESCAPE|BETWEEN)(?=[^A-Z0-9_])
+    |(?P<symbolOperator>==|<=|>=|<>|!=|<|>|=|~)
+    |(?P<identifier>".*?"|\[.*?\]|`.*?`|[A-Z0-9_]+)
+    |(?P<dot>\.)
+    |(?P<openParenthesis>\()
+    |(?P<closeParenthesis>\))
+    |(?P<string>'(?:[^']|'')*'(?!'))
+""", re.IGNORECASE | re.VERBOSE)
+
+# Token type to output for each named group of g_tokenRegex
+g_tokenRegexGroupTypes = {
+    "float": "float",
+    "integer": "integer",
+    "keyword": "keyword",
+    "wordOperator": "operator",
+    "symbolOperator": "operator",
+    "identifier": "identifier",
+    "dot": ".",
+    "openParenthesis": "(",
+    "closeParenthesis": ")",
+    "string": "string"
+}
+
 def tokenizeWhereExpr(i_text):
     """
     Params:
@@ -59,100 +92,23 @@ def tokenizeWhereExpr(i_text):
        (str)
        Description of error.
     """
+    textLength = len(i_text)
     i_text += " "
 
     tokens = []
     textPos = 0
-    while textPos < len(i_text) - 1:
-        match = re.match(r"\s+", i_text[textPos:])
-        if match:
-            textPos += match.end(0)
-            continue
-
-        match = re.match(r"([0-9]+\.[0-9]+|[0-9]+\.|\.[0-9]+)", i_text[textPos:], re.IGNORECASE)
-        if match:
-            tokens.append(("float", match.group(1), textPos, textPos + match.end(1)))
-            textPos += match.end(1)
-            continue
-
-        match = re.match(r"([0-9]+)[^A-Z0-9_]", i_text[textPos:], re.IGNORECASE)
-        if match:
-            tokens.append(("integer", match.group(1), textPos, textPos + match.end(1)))
-            textPos += match.end(1)
-            continue
-
-        match = re.match(r"(NULL)[^A-Z0-9_]", i_text[textPos:], re.IGNORECASE)
-        if match:
-            tokens.append(("keyword", match.group(1), textPos, textPos + match.end(1)))
-            textPos += match.end(1)
-            continue
-
-        match = re.match(r"(AND|OR)[^A-Z0-9_]", i_text[textPos:], re.IGNORECASE)
-        if match:
-            tokens.append(("operator", match.group(1), textPos, textPos + match.end(1)))
-            textPos += match.end(1)
-            continue
-
-        match = re.match(r"(REGEXP|LIKE|IS NOT|IS|ESCAPE|BETWEEN)[^A-Z0-9_]", i_text[textPos:], re.IGNORECASE)
-        if match:
-            tokens.append(("operator", match.group(1), textPos, textPos + match.end(1)))
-            textPos += match.end(1)
-            continue
-
-        #match = re.match(r"(<=|>=|<|>|==|=|!=|<>|~)[^<>=!~]", i_text[textPos:])
-        match = re.match(r"(==|<=|>=|<>|!=|<|>|=|~)", i_text[textPos:])
-        if match:
-            tokens.append(("operator", match.group(1), textPos, textPos + match.end(1)))
-            textPos += match.end(1)
-            continue
-
-        match = re.match(r'(".*?"|\[.*?\]|`.*?`|[A-Z0-9_]+)', i_text[textPos:], re.IGNORECASE)
-        if match:
-            tokens.append(("identifier", match.group(1), textPos, textPos + match.end(1)))
-            textPos += match.end(1)
-            continue
-
-        match = re.match(r"\.", i_text[textPos:])
-        if match:
-            tokens.append((".", match.group(0), textPos, textPos + match.end(0)))
-            textPos += match.end(0)
-            continue
-
-        match = re.match(r"\(", i_text[textPos:])
-        if match:
-            tokens.append(("(", match.group(0), textPos, textPos + match.end(0)))
-            textPos += match.end(0)
-            continue
-
-        match = re.match(r"\)", i_text[textPos:])
-        if match:
-            tokens.append((")", match.group(0), textPos, textPos + match.end(0)))
-            textPos += match.end(0)
-            continue
-
-        if i_text[textPos] == "'":
-            endPos = textPos + 1
-            while endPos < len(i_text) - 1:
-                # If found a quote
-                if i_text[endPos] == "'":
-                    # If there's another one after it,
-                    # it's a escaped quote so skip them both
-                    if endPos + 1 < len(i_text) - 1 and i_text[endPos + 1] == "'":
-                        endPos += 2
-                    # Else if there isn't another one after it,
-                    # it's a closing quote
-                    else:
-                        break
-                else:
-                    endPos += 1
-            if i_text[endPos] != "'":
-                raise SqlParseError("Syntax error at position " + str(endPos) + ": couldn't find end of string")
-            endPos += 1
-            tokens.append(("string", i_text[textPos:endPos], textPos, endPos))
-            textPos = endPos
-            continue
-
-        raise SqlParseError("Unrecognized token at pos: " + str(textPos))
+    matchToken = g_tokenRegex.match
+    while textPos < textLength:
+        match = matchToken(i_text, textPos)
+        if match == None:
+            if i_text[textPos] == "'":
+                raise SqlParseError("Syntax error at position " + str(textLength) + ": couldn't find end of string")
+            raise SqlParseError("Unrecognized token at pos: " + str(textPos))
+
+        groupName = match.lastgroup
+        if groupName != "whitespace":
+            tokens.append((g_tokenRegexGroupTypes[groupName], match.group(groupName), textPos, match.end(groupName)))
+        textPos = match.end(groupName)
 
     return tokens
 
@@ -162,12 +118,9 @@ def tokenizeWhereExpr(i_text):
 
 # + Parse {{{
 
-def parseOperatorBetween_onStart(i_tokens):
-    operators["AND"]["precedence"] += 3
-def parseOperatorBetween_onEnd(i_tokens):
-    operators["AND"]["precedence"] -= 3
-
-initialOperators = {
+# The operators that can be parsed, with their properties.
+# This is read-only and shared by all parsers.
+operators = {
     "ESCAPE": { "precedence": 6, "operands": 2 },
     "<=": { "precedence": 5, "operands": 2 },
     ">=": { "precedence": 5, "operands": 2 },
@@ -178,18 +131,18 @@ initialOperators = {
     "!=": { "precedence": 5, "operands": 2 },
     "<>": { "precedence": 5, "operands": 2 },
     "~": { "precedence": 5, "operands": 2 },
-    "BETWEEN": { "precedence": 5, "operands": 2, "onStart": parseOperatorBetween_onStart, "onEnd": parseOperatorBetween_onEnd },
+    "BETWEEN": { "precedence": 5, "operands": 2 },
     "REGEXP": { "precedence": 5, "operands": 2 },
+    "IREGEXP": { "precedence": 5, "operands": 2 },
     "LIKE": { "precedence": 5, "operands": 2 },
+    "GLOB": { "precedence": 5, "operands": 2 },
+    "MATCH": { "precedence": 5, "operands": 2 },
     "IS": { "precedence": 5, "operands": 2 },
     "IS NOT": { "precedence": 5, "operands": 2 },
     "AND": { "precedence": 3, "operands": 2 },
     "OR": { "precedence": 2, "operands": 2 },
 }
-
-def initializeOperatorTable():
-    global operators
-    operators = copy.deepcopy(initialOperators)
+operators = types.MappingProxyType({operatorName: types.MappingProxyType(operatorProperties)  for operatorName, operatorProperties in operators.items()})
 
 class AstNode():
     def __init__(self, i_token):
@@ -265,24 +218,18 @@ class OperatorNode(AstNode):
         Returns:
          (str)
         """
-        return "(" + (" " + self.operation + " ").join([operand.toSqlString()  for operand in self.operands]) + ")"
+        # SQLite only has operator syntax for REGEXP (which calls our REGEXP(pattern, value) function),
+        # so call the case-insensitive variant as a function
+        if self.operation == "IREGEXP":
+            return "IREGEXP(" + self.operands[1].toSqlString() + ", " + self.operands[0].toSqlString() + ")"
+        # ESCAPE is part of the syntax of LIKE, and can't be parenthesized on its own
+        if self.operation == "ESCAPE":
+            return self.operands[0].toSqlString() + " ESCAPE " + self.operands[1].toSqlString()
+        # The AND that joins the range of a BETWEEN likewise can't be parenthesized
+        if self.operation == "BETWEEN" and isinstance(self.operands[1], OperatorNode) and self.operands[1].operation == "AND":
+            return "(" + self.operands[0].toSqlString() + " BETWEEN " + self.operands[1].operands[0].toSqlString() + " AND " + self.operands[1].operands[1].toSqlString() + ")"
 
-def parseExpression(i_tokens):
-    """
-    Params:
-     i_tokens:
-      (list)
-
-    Returns:
-     Either (AstNode)
-      Root node of syntax tree
-     or raise exception (SqlParseError)
-      args[0]:
-       (str)
-       Description of error.
-    """
-    lhs = parseValue(i_tokens)
-    return parseOperations(lhs, i_tokens, 0)
+        return "(" + (" " + self.operation + " ").join([operand.toSqlString()  for operand in self.operands]) + ")"
 
 def unquoteString(i_str):
     """
@@ -314,11 +261,193 @@ def unquoteIdentifier(i_str):
 
     return i_str[1:-1]
 
-def parseValue(i_tokens):
+class WhereExprParser():
+    """
+    Parses a list of tokens into a syntax tree.
+
+    A parser keeps all of its state to itself,
+    so separate parsers can be used at the same time on different threads.
+    """
+
+    def __init__(self, i_tokens):
+        """
+        Params:
+         i_tokens:
+          (list)
+          As returned from tokenizeWhereExpr().
+        """
+        self.tokens = i_tokens
+        self.tokenNo = 0
+        # Position of the next token to read in self.tokens
+
+    def remainingTokenCount(self):
+        """
+        Returns:
+         (int)
+        """
+        return len(self.tokens) - self.tokenNo
+
+    def operatorPrecedence(self, i_operation):
+        """
+        Params:
+         i_operation:
+          (str)
+          Operator name.
+
+        Returns:
+         (int)
+        """
+        return operators[i_operation]["precedence"]
+
+    def parseExpression(self):
+        """
+        Returns:
+         Either (AstNode)
+          Root node of syntax tree
+         or raise exception (SqlParseError)
+          args[0]:
+           (str)
+           Description of error.
+        """
+        lhs = self.parseValue()
+        return self.parseOperations(lhs, 0)
+
+    def parseValue(self):
+        """
+        Returns:
+         Either (AstNode)
+          Root node of syntax tree
+         or raise exception (SqlParseError)
+          args[0]:
+           (str)
+           Description of error.
+        """
+        if self.remainingTokenCount() == 0:
+            raise SqlParseError("Syntax error: unexpected end of input")
+        token = self.tokens[self.tokenNo]
+        self.tokenNo += 1
+        if token[0] == "operator":
+            raise SqlParseError("Syntax error at position " + str(token[2]) + ": unexpected operator")
+        elif token[0] == ")":
+            raise SqlParseError("Syntax error at position " + str(token[2]) + ": unexpected close parenthesis")
+        elif token[0] == "(":
+            # Parse subexpression
+            subParse = self.parseExpression()
+            # Validate presence of closing parenthesis
+            # and skip over it
+            if not (self.remainingTokenCount() > 0 and self.tokens[self.tokenNo][0] == ")"):
+                raise SqlParseError("Syntax error at position " + str(token[2]) + ": unclosed parenthesis")
+            self.tokenNo += 1
+            return subParse
+        elif token[0] == "integer":
+            return ValueNode(token, "integer", int(token[1]))
+        elif token[0] == "float":
+            return ValueNode(token, "float", float(token[1]))
+        elif token[0] == "keyword":
+            return ValueNode(token, "keyword", token[1])
+        elif token[0] == "identifier":
+            valueNode = ValueNode(token, "identifier", unquoteIdentifier(token[1]))
+            # TODO store parsed sub-identifiers as arrays
+            while self.remainingTokenCount() >= 2 and self.tokens[self.tokenNo][0] == "." and self.tokens[self.tokenNo + 1][0] == "identifier":
+                token = self.tokens[self.tokenNo + 1]
+                self.tokenNo += 2
+                valueNode.value += "." + unquoteIdentifier(token[1])
+            return valueNode
+        elif token[0] == "string":
+            return ValueNode(token, "string", unquoteString(token[1]))
+
+    def parseOperations(self, i_lhs, i_precedingPrecedence):
+        # If no more tokens
+        # or if next operator is of equal precedence or a step down from what caller had,
+        # return to caller so they can bind
+        while self.remainingTokenCount() > 0:
+            if self.tokens[self.tokenNo][0] != "operator":
+                # syntax error
+                break
+
+            op1 = OperatorNode(self.tokens[self.tokenNo])
+            op1Precedence = self.operatorPrecedence(op1.operation)
+            if op1Precedence <= i_precedingPrecedence:
+                break
+
+            # Else if next operator is of higher precedence than what caller had,
+            # get it and next value and recurse
+            self.tokenNo += 1
+            if op1.operation == "BETWEEN":
+                rhs = self.parseBetweenRange(op1Precedence)
+            else:
+                rhs = self.parseValue()
+                rhs = self.parseOperations(rhs, op1Precedence)
+
+            # Bind
+            op1.operands = [i_lhs, rhs]
+            i_lhs = op1
+
+        return i_lhs
+
+    def parseBetweenRange(self, i_betweenPrecedence):
+        """
+        Parse the '<low> AND <high>' that follows a BETWEEN,
+        where that AND binds the two values together rather than being a logical AND.
+
+        Params:
+         i_betweenPrecedence:
+          (int)
+
+        Returns:
+         Either (OperatorNode)
+          An "AND" operator whose operands are the low and high values.
+         or raise exception (SqlParseError)
+          args[0]:
+           (str)
+           Description of error.
+        """
+        low = self.parseOperations(self.parseValue(), i_betweenPrecedence)
+
+        if not (self.remainingTokenCount() > 0 and self.tokens[self.tokenNo][0] == "operator" and self.tokens[self.tokenNo][1].upper() == "AND"):
+            raise SqlParseError("Syntax error: BETWEEN without AND")
+        rangeNode = OperatorNode(self.tokens[self.tokenNo])
+        self.tokenNo += 1
+
+        high = self.parseOperations(self.parseValue(), i_betweenPrecedence)
+
+        rangeNode.operands = [low, high]
+        return rangeNode
+
+class SqlNode(AstNode):
+    """
+    A node standing for some ready-made SQL,
+    for when a part of an expression is replaced with something that the parser itself can't express.
+    """
+    def __init__(self, i_token, i_sql):
+        """
+        Params:
+         i_token:
+          (tuple)
+          The token of the node that this replaces.
+         i_sql:
+          (str)
+        """
+        super().__init__(i_token)
+
+        self.sql = i_sql
+
+    def __repr__(self):
+        return "S:" + self.sql
+
+    def toSqlString(self):
+        """
+        Returns:
+         (str)
+        """
+        return "(" + self.sql + ")"
+
+def parseExpression(i_tokens):
     """
     Params:
      i_tokens:
       (list)
+      As returned from tokenizeWhereExpr().
 
     Returns:
      Either (AstNode)
@@ -328,72 +457,34 @@ def parseValue(i_tokens):
        (str)
        Description of error.
     """
-    if len(i_tokens) == 0:
-        raise SqlParseError("Syntax error: unexpected end of input")
-    token = i_tokens.pop(0)
-    if token[0] == "operator":
-        raise SqlParseError("Syntax error at position " + str(token[2]) + ": unexpected operator")
-    elif token[0] == ")":
-        raise SqlParseError("Syntax error at position " + str(token[2]) + ": unexpected close parenthesis")
-    elif token[0] == "(":
-        # Parse subexpression
-        subParse = parseExpression(i_tokens)
-        # Validate presence of closing parenthesis
-        # and skip over it
-        if not (len(i_tokens) > 0 and i_tokens[0][0] == ")"):
-            raise SqlParseError("Syntax error at position " + str(token[2]) + ": unclosed parenthesis")
-        i_tokens.pop(0)
-        return subParse
-    elif token[0] == "integer":
-        return ValueNode(token, "integer", int(token[1]))
-    elif token[0] == "float":
-        return ValueNode(token, "float", float(token[1]))
-    elif token[0] == "keyword":
-        return ValueNode(token, "keyword", token[1])
-    elif token[0] == "identifier":
-        valueNode = ValueNode(token, "identifier", unquoteIdentifier(token[1]))
-        # TODO store parsed sub-identifiers as arrays
-        while len(i_tokens) >= 2 and i_tokens[0][0] == "." and i_tokens[1][0] == "identifier":
-            token = i_tokens.pop(0)
-            token = i_tokens.pop(0)
-            valueNode.value += "." + unquoteIdentifier(token[1])
-        return valueNode
-    elif token[0] == "string":
-        return ValueNode(token, "string", unquoteString(token[1]))
-
-def parseOperations(i_lhs, i_tokens, i_precedingPrecedence):
-    # If no more tokens
-    # or if next operator is of equal precedence or a step down from what caller had,
-    # return to caller so they can bind
-    while len(i_tokens) > 0:
-        if i_tokens[0][0] != "operator":
-            # syntax error
-            break
-        
-        op1 = OperatorNode(i_tokens[0])
-        op1Precedence = operators[op1.operation]["precedence"]
-        if op1Precedence <= i_precedingPrecedence:
-            break
-
-        #
-        if "onStart" in operators[op1.operation]:
-            operators[op1.operation]["onStart"](i_tokens)
-
-        # Else if next operator is of higher precedence than what caller had,
-        # get it and next value and recurse
-        i_tokens.pop(0)
-        rhs = parseValue(i_tokens)
-        rhs = parseOperations(rhs, i_tokens, op1Precedence)
+    return WhereExprParser(i_tokens).parseExpression()
 
-        #
-        if "onEnd" in operators[op1.operation]:
-            operators[op1.operation]["onEnd"](i_tokens)
+@functools.lru_cache(maxsize=128)
+def parseWhereExpr(i_whereExpression):
+    """
+    Tokenize and parse a WHERE expression,
+    reusing the result of an earlier call with the same text if there was one.
 
-        # Bind
-        op1.operands = [i_lhs, rhs]
-        i_lhs = op1
+    Params:
+     i_whereExpression:
+      (str)
 
-    return i_lhs
+    Returns:
+     Either (AstNode)
+      Root node of syntax tree.
+      This is shared with other callers so shouldn't be modified;
+      copy nodes to change them, as flattenOperator() does.
+     or (None)
+      i_whereExpression was empty.
+     or raise exception (SqlParseError)
+      args[0]:
+       (str)
+       Description of error.
+    """
+    tokenized = tokenizeWhereExpr(i_whereExpression)
+    if len(tokenized) == 0:
+        return None
+    return parseExpression(tokenized)
 
 # + }}}
 
@@ -438,7 +529,6 @@ def flattenOperator(i_node, i_operatorName):
     newNode.operands = newOperands
     return newNode
 
-#initializeOperatorTable()
 #parsed = parseExpression(tokenized)
 #import pdb
 #pdb.run("parseExpression(tokenized)")
@@ -507,7 +597,7 @@ def interpretColumnOperation(i_node):
             # If it's an 'AND' operator beneath a 'BETWEEN',
             # assemble the two values with a tilde between them
             elif operation == "BETWEEN" and child.operation == "AND":
-                value = child.operands[0].value + "~" + child.operands[1].value
+                value = str(child.operands[0].value) + "~" + str(child.operands[1].value)
             # If it's some other child operator,
             # don't know how to deal with this so far
             else:
@@ -567,11 +657,9 @@ def sqlWhereExpressionToColumnFilters(i_whereExpression, i_skipFailures=False, i
       Perhaps it is too complex for that UI, too complex for the simple SQL parser, etc.
     """
     # Tokenize, parse and postprocess WHERE expression
-    tokenized = tokenizeWhereExpr(i_whereExpression)
-    if len(tokenized) == 0:
+    parsed = parseWhereExpr(i_whereExpression)
+    if parsed == None:
         return []
-    initializeOperatorTable()
-    parsed = parseExpression(tokenized)
     #print(parsed)
     parsed = flattenOperator(parsed, "AND")
     parsed = flattenOperator(parsed, "OR")
@@ -630,6 +718,8 @@ def sqlWhereExpressionToColumnFilters(i_whereExpression, i_skipFailures=False, i
                         widgetText = strValue
                 elif operator == "REGEXP":
                     widgetText = "/" + strValue + "/"
+                elif operator == "IREGEXP":
+                    widgetText = "/" + strValue + "/i"
                 elif operator == "BETWEEN":
                     widgetText = strValue
                 elif operator == "IS":
@@ -675,11 +765,9 @@ def sqlWhereExpressionToColumnIdentifiers(i_whereExpression):
      (list of str)
     """
     # Tokenize and parse WHERE expression
-    tokenized = tokenizeWhereExpr(i_whereExpression)
-    if len(tokenized) == 0:
+    parsed = parseWhereExpr(i_whereExpression)
+    if parsed == None:
         return []
-    initializeOperatorTable()
-    parsed = parseExpression(tokenized)
     #print(parsed)
 
     # Collect and return column identifiers
@@ -734,54 +822,87 @@ def normalizeSqlWhereExpressionToTableNamesAndSelectTerms(i_whereExpression, i_s
        Description of error.
     """
     # Tokenize and parse WHERE expression
-    tokenized = tokenizeWhereExpr(i_whereExpression)
-    if len(tokenized) == 0:
+    parsed = parseWhereExpr(i_whereExpression)
+    if parsed == None:
         return None, None, None
-    initializeOperatorTable()
-    parsed = parseExpression(tokenized)
 
     # Collect and return column identifiers
-    def normalizeIdentifiersAndCollectTableNamesAndSelectTerms(i_schemaName, io_node):
+    def normalizeIdentifiersAndCollectTableNamesAndSelectTerms(i_schemaName, i_node, i_onlyTruthMatters):
         """
         Params:
          i_schemaName:
           (str)
-         io_node:
-          (dict)
+         i_node:
+          (AstNode)
+         i_onlyTruthMatters:
+          (bool)
+          True: i_node is reached from the top of the expression only through ANDs and ORs,
+           so it only matters whether it's true, not whether it's false or NULL.
 
         Returns:
-         Function return value:
-          (tuple)
-          Tuple has elements:
-           0:
-            (list)
-            Table names
-           1:
-            (list)
-            SQL SELECT terms
-         io_node:
-          Identifier names may be modified
+         (tuple)
+         Tuple has elements:
+          0:
+           (AstNode)
+           i_node, or if any identifier names beneath it were normalized, a copy of it with those changes
+          1:
+           (list)
+           Table names
+          2:
+           (list)
+           SQL SELECT terms
         """
         neededTableNames = collections.OrderedDict()
         neededSelectTerms = collections.OrderedDict()
 
-        if isinstance(io_node, OperatorNode):
-            for operand in io_node.operands:
-                newNeededTableNames, newNeededSelectTerms = normalizeIdentifiersAndCollectTableNamesAndSelectTerms(i_schemaName, operand)
+        # If it's a full-text search,
+        # replace it with the SQL that does the search in this database
+        if isinstance(i_node, OperatorNode) and i_node.operation == "MATCH":
+            tableOperand, searchOperand = i_node.operands
+            if not (isinstance(tableOperand, ValueNode) and tableOperand.type == "identifier" and tableOperand.value.upper() == "GAMES" and \
+                    isinstance(searchOperand, ValueNode) and searchOperand.type == "string"):
+                raise SqlParseError("Syntax error at position " + str(i_node.token[2]) + ": MATCH must be used as Games MATCH 'search words'")
+            matchSql, matchTableNames = db.getFullTextMatchSqlAndTableNames(i_schemaName, searchOperand.value)
+            return SqlNode(i_node.token, matchSql), matchTableNames, []
+
+        # If it's a LIKE of a column against a literal pattern,
+        # try to replace it with SQL that finds the matches from a trigram index
+        if isinstance(i_node, OperatorNode) and i_node.operation == "LIKE":
+            valueOperand, patternOperand = i_node.operands
+            if isinstance(valueOperand, ValueNode) and valueOperand.type == "identifier" and \
+               isinstance(patternOperand, ValueNode) and patternOperand.type == "string":
+                tableColumnSpecs = columns.tableColumnSpec_getByDbIdentifier(valueOperand.value, True)
+                if len(tableColumnSpecs) > 0:
+                    trigramSql = db.getTrigramLikeSql(i_schemaName, tableColumnSpecs[0], patternOperand.value, i_onlyTruthMatters)
+                    if trigramSql != None:
+                        return SqlNode(i_node.token, trigramSql), db.tableColumnSpecToTableNamesAndSelectTerms(tableColumnSpecs[0], i_schemaName)[0], []
+
+        if isinstance(i_node, OperatorNode):
+            operandsOnlyTruthMatters = i_onlyTruthMatters and (i_node.operation == "AND" or i_node.operation == "OR")
+            newOperands = []
+            for operand in i_node.operands:
+                newOperand, newNeededTableNames, newNeededSelectTerms = normalizeIdentifiersAndCollectTableNamesAndSelectTerms(i_schemaName, operand, operandsOnlyTruthMatters)
+                newOperands.append(newOperand)
                 for newNeededTableName in newNeededTableNames:
                     neededTableNames[newNeededTableName] = True
                 for newNeededSelectTerm in newNeededSelectTerms:
                     neededSelectTerms[newNeededSelectTerm] = True
+            # If any operands were changed,
+            # copy this node to hold them, leaving the original (which may be shared) untouched
+            if newOperands != i_node.operands:
+                i_node = copy.copy(i_node)
+                i_node.operands = newOperands
         else: # isinstance(child, ValueNode):
-            if io_node.type == "identifier":
+            if i_node.type == "identifier":
                 # If recognize the column,
-                # normalize the identifier, modifying the node
-                tableColumnSpecs = columns.tableColumnSpec_getByDbIdentifier(io_node.value, True)
+                # normalize the identifier in a copy of the node
+                tableColumnSpecs = columns.tableColumnSpec_getByDbIdentifier(i_node.value, True)
                 if len(tableColumnSpecs) > 0:
                     tableColumnSpec = tableColumnSpecs[0]
 
                     # Normalize identifier name in the parsed SQL
-                    io_node.value = '"' + tableColumnSpec["dbIdentifiers"][0] + '"'
+                    i_node = copy.copy(i_node)
+                    i_node.value = '"' + tableColumnSpec["dbIdentifiers"][0] + '"'
                     # Collect needed FROM and SELECT terms
                     newNeededTableNames, newNeededSelectTerms = db.tableColumnSpecToTableNamesAndSelectTerms(tableColumnSpec, i_schemaName)
                     for newNeededTableName in newNeededTableNames:
@@ -789,10 +910,751 @@ def normalizeSqlWhereExpressionToTableNamesAndSelectTerms(i_whereExpression, i_s
                     for newNeededSelectTerm in newNeededSelectTerms:
                         neededSelectTerms[newNeededSelectTerm] = True
 
-        return list(neededTableNames.keys()), list(neededSelectTerms.keys())
+        return i_node, list(neededTableNames.keys()), list(neededSelectTerms.keys())
+
+    normalized, neededTableNames, neededSelectTerms = normalizeIdentifiersAndCollectTableNamesAndSelectTerms(i_schemaName, parsed, True)
+
+    # Replace simple regular expressions with native SQLite operators
+    normalized = rewriteRegexps(normalized)
+
+    return (normalized.toSqlString(), neededTableNames, neededSelectTerms)
+
+# + + }}}
+
+# + + Rewrite regular expressions {{{
+
+# REGEXP and IREGEXP call back into Python for every row,
+# so where a regular expression only uses literal characters, character classes and anchors,
+# it can be replaced with an equivalent GLOB (for REGEXP) or LIKE (for IREGEXP) which SQLite runs natively.
+#
+# Python's "$" also matches just before a newline at the very end of the string,
+# so an anchored end becomes two patterns ORed together, one of them ending with a newline.
+#
+# LIKE only folds the case of ASCII letters whereas Python folds all of Unicode,
+# so IREGEXP is only rewritten when the pattern is all ASCII.
+# (The one remaining difference is that Python also matches "k" and "s" with the Kelvin sign and long s.)
+
+def regexToGlobPatterns(i_regex):
+    """
+    Params:
+     i_regex:
+      (str)
+      A Python regular expression.
+
+    Returns:
+     Either (list of str)
+      GLOB patterns such that a value matches one of them
+      if and only if re.search() would find the regular expression in it.
+     or (None)
+      The regular expression is too complex to express as GLOB patterns.
+    """
+    pos = 0
+    anchoredAtStart = i_regex.startswith("^")
+    if anchoredAtStart:
+        pos += 1
+    anchoredAtEnd = False
+
+    globBody = ""
+    while pos < len(i_regex):
+        char = i_regex[pos]
+
+        if char == "$" and pos == len(i_regex) - 1:
+            anchoredAtEnd = True
+            pos += 1
+        # Escaped punctuation is a literal character
+        elif char == "\\":
+            if pos + 1 >= len(i_regex) or i_regex[pos + 1].isalnum() or i_regex[pos + 1].isspace():
+                return None
+            globBody += globEscapeCharacter(i_regex[pos + 1])
+            pos += 2
+        # Any character except newline
+        elif char == ".":
+            globBody += "[^\n]"
+            pos += 1
+        # Character class
+        elif char == "[":
+            endPos = i_regex.find("]", pos + 1)
+            if endPos == -1:
+                return None
+            globClass = regexClassToGlobClass(i_regex[pos + 1:endPos])
+            if globClass == None:
+                return None
+            globBody += globClass
+            pos = endPos + 1
+        # Anything else that's special,
+        # including quantifiers, alternation and groups, can't be expressed
+        elif char in "*+?{}()|^$]":
+            return None
+        # Else a literal character
+        else:
+            globBody += globEscapeCharacter(char)
+            pos += 1
+
+    if not anchoredAtStart:
+        globBody = "*" + globBody
+    if anchoredAtEnd:
+        return [globBody, globBody + "\n"]
+    else:
+        return [globBody + "*"]
+
+def globEscapeCharacter(i_char):
+    """
+    Params:
+     i_char:
+      (str)
+
+    Returns:
+     (str)
+     A GLOB pattern that matches i_char literally.
+    """
+    if i_char in "*?[":
+        return "[" + i_char + "]"
+    return i_char
+
+def regexClassToGlobClass(i_regexClass):
+    """
+    Params:
+     i_regexClass:
+      (str)
+      The contents of a regular expression character class, without the surrounding brackets.
 
-    neededTableNames, neededSelectTerms = normalizeIdentifiersAndCollectTableNamesAndSelectTerms(i_schemaName, parsed)
-    return (parsed.toSqlString(), neededTableNames, neededSelectTerms)
+    Returns:
+     Either (str)
+      An equivalent GLOB character class, with brackets.
+     or (None)
+      The class uses something that isn't handled.
+    """
+    negated = i_regexClass.startswith("^")
+    if negated:
+        i_regexClass = i_regexClass[1:]
+    if i_regexClass == "":
+        return None
+
+    # Only allow letters, digits and ranges between them,
+    # so that nothing in the class means something different to the two syntaxes
+    pos = 0
+    while pos < len(i_regexClass):
+        if not (i_regexClass[pos].isalnum() and i_regexClass[pos].isascii()):
+            return None
+        if pos + 2 < len(i_regexClass) and i_regexClass[pos + 1] == "-":
+            if not (i_regexClass[pos + 2].isalnum() and i_regexClass[pos + 2].isascii()) or i_regexClass[pos + 2] < i_regexClass[pos]:
+                return None
+            pos += 3
+        else:
+            pos += 1
+
+    return "[" + ("^" if negated else "") + i_regexClass + "]"
+
+def regexToLikePatterns(i_regex):
+    """
+    Params:
+     i_regex:
+      (str)
+      A Python regular expression.
+
+    Returns:
+     Either (tuple)
+      Tuple has elements:
+       0:
+        (list of str)
+        LIKE patterns such that a value matches one of them
+        if and only if re.search() with re.IGNORECASE would find the regular expression in it.
+       1:
+        (bool)
+        True if the patterns use backslash as an escape character.
+     or (None)
+      The regular expression is too complex to express as LIKE patterns.
+    """
+    pos = 0
+    anchoredAtStart = i_regex.startswith("^")
+    if anchoredAtStart:
+        pos += 1
+    anchoredAtEnd = False
+
+    likeBody = ""
+    escaped = False
+    while pos < len(i_regex):
+        char = i_regex[pos]
+
+        if char == "$" and pos == len(i_regex) - 1:
+            anchoredAtEnd = True
+            pos += 1
+            continue
+
+        # Escaped punctuation is a literal character
+        if char == "\\":
+            if pos + 1 >= len(i_regex) or i_regex[pos + 1].isalnum() or i_regex[pos + 1].isspace():
+                return None
+            char = i_regex[pos + 1]
+            pos += 2
+        # Anything else that's special can't be expressed
+        elif char in ".[*+?{}()|^$]":
+            return None
+        else:
+            pos += 1
+
+        # Only ASCII has the same case folding in both
+        if not char.isascii():
+            return None
+
+        if char in "%_\\":
+            likeBody += "\\" + char
+            escaped = True
+        else:
+            likeBody += char
+
+    if not anchoredAtStart:
+        likeBody = "%" + likeBody
+    if anchoredAtEnd:
+        return [likeBody, likeBody + "\n"], escaped
+    else:
+        return [likeBody + "%"], escaped
+
+def rewriteRegexps(i_node, o_rewrittenTerms=None):
+    """
+    Replace REGEXP and IREGEXP operations that have a simple enough pattern
+    with equivalent GLOB and LIKE operations.
+
+    Params:
+     i_node:
+      (AstNode)
+      This is left unchanged.
+     o_rewrittenTerms:
+      Either (list)
+       Append to this a description of each operation that is rewritten.
+      or (None)
+
+    Returns:
+     Function return value:
+      (AstNode)
+      i_node, or if anything beneath it was rewritten, a copy of it with those changes.
+     o_rewrittenTerms:
+      Each appended element is:
+       (tuple)
+       Tuple has elements:
+        0:
+         (str)
+         Original SQL
+        1:
+         (str)
+         Replacement SQL
+    """
+    if not isinstance(i_node, OperatorNode):
+        return i_node
+
+    # Recurse to rewrite the children,
+    # and if any operands were changed, copy this node to hold them
+    newOperands = [rewriteRegexps(operand, o_rewrittenTerms)  for operand in i_node.operands]
+    if newOperands != i_node.operands:
+        i_node = copy.copy(i_node)
+        i_node.operands = newOperands
+
+    # If this isn't a regular expression match against a literal pattern,
+    # there's nothing to rewrite
+    if not (i_node.operation == "REGEXP" or i_node.operation == "IREGEXP"):
+        return i_node
+    valueOperand, patternOperand = i_node.operands
+    if not (isinstance(patternOperand, ValueNode) and patternOperand.type == "string"):
+        return i_node
+
+    # Get equivalent patterns,
+    # or if can't, leave the regular expression
+    if i_node.operation == "REGEXP":
+        patterns = regexToGlobPatterns(patternOperand.value)
+        escaped = False
+        operation = "GLOB"
+    else:
+        patterns = regexToLikePatterns(patternOperand.value)
+        if patterns != None:
+            patterns, escaped = patterns
+        operation = "LIKE"
+    if patterns == None:
+        return i_node
+
+    # Make a new operation for each pattern
+    newNodes = []
+    for pattern in patterns:
+        newNode = OperatorNode(("operator", operation, i_node.token[2], i_node.token[3]))
+        newPatternOperand = ValueNode(patternOperand.token, "string", pattern)
+        if escaped:
+            escapeNode = OperatorNode(("operator", "ESCAPE", patternOperand.token[3], patternOperand.token[3]))
+            escapeNode.operands = [newPatternOperand, ValueNode(patternOperand.token, "string", "\\")]
+            newPatternOperand = escapeNode
+        newNode.operands = [valueOperand, newPatternOperand]
+        newNodes.append(newNode)
+
+    # If there's more than one, OR them together
+    if len(newNodes) == 1:
+        newNode = newNodes[0]
+    else:
+        newNode = OperatorNode(("operator", "OR", i_node.token[2], i_node.token[3]))
+        newNode.operands = newNodes
+
+    if o_rewrittenTerms != None:
+        o_rewrittenTerms.append((i_node.toSqlString(), newNode.toSqlString()))
+    return newNode
+
+def sqlWhereExpressionToRegexpRewrites(i_whereExpression):
+    """
+    Find out which regular expression matches in a WHERE expression will be run as GLOB or LIKE instead.
+
+    Params:
+     i_whereExpression:
+      (str)
+
+    Returns:
+     Either (list)
+      Each element is:
+       (tuple)
+       Tuple has elements:
+        0:
+         (str)
+         Original SQL
+        1:
+         (str)
+         Replacement SQL
+     or raise exception (SqlParseError)
+      args[0]:
+       (str)
+       Description of error.
+    """
+    parsed = parseWhereExpr(i_whereExpression)
+    if parsed == None:
+        return []
+    rewrittenTerms = []
+    rewriteRegexps(parsed, rewrittenTerms)
+    return rewrittenTerms
+
+# + + }}}
+
+# + + Refine in memory {{{
+
+# When a new WHERE expression can only match some of the rows that the previous one did
+# (eg. because more was typed into a column filter, or another column filter was filled in),
+# the new rows can be got by filtering the previous ones in memory instead of querying the database again.
+
+class InMemoryEvaluationError(RuntimeError):
+    pass
+
+def getAndedTerms(i_node):
+    """
+    Params:
+     i_node:
+      Either (AstNode)
+      or (None)
+
+    Returns:
+     (list of AstNode)
+     The terms that are ANDed together at the top of i_node.
+    """
+    if i_node == None:
+        return []
+    flattened = flattenOperator(i_node, "AND")
+    if isinstance(flattened, OperatorNode) and flattened.operation == "AND":
+        return flattened.operands
+    return [flattened]
+
+def termColumnIdentifier(i_node):
+    """
+    Params:
+     i_node:
+      (AstNode)
+
+    Returns:
+     Either (str)
+      If i_node is an identifier that names a known column,
+      the first of that column's dbIdentifiers,
+      which is also the name of the column in game list query results.
+     or (None)
+    """
+    if not (isinstance(i_node, ValueNode) and i_node.type == "identifier"):
+        return None
+    tableColumnSpecs = columns.tableColumnSpec_getByDbIdentifier(i_node.value, True)
+    if len(tableColumnSpecs) == 0:
+        return None
+    return tableColumnSpecs[0]["dbIdentifiers"][0]
+
+def termNumericRange(i_node):
+    """
+    Params:
+     i_node:
+      (AstNode)
+
+    Returns:
+     Either (tuple)
+      If i_node compares a column against a number or range of numbers.
+      Tuple has elements:
+       0:
+        (str)
+        As returned from termColumnIdentifier()
+       1, 2:
+        (float, bool)
+        Lowest value that can match, and whether that value itself matches
+       3, 4:
+        (float, bool)
+        Highest value that can match, and whether that value itself matches
+     or (None)
+    """
+    if not (isinstance(i_node, OperatorNode) and len(i_node.operands) == 2):
+        return None
+    columnIdentifier = termColumnIdentifier(i_node.operands[0])
+    if columnIdentifier == None:
+        return None
+
+    def numberValue(i_valueNode):
+        if isinstance(i_valueNode, ValueNode) and (i_valueNode.type == "integer" or i_valueNode.type == "float"):
+            return i_valueNode.value
+        return None
+
+    if i_node.operation == "BETWEEN":
+        rangeNode = i_node.operands[1]
+        if not (isinstance(rangeNode, OperatorNode) and rangeNode.operation == "AND"):
+            return None
+        low = numberValue(rangeNode.operands[0])
+        high = numberValue(rangeNode.operands[1])
+        if low == None or high == None:
+            return None
+        return (columnIdentifier, low, True, high, True)
+
+    value = numberValue(i_node.operands[1])
+    if value == None:
+        return None
+    if i_node.operation == "=" or i_node.operation == "==":
+        return (columnIdentifier, value, True, value, True)
+    elif i_node.operation == ">":
+        return (columnIdentifier, value, False, float("inf"), True)
+    elif i_node.operation == ">=":
+        return (columnIdentifier, value, True, float("inf"), True)
+    elif i_node.operation == "<":
+        return (columnIdentifier, float("-inf"), True, value, False)
+    elif i_node.operation == "<=":
+        return (columnIdentifier, float("-inf"), True, value, True)
+    return None
+
+def termImplies(i_term, i_impliedTerm):
+    """
+    Find out whether every value that passes one term must also pass another.
+
+    Params:
+     i_term, i_impliedTerm:
+      (AstNode)
+
+    Returns:
+     (bool)
+     True: Anything that i_term is true for, i_impliedTerm is also true for.
+     False: That may or may not be the case.
+    """
+    if i_term.toSqlString() == i_impliedTerm.toSqlString():
+        return True
+
+    # If both are LIKEs of the same column against plain patterns
+    if isinstance(i_term, OperatorNode) and i_term.operation == "LIKE" and \
+       isinstance(i_impliedTerm, OperatorNode) and i_impliedTerm.operation == "LIKE":
+        columnIdentifier = termColumnIdentifier(i_term.operands[0])
+        pattern = i_term.operands[1]
+        impliedPattern = i_impliedTerm.operands[1]
+        if columnIdentifier == None or columnIdentifier != termColumnIdentifier(i_impliedTerm.operands[0]) or \
+           not (isinstance(pattern, ValueNode) and pattern.type == "string") or \
+           not (isinstance(impliedPattern, ValueNode) and impliedPattern.type == "string"):
+            return False
+
+        # LIKE is case-insensitive for ASCII letters only
+        pattern = pattern.value.translate(db.g_asciiUpperToLower)
+        impliedPattern = impliedPattern.value.translate(db.g_asciiUpperToLower)
+        # Literal text between the wildcards, all of which a matching value must contain
+        literalRuns = re.split("[%_]", pattern)
+
+        # If the implied pattern is '%text%',
+        # it's implied if the term's pattern has that text in one of its literal runs
+        impliedText = impliedPattern[1:-1]
+        if len(impliedPattern) >= 2 and impliedPattern[0] == "%" and impliedPattern[-1] == "%" and impliedText.find("%") == -1 and impliedText.find("_") == -1:
+            return any([literalRun.find(impliedText) != -1  for literalRun in literalRuns])
+
+        # If the implied pattern is 'text%',
+        # it's implied if the term's pattern starts with that text
+        impliedText = impliedPattern[:-1]
+        if len(impliedPattern) >= 1 and impliedPattern[-1] == "%" and impliedText.find("%") == -1 and impliedText.find("_") == -1:
+            return literalRuns[0].startswith(impliedText)
+
+        return False
+
+    # If both compare the same column against numbers,
+    # it's implied if the term's range is inside the implied term's range
+    numericRange = termNumericRange(i_term)
+    impliedNumericRange = termNumericRange(i_impliedTerm)
+    if numericRange != None and impliedNumericRange != None and numericRange[0] == impliedNumericRange[0]:
+        _, low, lowInclusive, high, highInclusive = numericRange
+        _, impliedLow, impliedLowInclusive, impliedHigh, impliedHighInclusive = impliedNumericRange
+        return (low > impliedLow or (low == impliedLow and (impliedLowInclusive or not lowInclusive))) and \
+               (high < impliedHigh or (high == impliedHigh and (impliedHighInclusive or not highInclusive)))
+
+    return False
+
+def getRefiningTerms(i_previousWhereExpression, i_newWhereExpression):
+    """
+    Find out whether a new WHERE expression only narrows down what a previous one matched,
+    and if so, what else has to be tested to get from the rows matched by the previous one to those matched by the new one.
+
+    Params:
+     i_previousWhereExpression, i_newWhereExpression:
+      (str)
+
+    Returns:
+     Either (list of AstNode)
+      Terms which, when ANDed with i_previousWhereExpression, are equivalent to i_newWhereExpression.
+      (Terms that are the same in both expressions aren't included,
+      so this is empty if the expressions are equivalent.)
+     or (None)
+      Couldn't prove that i_newWhereExpression only narrows i_previousWhereExpression.
+    """
+    try:
+        previousTerms = getAndedTerms(parseWhereExpr(i_previousWhereExpression))
+        newTerms = getAndedTerms(parseWhereExpr(i_newWhereExpression))
+    except SqlParseError:
+        return None
+
+    # Every previous term must still be required by some new term
+    for previousTerm in previousTerms:
+        if not any([termImplies(newTerm, previousTerm)  for newTerm in newTerms]):
+            return None
+
+    previousTermSqls = set([previousTerm.toSqlString()  for previousTerm in previousTerms])
+    return [newTerm  for newTerm in newTerms  if newTerm.toSqlString() not in previousTermSqls]
+
+def likePatternToRegex(i_pattern, i_escapeCharacter=None):
+    """
+    Params:
+     i_pattern:
+      (str)
+      Pattern as for SQL LIKE.
+     i_escapeCharacter:
+      Either (str)
+      or (None)
+
+    Returns:
+     (re.Pattern)
+     A regular expression that matches (with fullmatch()) the same strings that SQLite's LIKE does,
+     ie. case-insensitively for ASCII letters only.
+    """
+    regex = ""
+    escaping = False
+    for character in i_pattern:
+        if escaping:
+            regex += re.escape(character)
+            escaping = False
+        elif character == i_escapeCharacter:
+            escaping = True
+        elif character == "%":
+            regex += ".*"
+        elif character == "_":
+            regex += "."
+        else:
+            regex += re.escape(character)
+    return re.compile(regex, re.ASCII | re.IGNORECASE | re.DOTALL)
+
+# Python equivalents of the comparison operators, for values that are both numbers or both strings
+g_comparisonFunctions = {
+    "=": lambda a, b: a == b,
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<>": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+}
+
+def compileValueTest(i_node):
+    """
+    Params:
+     i_node:
+      (OperatorNode)
+      A term whose first operand is a column.
+
+    Returns:
+     Either (callable)
+      Function has:
+       Params:
+        i_value:
+         A value of the column.
+       Returns:
+        Either (bool)
+         Whether the term is true for the value.
+        or raise exception (InMemoryEvaluationError)
+         The value is of a type that SQLite might compare differently.
+     or (None)
+      Don't know how to evaluate this term in the same way as SQLite.
+    """
+    if len(i_node.operands) != 2:
+        return None
+    operand = i_node.operands[1]
+
+    def literalValue(i_valueNode):
+        """
+        Returns:
+         Either (int, float or str)
+         or (None)
+          Not a literal whose comparisons with column values are easy to get right.
+        """
+        if not isinstance(i_valueNode, ValueNode):
+            return None
+        if i_valueNode.type == "integer" or i_valueNode.type == "float":
+            return i_valueNode.value
+        if i_valueNode.type == "string":
+            # A number in a string would be compared as a number with numeric columns
+            try:
+                float(i_valueNode.value)
+                return None
+            except ValueError:
+                return i_valueNode.value
+        return None
+
+    def checkComparable(i_value, i_literal):
+        if isinstance(i_literal, str):
+            if not isinstance(i_value, str):
+                raise InMemoryEvaluationError("can't compare " + type(i_value).__name__ + " with string")
+        else:
+            if not isinstance(i_value, (int, float)):
+                raise InMemoryEvaluationError("can't compare " + type(i_value).__name__ + " with number")
+
+    if i_node.operation == "LIKE":
+        escapeCharacter = None
+        if isinstance(operand, OperatorNode) and operand.operation == "ESCAPE":
+            if not (isinstance(operand.operands[1], ValueNode) and operand.operands[1].type == "string" and len(operand.operands[1].value) == 1):
+                return None
+            escapeCharacter = operand.operands[1].value
+            operand = operand.operands[0]
+        if not (isinstance(operand, ValueNode) and operand.type == "string"):
+            return None
+        regex = likePatternToRegex(operand.value, escapeCharacter)
+        def test(i_value):
+            if i_value == None:
+                return False
+            if isinstance(i_value, int):
+                i_value = str(i_value)
+            elif not isinstance(i_value, str):
+                raise InMemoryEvaluationError("can't LIKE " + type(i_value).__name__)
+            return regex.fullmatch(i_value) != None
+        return test
+
+    elif i_node.operation == "REGEXP" or i_node.operation == "IREGEXP":
+        if not (isinstance(operand, ValueNode) and operand.type == "string"):
+            return None
+        regexFunction = db.sqliteRegexFunction if i_node.operation == "REGEXP" else db.sqliteIRegexFunction
+        pattern = operand.value
+        return lambda i_value: regexFunction(pattern, i_value) == True
+
+    elif i_node.operation == "IS" or i_node.operation == "IS NOT":
+        if not (isinstance(operand, ValueNode) and operand.type == "keyword" and operand.value.upper() == "NULL"):
+            return None
+        if i_node.operation == "IS":
+            return lambda i_value: i_value == None
+        else:
+            return lambda i_value: i_value != None
+
+    elif i_node.operation == "BETWEEN":
+        if not (isinstance(operand, OperatorNode) and operand.operation == "AND"):
+            return None
+        low = literalValue(operand.operands[0])
+        high = literalValue(operand.operands[1])
+        if low == None or high == None or isinstance(low, str) != isinstance(high, str):
+            return None
+        def test(i_value):
+            if i_value == None:
+                return False
+            checkComparable(i_value, low)
+            return low <= i_value <= high
+        return test
+
+    elif i_node.operation in g_comparisonFunctions:
+        literal = literalValue(operand)
+        if literal == None:
+            return None
+        comparisonFunction = g_comparisonFunctions[i_node.operation]
+        def test(i_value):
+            if i_value == None:
+                return False
+            checkComparable(i_value, literal)
+            return comparisonFunction(i_value, literal)
+        return test
+
+    return None
+
+def compileRowTest(i_node, i_columnNames):
+    """
+    Params:
+     i_node:
+      (AstNode)
+     i_columnNames:
+      (list of str)
+      Names of the columns in the rows that will be tested.
+
+    Returns:
+     Either (callable)
+      Function has:
+       Params:
+        i_row:
+         (sqlite3.Row)
+       Returns:
+        Either (bool)
+         Whether i_node is true for the row.
+         (NULL is taken as false, which is right as long as only ANDs and ORs lead to i_node.)
+        or raise exception (InMemoryEvaluationError)
+     or (None)
+      Don't know how to evaluate i_node in the same way as SQLite.
+    """
+    if not isinstance(i_node, OperatorNode):
+        return None
+
+    if i_node.operation == "AND" or i_node.operation == "OR":
+        operandTests = [compileRowTest(operand, i_columnNames)  for operand in i_node.operands]
+        if None in operandTests:
+            return None
+        if i_node.operation == "AND":
+            return lambda i_row: all([operandTest(i_row)  for operandTest in operandTests])
+        else:
+            return lambda i_row: any([operandTest(i_row)  for operandTest in operandTests])
+
+    columnIdentifier = termColumnIdentifier(i_node.operands[0])
+    if columnIdentifier == None or columnIdentifier not in i_columnNames:
+        return None
+    columnNo = i_columnNames.index(columnIdentifier)
+    valueTest = compileValueTest(i_node)
+    if valueTest == None:
+        return None
+    return lambda i_row: valueTest(i_row[columnNo])
+
+def filterRowsInMemory(i_rows, i_columnNames, i_terms):
+    """
+    Params:
+     i_rows:
+      Either (list of sqlite3.Row)
+      or (db.ColumnarGameList)
+     i_columnNames:
+      (list of str)
+     i_terms:
+      (list of AstNode)
+      As returned from getRefiningTerms().
+
+    Returns:
+     Either (list of sqlite3.Row or db.ColumnarGameList)
+      Those of i_rows for which all of i_terms are true, in the same order,
+      in the same kind of container as i_rows.
+     or (None)
+      Some term can't be evaluated in memory in the same way as SQLite would.
+    """
+    rowTests = [compileRowTest(term, i_columnNames)  for term in i_terms]
+    if None in rowTests:
+        return None
+
+    # Apply each term to all the rows left by the previous one
+    rowNos = range(len(i_rows))
+    try:
+        for rowTest in rowTests:
+            rowNos = [rowNo  for rowNo in rowNos  if rowTest(i_rows[rowNo])]
+    except InMemoryEvaluationError:
+        return None
+    return db.takeRecords(i_rows, rowNos)
 
 # + + }}}
 
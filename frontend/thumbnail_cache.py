@@ -0,0 +1,304 @@
+
+# Python std
+import os
+import sqlite3
+import threading
+import time
+
+# This program
+import settings
+
+
+# A database file in the settings directory of screenshots (and other images shown in the game table)
+# that have already been scaled to the size they are drawn at,
+# so that on starting the program again they don't all need to be decoded at full size and scaled down again.
+#
+# Entries are keyed the same way as game_table_view.PixmapCache,
+# and also record the modification time of the original image file so that they are ignored
+# if the original has since been changed.
+#
+# The images are loaded on thread pool threads, which borrow connections from a shared pool.
+# (A threading.local wouldn't do, because Qt's pool threads get a fresh Python thread state for each task,
+# so the connection would be opened again for every image.)
+#
+# When the cache grows past its size budget, the least recently used images are deleted
+# (when it's first opened in a session, and then whenever enough has been stored to go over the budget again).
+# An image's use is only recorded again once USE_RECORD_INTERVAL has passed,
+# so that most lookups don't need to write to the database.
+
+g_idleConnections = []
+# (list of sqlite3.Connection)
+# Open connections that no thread is using at the moment.
+g_idleConnectionsLock = threading.Lock()
+
+g_tableIsSetUp = False
+# (bool)
+# Whether the table has been created or upgraded this session.
+g_tableSetUpLock = threading.Lock()
+
+g_byteCount = None
+# Either (int)
+#  Roughly how many bytes of image data are in the cache
+#  (counting images that were replaced twice, until the next prune).
+# or (None)
+#  Not counted yet this session.
+g_byteCountLock = threading.Lock()
+
+# When pruning, the fraction of the size budget to trim the cache down to,
+# so that it doesn't need pruning again as soon as the next image is stored
+PRUNE_TARGET_FRACTION = 0.9
+
+# Seconds after an image's use was recorded before another use of it is recorded
+USE_RECORD_INTERVAL = 60 * 60
+
+def dbFilePath():
+    """
+    Returns:
+     (str)
+    """
+    return settings.settingsDirPath + os.sep + "thumbnails.sqlite"
+
+def maxByteCount():
+    """
+    Returns:
+     (int)
+     The size budget from the preferences, in bytes.
+     0: The cache is disabled.
+    """
+    try:
+        megabytes = float(settings.preferences.get("thumbnailCacheSizeMb", 512))
+    except ValueError:
+        megabytes = 512
+    return int(max(megabytes, 0) * 1024 * 1024)
+
+def isEnabled():
+    """
+    Returns:
+     (bool)
+    """
+    return maxByteCount() > 0
+
+def acquireConnection():
+    """
+    Take a connection to the cache database from the pool,
+    opening a new one (and creating the database) if none are idle.
+    Give it back with releaseConnection() when done.
+
+    Returns:
+     Either (sqlite3.Connection)
+     or raise exception (sqlite3.Error or OSError)
+    """
+    with g_idleConnectionsLock:
+        if len(g_idleConnections) > 0:
+            return g_idleConnections.pop()
+
+    settings.createSettingsDir()
+    connection = sqlite3.connect(dbFilePath(), timeout=10, check_same_thread=False)
+    try:
+        # Allow other threads to carry on reading while one is writing
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        setUpTable(connection)
+    except:
+        connection.close()
+        raise
+    return connection
+
+def releaseConnection(i_connection):
+    """
+    Params:
+     i_connection:
+      (sqlite3.Connection)
+      As returned from acquireConnection().
+    """
+    with g_idleConnectionsLock:
+        g_idleConnections.append(i_connection)
+
+def setUpTable(i_connection):
+    """
+    Once per session, create or upgrade the table and trim the cache to size.
+
+    Params:
+     i_connection:
+      (sqlite3.Connection)
+
+    Returns:
+     -
+     or raise exception (sqlite3.Error)
+    """
+    global g_tableIsSetUp
+    with g_tableSetUpLock:
+        if g_tableIsSetUp:
+            return
+
+        i_connection.execute("""
+            CREATE TABLE IF NOT EXISTS thumbnails (
+                path TEXT NOT NULL,
+                width INTEGER NOT NULL,
+                height INTEGER NOT NULL,
+                rotated INTEGER NOT NULL,
+                sourceMtime INTEGER NOT NULL,
+                storedTime REAL NOT NULL,
+                usedTime REAL NOT NULL,
+                data BLOB NOT NULL,
+                PRIMARY KEY (path, width, height, rotated)
+            )
+        """)
+        # If the database was made before images' use was recorded,
+        # add that, starting from when they were stored
+        if "usedTime" not in [column[1]  for column in i_connection.execute("PRAGMA table_info(thumbnails)")]:
+            with i_connection:
+                i_connection.execute("ALTER TABLE thumbnails ADD COLUMN usedTime REAL NOT NULL DEFAULT 0")
+                i_connection.execute("UPDATE thumbnails SET usedTime = storedTime")
+
+        # Trim the cache to size
+        global g_byteCount
+        with g_byteCountLock:
+            g_byteCount = prune(i_connection)
+
+        g_tableIsSetUp = True
+
+def sourceMtime(i_imagePath):
+    """
+    Params:
+     i_imagePath:
+      (str)
+      Path of image file, or of a member within a zip file
+      (eg. "/mnt/gamebase/screenshots.zip/A/Alpha.png").
+
+    Returns:
+     Either (int)
+      Modification time of the file (or the zip file), in nanoseconds.
+     or (None)
+      The file doesn't exist.
+    """
+    zipExtensionPos = i_imagePath.lower().find(".zip/")
+    if zipExtensionPos != -1:
+        i_imagePath = i_imagePath[:zipExtensionPos + 4]
+    try:
+        return os.stat(i_imagePath).st_mtime_ns
+    except OSError:
+        return None
+
+def get(i_key):
+    """
+    Params:
+     i_key:
+      (tuple)
+      As for game_table_view.PixmapCache.insert()
+
+    Returns:
+     Either (bytes)
+      Encoded image data.
+     or (None)
+      There is no up-to-date image for this key in the cache.
+    """
+    if not isEnabled():
+        return None
+
+    imagePath, width, height, rotated = i_key
+    mtime = sourceMtime(imagePath)
+    if mtime == None:
+        return None
+
+    try:
+        connection = acquireConnection()
+    except (sqlite3.Error, OSError):
+        return None
+    try:
+        row = connection.execute("SELECT rowid, sourceMtime, usedTime, data FROM thumbnails WHERE path = ? AND width = ? AND height = ? AND rotated = ?", (imagePath, width, height, int(rotated))).fetchone()
+        if row == None or row[1] != mtime:
+            return None
+
+        # Record the use (if it hasn't been recently),
+        # so that the images that keep getting used are the last to be pruned
+        now = time.time()
+        if now - row[2] > USE_RECORD_INTERVAL:
+            with connection:
+                connection.execute("UPDATE thumbnails SET usedTime = ? WHERE rowid = ?", (now, row[0]))
+    except (sqlite3.Error, OSError):
+        return None
+    finally:
+        releaseConnection(connection)
+    return row[3]
+
+def put(i_key, i_data):
+    """
+    Params:
+     i_key:
+      (tuple)
+      As for game_table_view.PixmapCache.insert()
+     i_data:
+      (bytes)
+      Encoded image data.
+    """
+    if not isEnabled():
+        return
+
+    imagePath, width, height, rotated = i_key
+    mtime = sourceMtime(imagePath)
+    if mtime == None:
+        return
+
+    try:
+        connection = acquireConnection()
+    except (sqlite3.Error, OSError):
+        return
+    try:
+        now = time.time()
+        with connection:
+            connection.execute("INSERT OR REPLACE INTO thumbnails (path, width, height, rotated, sourceMtime, storedTime, usedTime, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (imagePath, width, height, int(rotated), mtime, now, now, i_data))
+
+        # If that took the cache over its budget,
+        # trim it
+        global g_byteCount
+        with g_byteCountLock:
+            g_byteCount += len(i_data)
+            if g_byteCount > maxByteCount():
+                g_byteCount = prune(connection)
+    except (sqlite3.Error, OSError):
+        # Not being able to save a thumbnail only costs us having to scale it again next time
+        return
+    finally:
+        releaseConnection(connection)
+
+def prune(i_connection=None):
+    """
+    Delete the least recently used images until the cache is a little within its size budget
+    (PRUNE_TARGET_FRACTION of it).
+
+    Params:
+     i_connection:
+      Either (sqlite3.Connection)
+      or (None)
+       Borrow a connection from the pool.
+
+    Returns:
+     (int)
+     Number of bytes of image data left in the cache
+     (or 0 if it couldn't be pruned, so as not to keep trying after every image stored).
+    """
+    if i_connection == None:
+        try:
+            connection = acquireConnection()
+        except (sqlite3.Error, OSError):
+            return 0
+        try:
+            return prune(connection)
+        finally:
+            releaseConnection(connection)
+
+    try:
+        with i_connection:
+            i_connection.execute("""
+                DELETE FROM thumbnails WHERE rowid IN (
+                    SELECT rowid FROM (
+                        SELECT rowid, SUM(LENGTH(data)) OVER (ORDER BY usedTime DESC) AS runningTotal
+                        FROM thumbnails
+                    )
+                    WHERE runningTotal > ?
+                )
+            """, (int(maxByteCount() * PRUNE_TARGET_FRACTION),))
+        return i_connection.execute("SELECT IFNULL(SUM(LENGTH(data)), 0) FROM thumbnails").fetchone()[0]
+    except (sqlite3.Error, OSError):
+        return 0
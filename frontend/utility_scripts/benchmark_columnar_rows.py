@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+
+# Compare the peak memory use of holding a whole game list as a list of sqlite3.Row
+# against holding it as a db.ColumnarGameList,
+# using synthetic gamebases so that no real ones need to be converted.
+#
+# Each way of fetching is measured in a fresh child process of this script,
+# so that one doesn't inflate the other's peak.
+#
+# Run from anywhere; the frontend modules are imported from the parent folder.
+
+
+# Python
+import sys
+import os
+import os.path
+import tempfile
+import time
+import subprocess
+import resource
+
+# This program
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import db
+from synthetic_gamebase import printAndFlush, makeGamebase
+
+
+# IDs of the columns to select in the game list queries
+g_benchmarkColumnIds = ["name", "year", "publisher", "developer", "genre", "parent_genre"]
+
+def peakRssKb():
+    """
+    Returns:
+     (int)
+     Peak resident set size of this process so far, in kilobytes.
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def measure(i_mode, i_gamebaseFilePaths):
+    """
+    Open the gamebases, fetch their game list in one of the two ways,
+    and print a line of measurements for the parent process to read.
+
+    Params:
+     i_mode:
+      Either (str)
+       "list": Fetch a list of sqlite3.Row.
+      or (str)
+       "columnar": Fetch a db.ColumnarGameList.
+     i_gamebaseFilePaths:
+      (list of str)
+    """
+    for gamebaseNo, gamebaseFilePath in enumerate(i_gamebaseFilePaths):
+        db.openDb("bench" + str(gamebaseNo), gamebaseFilePath)
+
+    sortOperations = [("name", 1)]
+    connectionsAndSqlTexts = db.getGameList_getSql(g_benchmarkColumnIds, "", sortOperations)
+
+    baselineKb = peakRssKb()
+    startTime = time.perf_counter()
+    if i_mode == "columnar":
+        columnNames, rows = db.getGameList_executeSqlAndFetchColumnar(connectionsAndSqlTexts, sortOperations)
+        sizeBytes = rows.sizeBytes()
+    else:
+        columnNames, rows = db.getGameList_executeSqlAndFetchAll(connectionsAndSqlTexts, sortOperations)
+        sizeBytes = 0
+    fetchSeconds = time.perf_counter() - startTime
+
+    # Read every value once, as scrolling through the whole table would
+    startTime = time.perf_counter()
+    for row in rows:
+        for value in row:
+            pass
+    readSeconds = time.perf_counter() - startTime
+
+    printAndFlush(" ".join([str(len(rows)), str(peakRssKb() - baselineKb), str(fetchSeconds), str(readSeconds), str(sizeBytes)]))
+
+
+if __name__ == "__main__":
+    # + Parse command line {{{
+
+    COMMAND_NAME = "benchmark_columnar_rows.py"
+
+    def printUsage(i_outputStream):
+        i_outputStream.write('''\
+''' + COMMAND_NAME + '''
+Game list row storage benchmark.
+
+Make some synthetic gamebases, and in a child process for each way of storing rows,
+fetch their combined game list as a list of sqlite3.Row or as a db.ColumnarGameList,
+then report how much the peak resident set size grew and how long fetching took.
+
+Usage:
+======
+''' + COMMAND_NAME + ''' [options]
+
+Options:
+ -g/--games <count>
+   Number of games in each synthetic gamebase.
+   Default: 100000
+ -n/--gamebases <count>
+   Number of synthetic gamebases.
+   Default: 2
+
+ Info:
+  -h/--help
+    Show this help.
+''')
+
+    # Parameters, with their default values
+    gameCount = 100000
+    gamebaseCount = 2
+    # (Internal, for the child processes)
+    measureMode = None
+    gamebaseFilePaths = []
+
+    # For each argument
+    argNo = 1
+    while argNo < len(sys.argv):
+        arg = sys.argv[argNo]
+        argNo += 1
+
+        # If it's an option
+        if arg[0] == "-":
+            if arg == "-g" or arg == "--games":
+                if argNo >= len(sys.argv):
+                    printAndFlush("ERROR: -g/--games requires a value.")
+                    sys.exit(-1)
+                gameCount = int(sys.argv[argNo])
+                argNo += 1
+
+            elif arg == "-n" or arg == "--gamebases":
+                if argNo >= len(sys.argv):
+                    printAndFlush("ERROR: -n/--gamebases requires a value.")
+                    sys.exit(-1)
+                gamebaseCount = int(sys.argv[argNo])
+                argNo += 1
+
+            elif arg == "--measure":
+                if argNo >= len(sys.argv):
+                    printAndFlush("ERROR: --measure requires a value.")
+                    sys.exit(-1)
+                measureMode = sys.argv[argNo]
+                argNo += 1
+
+            elif arg == "-h" or arg == "--help":
+                printUsage(sys.stdout)
+                sys.exit(0)
+
+            else:
+                printAndFlush("ERROR: Unrecognised option: " + arg)
+                printAndFlush("(Run with --help to show command usage.)")
+                sys.exit(-1)
+
+        # Else if it's an argument
+        else:
+            gamebaseFilePaths.append(arg)
+
+    if measureMode == None and len(gamebaseFilePaths) > 0:
+        printAndFlush("ERROR: Too many arguments.")
+        printAndFlush("(Run with --help to show command usage.)")
+        sys.exit(-1)
+
+    # + }}}
+
+    if measureMode != None:
+        measure(measureMode, gamebaseFilePaths)
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as tempDirPath:
+        gamebaseFilePaths = []
+        for gamebaseNo in range(gamebaseCount):
+            gamebaseFilePath = os.path.join(tempDirPath, "bench" + str(gamebaseNo) + ".sqlite")
+            printAndFlush("Making gamebase with " + str(gameCount) + " games...")
+            makeGamebase(gamebaseFilePath, gameCount, gamebaseNo + 1)
+            gamebaseFilePaths.append(gamebaseFilePath)
+
+        results = {}
+        for mode in ["list", "columnar"]:
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), "--measure", mode] + gamebaseFilePaths, stdout=subprocess.PIPE, check=True).stdout.decode("utf-8")
+            rowCount, growthKb, fetchSeconds, readSeconds, sizeBytes = output.split()
+            results[mode] = (int(rowCount), int(growthKb), float(fetchSeconds), float(readSeconds), int(sizeBytes))
+
+        printAndFlush("")
+        printAndFlush(str(results["list"][0]) + " rows from " + str(gamebaseCount) + " gamebases:")
+        printAndFlush("  list of sqlite3.Row: peak RSS +{:8.1f} MB, fetch {:8.1f} ms, read all {:8.1f} ms".format(results["list"][1] / 1024, results["list"][2] * 1000, results["list"][3] * 1000))
+        printAndFlush("  db.ColumnarGameList: peak RSS +{:8.1f} MB, fetch {:8.1f} ms, read all {:8.1f} ms ({:.1f} MB by sizeBytes())".format(results["columnar"][1] / 1024, results["columnar"][2] * 1000, results["columnar"][3] * 1000, results["columnar"][4] / 1024 / 1024))
+        if results["columnar"][0] != results["list"][0]:
+            printAndFlush("  ERROR: The row counts differ.")
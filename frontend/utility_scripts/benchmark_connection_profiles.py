@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+
+# Measure how long typical game list queries take with each of the connection profiles in db.g_connectionProfiles,
+# using a synthetic gamebase so that no real one needs to be converted.
+#
+# Run from anywhere; the frontend modules are imported from the parent folder.
+
+
+# Python
+import sys
+import os
+import os.path
+import tempfile
+import time
+import random
+import statistics
+
+# This program
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import settings
+import db
+from synthetic_gamebase import printAndFlush, makeGamebase
+
+
+# IDs of the columns to select in the game list queries
+g_benchmarkColumnIds = ["name", "year", "publisher", "genre", "parent_genre", "comment"]
+
+def timeQuery(i_function, i_repeatCount):
+    """
+    Params:
+     i_function:
+      (callable)
+     i_repeatCount:
+      (int)
+
+    Returns:
+     (tuple)
+     Tuple has elements:
+      0:
+       (float)
+       Seconds taken by the first call
+      1:
+       (float)
+       Median seconds taken by the following calls
+    """
+    times = []
+    for repeatNo in range(i_repeatCount + 1):
+        startTime = time.perf_counter()
+        i_function()
+        times.append(time.perf_counter() - startTime)
+    return times[0], statistics.median(times[1:])
+
+def benchmarkProfile(i_profileId, i_gamebaseFilePath, i_gameCount, i_repeatCount):
+    """
+    Open the gamebase with a connection profile and time some queries on it.
+
+    Params:
+     i_profileId:
+      (str)
+     i_gamebaseFilePath:
+      (str)
+     i_gameCount:
+      (int)
+     i_repeatCount:
+      (int)
+
+    Returns:
+     (list)
+     Each element is:
+      (tuple)
+      Tuple has elements:
+       0:
+        (str)
+        Name of query
+       1, 2:
+        As returned from timeQuery()
+    """
+    settings.preferences["connectionProfile"] = i_profileId
+    db.openDb("bench", i_gamebaseFilePath)
+
+    def fetchAll(i_whereExpression, i_sortOperations):
+        db.getGameList_executeSqlAndFetchAll(db.getGameList_getSql(g_benchmarkColumnIds, i_whereExpression, i_sortOperations), i_sortOperations)
+
+    randomGenerator = random.Random(2)
+    gameIds = [randomGenerator.randrange(1, i_gameCount + 1)  for gameNo in range(50)]
+    def getRecords():
+        for gameId in gameIds:
+            db.getGameRecord("bench", gameId)
+
+    results = [
+        ("All, by name", ) + timeQuery(lambda: fetchAll("", [("name", 1)]), i_repeatCount),
+        ("LIKE filter, by year", ) + timeQuery(lambda: fetchAll("Games.Name LIKE '%oon%' AND Genres.Genre LIKE '%1%'", [("year", -1), ("name", 1)]), i_repeatCount),
+        ("Filter on joined table", ) + timeQuery(lambda: fetchAll("Years.Year >= 1985 AND Years.Year <= 1987 AND PGenres.ParentGenre = 'Parent genre 3'", [("publisher", 1)]), i_repeatCount),
+        ("50 game records", ) + timeQuery(getRecords, i_repeatCount)
+    ]
+
+    db.closeDb("bench")
+    return results
+
+
+if __name__ == "__main__":
+    # + Parse command line {{{
+
+    COMMAND_NAME = "benchmark_connection_profiles.py"
+
+    def printUsage(i_outputStream):
+        i_outputStream.write('''\
+''' + COMMAND_NAME + '''
+Database connection profile benchmark.
+
+Make a synthetic gamebase and time some game list queries on it
+when it's opened with each of the connection profiles that can be chosen in the preferences.
+
+The gamebase file is made read-only, so that the "immutable" profile uses immutable=1
+(unless running as a user that can write to read-only files anyway).
+
+Usage:
+======
+''' + COMMAND_NAME + ''' [options]
+
+Options:
+ -g/--games <count>
+   Number of games in the synthetic gamebase.
+   Default: 100000
+ -r/--repeat <count>
+   Number of timed repetitions of each query, after a first, untimed one.
+   Default: 5
+
+ Info:
+  -h/--help
+    Show this help.
+''')
+
+    # Parameters, with their default values
+    gameCount = 100000
+    repeatCount = 5
+
+    # For each argument
+    argNo = 1
+    while argNo < len(sys.argv):
+        arg = sys.argv[argNo]
+        argNo += 1
+
+        # If it's an option
+        if arg[0] == "-":
+            if arg == "-g" or arg == "--games":
+                if argNo >= len(sys.argv):
+                    printAndFlush("ERROR: -g/--games requires a value.")
+                    sys.exit(-1)
+                gameCount = int(sys.argv[argNo])
+                argNo += 1
+
+            elif arg == "-r" or arg == "--repeat":
+                if argNo >= len(sys.argv):
+                    printAndFlush("ERROR: -r/--repeat requires a value.")
+                    sys.exit(-1)
+                repeatCount = int(sys.argv[argNo])
+                argNo += 1
+
+            elif arg == "-h" or arg == "--help":
+                printUsage(sys.stdout)
+                sys.exit(0)
+
+            else:
+                printAndFlush("ERROR: Unrecognised option: " + arg)
+                printAndFlush("(Run with --help to show command usage.)")
+                sys.exit(-1)
+
+        # Else if it's an argument
+        else:
+            printAndFlush("ERROR: Too many arguments.")
+            printAndFlush("(Run with --help to show command usage.)")
+            sys.exit(-1)
+
+    # + }}}
+
+    with tempfile.TemporaryDirectory() as tempDirPath:
+        gamebaseFilePath = os.path.join(tempDirPath, "bench.sqlite")
+        printAndFlush("Making gamebase with " + str(gameCount) + " games...")
+        makeGamebase(gamebaseFilePath, gameCount)
+        os.chmod(gamebaseFilePath, 0o444)
+
+        for profileId, profile in db.g_connectionProfiles.items():
+            printAndFlush("")
+            printAndFlush(profile["title"] + " (" + profileId + "):")
+            printAndFlush("  " + "; ".join(db.getAttachStatements(gamebaseFilePath, "bench", profile)))
+            for queryName, firstSeconds, medianSeconds in benchmarkProfile(profileId, gamebaseFilePath, gameCount, repeatCount):
+                printAndFlush("  {:<24} first {:8.1f} ms, then median {:8.1f} ms".format(queryName, firstSeconds * 1000, medianSeconds * 1000))
+
+        os.chmod(gamebaseFilePath, 0o644)
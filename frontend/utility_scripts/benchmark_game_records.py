@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+
+# Compare fetching the full records of many games with db.getGameRecords()
+# against calling db.getGameRecord() once per game,
+# using a synthetic gamebase so that no real one needs to be converted.
+#
+# Run from anywhere; the frontend modules are imported from the parent folder.
+
+
+# Python
+import sys
+import os
+import os.path
+import tempfile
+import time
+import random
+
+# This program
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import db
+from synthetic_gamebase import printAndFlush, makeGamebase
+
+
+if __name__ == "__main__":
+    # + Parse command line {{{
+
+    COMMAND_NAME = "benchmark_game_records.py"
+
+    def printUsage(i_outputStream):
+        i_outputStream.write('''\
+''' + COMMAND_NAME + '''
+Game record fetching benchmark.
+
+Make a synthetic gamebase, and time fetching the records of a random selection of its games
+with one db.getGameRecord() call per game and then with db.getGameRecords().
+
+Usage:
+======
+''' + COMMAND_NAME + ''' [options]
+
+Options:
+ -g/--games <count>
+   Number of games in the synthetic gamebase.
+   Default: 50000
+ -f/--fetch <count>
+   Number of games to fetch the records of.
+   Default: 5000
+ --no-index
+   Don't index Games.GA_Id in the synthetic gamebase,
+   so that every single-game query has to scan the table.
+
+ Info:
+  -h/--help
+    Show this help.
+''')
+
+    # Parameters, with their default values
+    gameCount = 50000
+    fetchCount = 5000
+    indexGameIds = True
+
+    # For each argument
+    argNo = 1
+    while argNo < len(sys.argv):
+        arg = sys.argv[argNo]
+        argNo += 1
+
+        # If it's an option
+        if arg[0] == "-":
+            if arg == "-g" or arg == "--games":
+                if argNo >= len(sys.argv):
+                    printAndFlush("ERROR: -g/--games requires a value.")
+                    sys.exit(-1)
+                gameCount = int(sys.argv[argNo])
+                argNo += 1
+
+            elif arg == "-f" or arg == "--fetch":
+                if argNo >= len(sys.argv):
+                    printAndFlush("ERROR: -f/--fetch requires a value.")
+                    sys.exit(-1)
+                fetchCount = int(sys.argv[argNo])
+                argNo += 1
+
+            elif arg == "--no-index":
+                indexGameIds = False
+
+            elif arg == "-h" or arg == "--help":
+                printUsage(sys.stdout)
+                sys.exit(0)
+
+            else:
+                printAndFlush("ERROR: Unrecognised option: " + arg)
+                printAndFlush("(Run with --help to show command usage.)")
+                sys.exit(-1)
+
+        # Else if it's an argument
+        else:
+            printAndFlush("ERROR: Too many arguments.")
+            printAndFlush("(Run with --help to show command usage.)")
+            sys.exit(-1)
+
+    # + }}}
+
+    with tempfile.TemporaryDirectory() as tempDirPath:
+        gamebaseFilePath = os.path.join(tempDirPath, "bench.sqlite")
+        printAndFlush("Making gamebase with " + str(gameCount) + " games...")
+        makeGamebase(gamebaseFilePath, gameCount, i_indexGameIds=indexGameIds)
+        db.openDb("bench", gamebaseFilePath)
+
+        randomGenerator = random.Random(2)
+        gameIds = randomGenerator.sample(range(1, gameCount + 1), min(fetchCount, gameCount))
+
+        for includeRelatedGameNames in [False, True]:
+            printAndFlush("")
+            printAndFlush("Fetching " + str(len(gameIds)) + " records" + (" with related game names" if includeRelatedGameNames else "") + ":")
+
+            # Start each run with an empty record cache so that every record is really fetched
+            db.g_recordCache.clear()
+            startTime = time.perf_counter()
+            singleRecords = []
+            for gameId in gameIds:
+                singleRecords.append(db.getGameRecord("bench", gameId, includeRelatedGameNames))
+                db.g_recordCache.clear()
+            singleSeconds = time.perf_counter() - startTime
+            printAndFlush("  getGameRecord() per game: {:8.1f} ms".format(singleSeconds * 1000))
+
+            db.g_recordCache.clear()
+            startTime = time.perf_counter()
+            batchRecords = list(db.getGameRecords("bench", gameIds, includeRelatedGameNames))
+            batchSeconds = time.perf_counter() - startTime
+            printAndFlush("  getGameRecords():         {:8.1f} ms ({:.1f}x faster)".format(batchSeconds * 1000, singleSeconds / batchSeconds))
+
+            if batchRecords != singleRecords:
+                printAndFlush("  ERROR: The records differ.")
+
+        db.closeDb("bench")
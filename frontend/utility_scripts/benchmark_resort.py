@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+
+# Compare changing the sort order of a game list by querying again with a new ORDER BY
+# against re-sorting the rows already fetched with db.getGameList_resortInMemory(),
+# using a synthetic gamebase so that no real one needs to be converted.
+#
+# Run from anywhere; the frontend modules are imported from the parent folder.
+
+
+# Python
+import sys
+import os
+import os.path
+import tempfile
+import time
+
+# This program
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import columns
+import db
+from synthetic_gamebase import printAndFlush, makeGamebase
+
+
+# IDs of the columns to select in the game list queries
+g_benchmarkColumnIds = ["name", "year", "publisher", "genre", "parent_genre"]
+
+def sortKeys(i_records, i_columnNames, i_sortOperations):
+    """
+    Params:
+     i_records:
+      (list of sqlite3.Row)
+     i_columnNames:
+      (list of str)
+     i_sortOperations:
+      (list)
+
+    Returns:
+     (list of tuple)
+     For each record, its values in the sort columns as sort keys,
+     to check that two lists are in the same order apart from the order of ties.
+    """
+    sortColumnNos = [i_columnNames.index(columns.tableColumnSpec_getById(columnId)["dbIdentifiers"][0])  for columnId, direction in i_sortOperations]
+    return [tuple([db.sqliteNocaseSortKey(record[sortColumnNo])  for sortColumnNo in sortColumnNos])  for record in i_records]
+
+
+if __name__ == "__main__":
+    # + Parse command line {{{
+
+    COMMAND_NAME = "benchmark_resort.py"
+
+    def printUsage(i_outputStream):
+        i_outputStream.write('''\
+''' + COMMAND_NAME + '''
+Game list re-sorting benchmark.
+
+Make a synthetic gamebase, fetch its game list sorted by name,
+and then time changing to each of some other sort orders
+by querying again and by re-sorting the fetched rows in memory
+(the first time, which works out sort ranks for the sort columns,
+and again, when those ranks are already known).
+
+If NumPy is installed, the in-memory sort is timed both with and without it.
+
+Usage:
+======
+''' + COMMAND_NAME + ''' [options]
+
+Options:
+ -g/--games <count>
+   Number of games in the synthetic gamebase.
+   Default: 100000
+
+ Info:
+  -h/--help
+    Show this help.
+''')
+
+    # Parameters, with their default values
+    gameCount = 100000
+
+    # For each argument
+    argNo = 1
+    while argNo < len(sys.argv):
+        arg = sys.argv[argNo]
+        argNo += 1
+
+        # If it's an option
+        if arg[0] == "-":
+            if arg == "-g" or arg == "--games":
+                if argNo >= len(sys.argv):
+                    printAndFlush("ERROR: -g/--games requires a value.")
+                    sys.exit(-1)
+                gameCount = int(sys.argv[argNo])
+                argNo += 1
+
+            elif arg == "-h" or arg == "--help":
+                printUsage(sys.stdout)
+                sys.exit(0)
+
+            else:
+                printAndFlush("ERROR: Unrecognised option: " + arg)
+                printAndFlush("(Run with --help to show command usage.)")
+                sys.exit(-1)
+
+        # Else if it's an argument
+        else:
+            printAndFlush("ERROR: Too many arguments.")
+            printAndFlush("(Run with --help to show command usage.)")
+            sys.exit(-1)
+
+    # + }}}
+
+    with tempfile.TemporaryDirectory() as tempDirPath:
+        gamebaseFilePath = os.path.join(tempDirPath, "bench.sqlite")
+        printAndFlush("Making gamebase with " + str(gameCount) + " games...")
+        makeGamebase(gamebaseFilePath, gameCount)
+        db.openDb("bench", gamebaseFilePath)
+
+        def fetchAll(i_sortOperations):
+            return db.getGameList_executeSqlAndFetchAll(db.getGameList_getSql(g_benchmarkColumnIds, "", i_sortOperations), i_sortOperations)
+
+        initialSortOperations = [("name", 1)]
+        columnNames, initialRecords = fetchAll(initialSortOperations)
+
+        numpyChoices = [False, True] if db.g_haveNumpy else [False]
+        for newSortOperations in [[("year", -1)], [("publisher", 1), ("name", 1)], [("genre", 1), ("year", -1), ("name", -1)]]:
+            printAndFlush("")
+            printAndFlush("From " + str(initialSortOperations) + " to " + str(newSortOperations) + ", " + str(len(initialRecords)) + " rows:")
+
+            startTime = time.perf_counter()
+            queriedRecords = fetchAll(newSortOperations)[1]
+            querySeconds = time.perf_counter() - startTime
+            printAndFlush("  Query again:                     {:8.1f} ms".format(querySeconds * 1000))
+
+            for useNumpy in numpyChoices:
+                db.g_haveNumpy = useNumpy
+                label = "with NumPy" if useNumpy else "without NumPy"
+
+                startTime = time.perf_counter()
+                resortedRecords, sortRanks = db.getGameList_resortInMemory(initialRecords, columnNames, newSortOperations, {})
+                firstSeconds = time.perf_counter() - startTime
+
+                # Sort the same records again, this time with their ranks already known
+                initialSortRanks = {columnNo: db.getSortRanks(initialRecords, columnNo)  for columnNo in sortRanks.keys()}
+                startTime = time.perf_counter()
+                db.getGameList_resortInMemory(initialRecords, columnNames, newSortOperations, initialSortRanks)
+                againSeconds = time.perf_counter() - startTime
+
+                printAndFlush("  Re-sort {:<14} first:   {:8.1f} ms ({:.1f}x faster)".format(label + ",", firstSeconds * 1000, querySeconds / firstSeconds))
+                printAndFlush("  Re-sort {:<14} again:   {:8.1f} ms ({:.1f}x faster)".format(label + ",", againSeconds * 1000, querySeconds / againSeconds))
+
+                if sortKeys(resortedRecords, columnNames, newSortOperations) != sortKeys(queriedRecords, columnNames, newSortOperations):
+                    printAndFlush("  ERROR: The orders differ.")
+            db.g_haveNumpy = numpyChoices[-1]
+
+        db.closeDb("bench")
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+
+# Measure how many MyTableModel.data() calls per second the game table can answer,
+# using a synthetic result set so that no Gamebase needs to be loaded.
+#
+# Run from anywhere; the frontend modules are imported from the parent folder.
+
+
+# Python
+import sys
+import os.path
+import sqlite3
+import time
+
+# Qt
+from PySide2.QtCore import *
+from PySide2.QtWidgets import *
+from PySide2.QtGui import *
+
+# This program
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import columns
+import game_table_view
+
+
+def printAndFlush(i_str):
+    print(i_str)
+    sys.stdout.flush()
+
+# Visible columns to benchmark with,
+# covering each kind of column that MyTableModel.data() handles differently
+g_benchmarkColumnIds = ["detail", "play", "music", "pic[0]", "name", "year", "publisher", "genre", "control", "pal_ntsc", "clone_of", "comment"]
+
+def makeResult(i_rowCount):
+    """
+    Make a result set that looks like one from db.getGameList_executeSqlAndFetchAll()
+    for the columns in g_benchmarkColumnIds.
+
+    Params:
+     i_rowCount:
+      (int)
+
+    Returns:
+     (tuple)
+     Tuple has elements:
+      0:
+       (list of str)
+       Column names
+      1:
+       (list of sqlite3.Row)
+       Records
+    """
+    selectTerms = [
+        "'bench' AS [SchemaName]",
+        "i AS [Games.GA_Id]"
+    ]
+    for columnId in g_benchmarkColumnIds:
+        tableColumnSpec = columns.tableColumnSpec_getById(columnId)
+        if "dbIdentifiers" not in tableColumnSpec:
+            continue
+        dbIdentifier = tableColumnSpec["dbIdentifiers"][0]
+        if dbIdentifier in ["SchemaName", "Games.GA_Id"]:
+            continue
+
+        if tableColumnSpec.get("type") == "enum":
+            valueExpression = "i % " + str(len(tableColumnSpec["enumMap"]) + 1)
+        elif tableColumnSpec.get("type") == "gameId":
+            valueExpression = "(i % 3) * i"
+        elif dbIdentifier in ["Games.Filename", "Games.SidFilename"]:
+            valueExpression = "CASE WHEN i % 2 THEN 'game' || i || '.d64' END"
+        else:
+            valueExpression = "'" + columnId + " ' || i"
+        selectTerms.append(valueExpression + " AS [" + dbIdentifier + "]")
+
+    connection = sqlite3.connect("")
+    connection.row_factory = sqlite3.Row
+    cursor = connection.execute("WITH RECURSIVE counter(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM counter WHERE i < ?)\nSELECT " + ", ".join(selectTerms) + " FROM counter", (i_rowCount,))
+    rows = cursor.fetchall()
+    columnNames = [column[0]  for column in cursor.description]
+    return columnNames, rows
+
+def benchmark(i_tableView, i_seconds):
+    """
+    Call data() on the table view's model for a page of cells at a time,
+    moving down through all the rows and asking for the roles that a paint asks for,
+    until a given time has passed.
+
+    Params:
+     i_tableView:
+      (game_table_view.GameTableView)
+     i_seconds:
+      (float)
+
+    Returns:
+     (float)
+     Calls per second.
+    """
+    model = i_tableView.tableModel
+    rowCount = model.rowCount(QModelIndex())
+    columnCount = model.columnCount(QModelIndex())
+    roles = [Qt.DisplayRole, Qt.TextAlignmentRole, Qt.FontRole, Qt.ForegroundRole, Qt.BackgroundRole, Qt.DecorationRole, game_table_view.MyTableModel.FilterRole]
+
+    # Make the indexes up front, so that only data() is timed
+    pageRowCount = 30
+    pages = []
+    for firstRowNo in range(0, rowCount, pageRowCount):
+        pages.append([model.index(rowNo, columnNo)  for rowNo in range(firstRowNo, min(firstRowNo + pageRowCount, rowCount))  for columnNo in range(columnCount)])
+
+    callCount = 0
+    startTime = time.perf_counter()
+    endTime = startTime + i_seconds
+    pageNo = 0
+    while time.perf_counter() < endTime:
+        for index in pages[pageNo]:
+            for role in roles:
+                model.data(index, role)
+        callCount += len(pages[pageNo]) * len(roles)
+        pageNo = (pageNo + 1) % len(pages)
+
+    return callCount / (time.perf_counter() - startTime)
+
+
+if __name__ == "__main__":
+    # + Parse command line {{{
+
+    COMMAND_NAME = "benchmark_table_model.py"
+
+    def printUsage(i_outputStream):
+        i_outputStream.write('''\
+''' + COMMAND_NAME + '''
+Game table model benchmark.
+
+Fill the game table with a synthetic result set
+and measure how many calls to its model's data() method can be made per second.
+
+Usage:
+======
+''' + COMMAND_NAME + ''' [options]
+
+Options:
+ -r/--rows <count>
+   Number of rows in the result set.
+   Default: 50000
+ -s/--seconds <seconds>
+   How long to keep calling data() for.
+   Default: 5
+
+ Info:
+  -h/--help
+    Show this help.
+''')
+
+    # Parameters, with their default values
+    rowCount = 50000
+    seconds = 5.0
+
+    # For each argument
+    argNo = 1
+    while argNo < len(sys.argv):
+        arg = sys.argv[argNo]
+        argNo += 1
+
+        # If it's an option
+        if arg[0] == "-":
+            if arg == "-r" or arg == "--rows":
+                if argNo >= len(sys.argv):
+                    printAndFlush("ERROR: -r/--rows requires a value.")
+                    sys.exit(-1)
+                rowCount = int(sys.argv[argNo])
+                argNo += 1
+
+            elif arg == "-s" or arg == "--seconds":
+                if argNo >= len(sys.argv):
+                    printAndFlush("ERROR: -s/--seconds requires a value.")
+                    sys.exit(-1)
+                seconds = float(sys.argv[argNo])
+                argNo += 1
+
+            elif arg == "-h" or arg == "--help":
+                printUsage(sys.stdout)
+                sys.exit(0)
+
+            else:
+                printAndFlush("ERROR: Unrecognised option: " + arg)
+                printAndFlush("(Run with --help to show command usage.)")
+                sys.exit(-1)
+
+        # Else if it's an argument
+        else:
+            printAndFlush("ERROR: Too many arguments.")
+            printAndFlush("(Run with --help to show command usage.)")
+            sys.exit(-1)
+
+    # + }}}
+
+    application = QApplication(sys.argv)
+
+    columns.tableColumn_setAll([{ "id": columnId }  for columnId in g_benchmarkColumnIds])
+
+    tableView = game_table_view.GameTableView(0)
+
+    printAndFlush("Making " + str(rowCount) + " rows...")
+    columnNames, rows = makeResult(rowCount)
+    tableView.setQueryResult(columnNames, rows)
+    tableView.requery()
+
+    printAndFlush("Calling data() for " + str(seconds) + " seconds...")
+    callsPerSecond = benchmark(tableView, seconds)
+    printAndFlush("data() calls per second: " + str(int(callsPerSecond)))
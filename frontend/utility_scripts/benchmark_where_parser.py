@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+
+# Measure how long the SQL WHERE expression tokenizer and parser take
+# on machine-generated filter expressions of increasing length,
+# to check that the time per token stays about the same as the expressions get longer.
+#
+# Run from anywhere; the frontend modules are imported from the parent folder.
+
+
+# Python
+import sys
+import os.path
+import time
+
+# This program
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import sql
+
+
+def printAndFlush(i_str):
+    print(i_str)
+    sys.stdout.flush()
+
+def makeWhereExpression(i_rowCount):
+    """
+    Make a WHERE expression like the column filter bar would make
+    for a given number of rows of filters ORed together.
+
+    Params:
+     i_rowCount:
+      (int)
+
+    Returns:
+     (str)
+    """
+    rowExpressions = []
+    for rowNo in range(i_rowCount):
+        terms = [
+            "\"Games.Name\" LIKE '%game" + str(rowNo) + "''s%' ESCAPE '\\'",
+            "\"Years.Year\" BETWEEN " + str(1980 + rowNo % 10) + " AND " + str(1990 + rowNo % 10),
+            "\"Publishers.Publisher\" REGEXP 'soft|ware'",
+            "\"Games.Rating\" >= " + str(rowNo % 5)
+        ]
+        rowExpressions.append("(" + " AND ".join(terms) + ")")
+    return " OR ".join(rowExpressions)
+
+def timeCall(i_function, i_seconds):
+    """
+    Call a function repeatedly until a given time has passed.
+
+    Params:
+     i_function:
+      (callable)
+     i_seconds:
+      (float)
+
+    Returns:
+     (float)
+     Average number of seconds per call.
+    """
+    callCount = 0
+    startTime = time.perf_counter()
+    endTime = startTime + i_seconds
+    while time.perf_counter() < endTime:
+        i_function()
+        callCount += 1
+    return (time.perf_counter() - startTime) / callCount
+
+
+if __name__ == "__main__":
+    # + Parse command line {{{
+
+    COMMAND_NAME = "benchmark_where_parser.py"
+
+    def printUsage(i_outputStream):
+        i_outputStream.write('''\
+''' + COMMAND_NAME + '''
+WHERE expression parser benchmark.
+
+Tokenize and parse WHERE expressions of increasing numbers of ORed column filter rows
+and print the time taken per token.
+
+Usage:
+======
+''' + COMMAND_NAME + ''' [options]
+
+Options:
+ -r/--rows <count>,...
+   Numbers of column filter rows to try, separated by commas.
+   Default: 1,10,100,200,400,800
+ -s/--seconds <seconds>
+   How long to keep calling the tokenizer or parser for, for each number of rows.
+   Default: 1
+
+ Info:
+  -h/--help
+    Show this help.
+''')
+
+    # Parameters, with their default values
+    rowCounts = [1, 10, 100, 200, 400, 800]
+    seconds = 1.0
+
+    # For each argument
+    argNo = 1
+    while argNo < len(sys.argv):
+        arg = sys.argv[argNo]
+        argNo += 1
+
+        # If it's an option
+        if arg[0] == "-":
+            if arg == "-r" or arg == "--rows":
+                if argNo >= len(sys.argv):
+                    printAndFlush("ERROR: -r/--rows requires a value.")
+                    sys.exit(-1)
+                rowCounts = [int(rowCount)  for rowCount in sys.argv[argNo].split(",")]
+                argNo += 1
+
+            elif arg == "-s" or arg == "--seconds":
+                if argNo >= len(sys.argv):
+                    printAndFlush("ERROR: -s/--seconds requires a value.")
+                    sys.exit(-1)
+                seconds = float(sys.argv[argNo])
+                argNo += 1
+
+            elif arg == "-h" or arg == "--help":
+                printUsage(sys.stdout)
+                sys.exit(0)
+
+            else:
+                printAndFlush("ERROR: Unrecognised option: " + arg)
+                printAndFlush("(Run with --help to show command usage.)")
+                sys.exit(-1)
+
+        # Else if it's an argument
+        else:
+            printAndFlush("ERROR: Too many arguments.")
+            printAndFlush("(Run with --help to show command usage.)")
+            sys.exit(-1)
+
+    # + }}}
+
+    printAndFlush("rows\tchars\ttokens\ttokenize (us/token)\tparse (us/token)\tcached parse (us)")
+    for rowCount in rowCounts:
+        whereExpression = makeWhereExpression(rowCount)
+        tokenCount = len(sql.tokenizeWhereExpr(whereExpression))
+
+        def tokenize():
+            sql.tokenizeWhereExpr(whereExpression)
+        def parse():
+            sql.parseExpression(sql.tokenizeWhereExpr(whereExpression))
+        def parseCached():
+            sql.parseWhereExpr(whereExpression)
+
+        tokenizeTime = timeCall(tokenize, seconds)
+        parseTime = timeCall(parse, seconds) - tokenizeTime
+        parseCachedTime = timeCall(parseCached, seconds)
+
+        printAndFlush(str(rowCount) + "\t" + str(len(whereExpression)) + "\t" + str(tokenCount) + "\t" + "%.3f" % (tokenizeTime / tokenCount * 1000000) + "\t" + "%.3f" % (parseTime / tokenCount * 1000000) + "\t" + "%.3f" % (parseCachedTime * 1000000))
@@ -0,0 +1,69 @@
+# Helpers shared by the benchmark scripts in this folder,
+# chiefly for making synthetic gamebases so that no real ones need to be converted.
+
+
+# Python
+import sys
+import sqlite3
+import random
+
+
+def printAndFlush(i_str):
+    print(i_str)
+    sys.stdout.flush()
+
+def makeGamebase(i_filePath, i_gameCount, i_seed=1, i_indexGameIds=False):
+    """
+    Make a database with a Games table and the tables that the commonly benchmarked columns come from
+    (Years, Publishers, Developers, Genres and PGenres), filled with made-up games.
+
+    The names mix upper and lower case words, some publishers are unknown (NULL)
+    and about a fifth of the games refer to another as their clone, prequel, sequel or related game,
+    so that sorting, filtering and fetching records all have something realistic to work on.
+
+    Params:
+     i_filePath:
+      (str)
+     i_gameCount:
+      (int)
+     i_seed:
+      (int)
+      Seed for the made-up values, to make each gamebase different.
+     i_indexGameIds:
+      (bool)
+      True: Make an index of Games.GA_Id, as a gamebase converted with its indexes would have.
+    """
+    connection = sqlite3.connect(i_filePath)
+    connection.executescript("""
+        CREATE TABLE Games (GA_Id INTEGER, Name TEXT, YE_Id INTEGER, PU_Id INTEGER, DE_Id INTEGER, GE_Id INTEGER, CloneOf INTEGER, Prequel INTEGER, Sequel INTEGER, Related INTEGER, Comment TEXT);
+        CREATE TABLE Years (YE_Id INTEGER, Year INTEGER);
+        CREATE TABLE Publishers (PU_Id INTEGER, Publisher TEXT);
+        CREATE TABLE Developers (DE_Id INTEGER, Developer TEXT);
+        CREATE TABLE Genres (GE_Id INTEGER, PG_Id INTEGER, Genre TEXT);
+        CREATE TABLE PGenres (PG_Id INTEGER, ParentGenre TEXT);
+    """)
+    if i_indexGameIds:
+        connection.execute("CREATE INDEX Games_GA_Id ON Games (GA_Id)")
+
+    randomGenerator = random.Random(i_seed)
+    words = ["Space", "moon", "Quest", "ninja", "Ball", "light", "Dark", "blast", "Ice", "alpha", "Zone", "racer", "Castle", "dragon"]
+    def relatedGameId():
+        return randomGenerator.randrange(1, i_gameCount + 1) if randomGenerator.random() < 0.2 else 0
+    connection.executemany("INSERT INTO Years VALUES (?, ?)", [(yearId, 1980 + yearId)  for yearId in range(20)])
+    # Leave some publishers unknown, to have NULLs to sort
+    connection.executemany("INSERT INTO Publishers VALUES (?, ?)", [(publisherId, None if publisherId % 50 == 0 else randomGenerator.choice(words) + " Soft " + str(publisherId))  for publisherId in range(2000)])
+    connection.executemany("INSERT INTO Developers VALUES (?, ?)", [(developerId, randomGenerator.choice(words) + " Team " + str(developerId))  for developerId in range(3000)])
+    connection.executemany("INSERT INTO PGenres VALUES (?, ?)", [(parentGenreId, "Parent genre " + str(parentGenreId))  for parentGenreId in range(10)])
+    connection.executemany("INSERT INTO Genres VALUES (?, ?, ?)", [(genreId, genreId % 10, "Genre " + str(genreId))  for genreId in range(100)])
+    connection.executemany("INSERT INTO Games VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", [
+        (gameId,
+         " ".join(randomGenerator.sample(words, 2)) + " " + str(gameId),
+         randomGenerator.randrange(20),
+         randomGenerator.randrange(2000),
+         randomGenerator.randrange(3000),
+         randomGenerator.randrange(100),
+         relatedGameId(), relatedGameId(), relatedGameId(), relatedGameId(),
+         " ".join(randomGenerator.choices(words, k=randomGenerator.randrange(40))))
+        for gameId in range(1, i_gameCount + 1)])
+    connection.commit()
+    connection.close()